@@ -2,72 +2,98 @@ from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
 # ← ここを変更
 from extentions import db
+from common import idempotency, service_client
+from database import connection, invalidation, migrate
+from monitoring import metrics, slow_queries, timing
+import importlib
 import os
 
-app = Flask(__name__)
-CORS(app)
-
-# SQLite 設定
-app.config["SQLALCHEMY_DATABASE_URI"]      = "sqlite:///messages.db"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-
-# ← こうする
-db.init_app(app)
+# Blueprint の一覧（ルートモジュール, Blueprint 変数名, url_prefix）
+# ルートモジュールは create_app() の中で初めて import する。
+# init_app(app) を持つモジュールは、コンポーネントをワーカーごとに1回だけ初期化する。
+BLUEPRINTS = [
+    ("modules.Loginout.route", "auth_bp", None),
+    ("modules.calendar_process.route", "calendar_bp", None),
+    ("modules.calendar_manager.route", "calendar_manager_bp", None),
+    ("modules.community_service.route", "community_bp", "/api/community"),
+    ("modules.community_management.route", "management_bp", None),
+    ("modules.user_data_process.route", "user_data_bp", None),      # C3 ユーザ情報処理部
+    ("modules.user_data_management.route", "user_bp", None),        # C8 ユーザ情報管理部
+    ("modules.matching.route", "matching_bp", None),
+    ("modules.notification.route", "notification_bp", None),        # C7 通知処理部
+]
 
 class Message(db.Model):
     id   = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.String(120), nullable=False)
 
 
-db_initialized = False
-
-@app.route('/uploads/<path:filename>')
 def serve_uploads(filename):
     uploads_dir = os.path.join(os.path.dirname(__file__), 'uploads')
     return send_from_directory(uploads_dir, filename, as_attachment=False)
 
-@app.before_request
-def init_db():
-    global db_initialized
-    if not db_initialized:
-        # アプリコンテキストが必要
-        with app.app_context():
-            db.create_all()
-            if Message.query.count() == 0:
-                db.session.add_all([
-                    Message(text="Hello from Flask!"),
-                    Message(text="SQLite と React のサンプルです！")
-                ])
-                db.session.commit()
-        db_initialized = True
-
-
-
-@app.route("/api/messages")
 def get_messages():
     msgs = Message.query.all()
     return jsonify([{"id": m.id, "text": m.text} for m in msgs])
 
-from modules.community_service.route import community_bp as community_service_bp
-from modules.community_management.route import management_bp as community_management_bp
-from modules.user_data_process.route import user_data_bp
-from modules.user_data_management.route import user_bp
-from modules.calendar_process.route import calendar_bp
-from modules.calendar_manager.route import calendar_manager_bp
-from modules.Loginout.route import auth_bp ,init_app
-from modules.matching.route import matching_bp
-# Blueprint の登録
 
-app.register_blueprint(auth_bp)
-app.register_blueprint(calendar_bp)
-app.register_blueprint(calendar_manager_bp)
-app.register_blueprint(community_service_bp, url_prefix="/api/community")
-app.register_blueprint(community_management_bp)
-app.register_blueprint(user_data_bp) # C3 ユーザ情報処理部のBlueprintを登録
-app.register_blueprint(user_bp)      # C8 ユーザ情報管理部のBlueprintを登録
-app.register_blueprint(matching_bp)
+def register_blueprints(app):
+    """
+    Blueprint を登録し、各ルートモジュールの init_app でコンポーネントを初期化する
+    """
+    for module_name, blueprint_name, url_prefix in BLUEPRINTS:
+        module = importlib.import_module(module_name)
+        app.register_blueprint(getattr(module, blueprint_name), url_prefix=url_prefix)
+        if hasattr(module, "init_app"):
+            module.init_app(app)
+
+
+def create_app(config=None):
+    """
+    Flask アプリケーションを生成する（アプリケーションファクトリ）
+    Args:
+        config (dict | object, optional): 既定値を上書きする設定（dict または設定クラス）
+    Returns:
+        Flask: 初期化済みのアプリケーション
+    """
+    app = Flask(__name__)
+    if isinstance(config, dict):
+        app.config.from_mapping(config)
+    elif config is not None:
+        app.config.from_object(config)
+    CORS(app)
+
+    # SQLite 設定（接続・プール・PRAGMA は database/connection.py に集約）
+    connection.init_app(app)
+    # スキーマはリクエスト処理ではなく起動時（または flask migrate）にマイグレーションで作成する
+    migrate.init_app(app)
+    # リクエストごとの処理時間・DB・外部 HTTP の計測（REQUEST_TIMING=1 で有効）
+    timing.init_app(app)
+    # /metrics（Prometheus 形式。METRICS_ENABLED=0 で無効）
+    metrics.init_app(app)
+    # 遅いクエリの記録と /admin/slow-queries（SLOW_QUERY_THRESHOLD_MS を超えた文を EXPLAIN 付きで記録）
+    slow_queries.init_app(app)
+    # コンポーネント間 API 呼び出しのタイムアウト・再試行・サーキットブレーカ（common/service_client.py）
+    service_client.init_app(app)
+    # Idempotency-Key による POST の重複防止（common/idempotency.py）
+    idempotency.init_app(app)
+    # プロセス内キャッシュのプロセス間無効化（cache_changes の変更ログ。database/invalidation.py）
+    invalidation.init_app(app)
+
+    app.add_url_rule('/uploads/<path:filename>', view_func=serve_uploads)
+    app.add_url_rule("/api/messages", view_func=get_messages)
+    register_blueprints(app)
+    return app
+
+
+def __getattr__(name):
+    # `from app import app` や WSGI サーバの "app:app" 指定のために、初回参照時にアプリを生成する
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-init_app(app)
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5001, debug=True)
+    create_app().run(host="0.0.0.0", port=5001, debug=True)
@@ -0,0 +1,442 @@
+# backend/asgi.py
+"""
+ASGI（asyncio）での起動
+ホットな読み取りエンドポイントを asyncio 上で処理し、遅いクライアントや
+コンポーネント間の呼び出し（C5→C10, C6→C10）を待つ間もスレッドを占有しない。
+1ワーカーで数千の同時接続を保持できる。
+- C5  GET /api/<community_id>/calendar/tag/get, /tag/get/<user_id>
+- C10 GET /api/calendar-manager/tags, /tags/user, /find/matching_tags
+- C6  GET /api/matching/
+- C9  GET /api/community/<community_id>/tag/<tag_id>/chat/history
+DB は aiosqlite の読み取りプール（database/async_connection.py）、
+コンポーネント間の呼び出しは aiohttp で行い、応答は Flask のルートと同じにする。
+それ以外のリクエストは create_app() の Flask アプリへ、スレッドプール（ASGI_WSGI_THREADS、既定 32）上で
+WSGI として渡す。SSE などのストリーミング応答は応答ごとに専用スレッドで送り、プールを塞がない。
+
+起動例 (backend ディレクトリで):
+    pip install -r requirements.txt -r requirements-asgi.txt
+    FLASK_URL=http://127.0.0.1:5001 uvicorn asgi:application --host 0.0.0.0 --port 5001
+"""
+
+import asyncio
+import io
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+try:
+    import aiohttp
+    from database.async_connection import AsyncReadPool
+except ImportError as e:
+    raise ImportError(
+        "ASGI モードには aiosqlite と aiohttp が必要です（pip install -r requirements-asgi.txt）"
+    ) from e
+
+from app import create_app
+from database.dates import normalize_date, to_day
+from modules.calendar_manager.calendar_manager_async import AsyncCalendarManager
+from modules.calendar_process.calendar_process_async import AsyncCalenderProcess
+from modules.community_management.chat_archive import read_archived_thread_async
+from modules.matching.matching_async import AsyncMatching
+from monitoring.metrics import record_request
+
+logger = logging.getLogger(__name__)
+
+# Flask へ渡すリクエストを処理するスレッド数
+WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "32"))
+
+# コンポーネント間呼び出しの同時接続数の上限とタイムアウト（秒）
+HTTP_MAX_CONNECTIONS = int(os.getenv("ASGI_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_TIMEOUT = float(os.getenv("ASGI_HTTP_TIMEOUT", "10"))
+
+# asyncio で処理するルート（メソッド, パス, 処理メソッド名, Blueprint 名, Flask のルート）
+ROUTES = [
+    ("GET", r"/api/(?P<community_id>[^/]+)/calendar/tag/get", "calendar_tag_get",
+     "calendar", "/api/<string:community_id>/calendar/tag/get"),
+    ("GET", r"/api/(?P<community_id>[^/]+)/calendar/tag/get/(?P<user_id>[^/]+)", "calendar_tag_get_user",
+     "calendar", "/api/<string:community_id>/calendar/tag/get/<string:user_id>"),
+    ("GET", r"/api/calendar-manager/tags", "manager_tags",
+     "calendar_manager", "/api/calendar-manager/tags"),
+    ("GET", r"/api/calendar-manager/tags/user", "manager_tags_user",
+     "calendar_manager", "/api/calendar-manager/tags/user"),
+    ("GET", r"/api/calendar-manager/find/matching_tags", "manager_matching_tags",
+     "calendar_manager", "/api/calendar-manager/find/matching_tags"),
+    ("GET", r"/api/matching/", "matching",
+     "matching", "/api/matching/"),
+    ("GET", r"/api/community/(?P<community_id>[^/]+)/tag/(?P<tag_id>[^/]+)/chat/history", "chat_history",
+     "community_service", "/api/community/<string:community_id>/tag/<string:tag_id>/chat/history"),
+]
+
+
+class AsyncRequest:
+    """
+    asyncio で処理するルートに渡すリクエスト（flask.request の必要な部分だけ）
+    """
+
+    __slots__ = ("args", "body", "headers")
+
+    def __init__(self, scope, body):
+        query = scope.get("query_string", b"").decode("latin-1")
+        self.args = {k: v[0] for k, v in parse_qs(query, keep_blank_values=True).items()}
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        self.body = body
+
+    def get_json(self):
+        """
+        JSON ボディ（空なら None）。不正な JSON は json.JSONDecodeError
+        """
+        if not self.body:
+            return None
+        return json.loads(self.body)
+
+
+class AsyncApp:
+    """
+    ASGI アプリケーション
+    ROUTES に一致するリクエストは asyncio で処理し、それ以外は Flask アプリへ渡す。
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.routes = [
+            (method, re.compile(pattern + "$"), getattr(self, handler), blueprint, rule)
+            for method, pattern, handler, blueprint, rule in ROUTES
+        ]
+        self.executor = ThreadPoolExecutor(WSGI_THREADS, thread_name_prefix="wsgi")
+        self.pool = None
+        self.session = None
+        self.manager = None
+        self.calendar = None
+        self.matcher = None
+
+    async def startup(self):
+        self.pool = AsyncReadPool(self.flask_app.config["DATABASE_PATH"])
+        await self.pool.open()
+        # 上限を超えた呼び出しは空き接続を待つ（待ち時間はタイムアウトに含めない）
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=HTTP_MAX_CONNECTIONS),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=HTTP_TIMEOUT, sock_read=HTTP_TIMEOUT),
+        )
+        self.manager = AsyncCalendarManager(self.pool)
+        self.calendar = AsyncCalenderProcess(self.session)
+        self.matcher = AsyncMatching(self.session)
+        logger.info(f"✅ ASGI モードで起動しました（読み取りプール {self.pool.size} 接続）")
+
+    async def shutdown(self):
+        if self.session is not None:
+            await self.session.close()
+        if self.pool is not None:
+            await self.pool.close()
+        self.executor.shutdown(wait=False)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        for method, pattern, handler, blueprint, rule in self.routes:
+            match = pattern.match(scope["path"])
+            if match and scope["method"] == method:
+                await self._call_async(scope, receive, send, handler, match.groupdict(), blueprint, rule)
+                return
+        await self._call_wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    logger.error(f"❌ ASGI モードの起動に失敗: {e}")
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # --- asyncio で処理するルート ---
+
+    async def _call_async(self, scope, receive, send, handler, params, blueprint, rule):
+        started = time.perf_counter()
+        request = AsyncRequest(scope, await _read_body(receive))
+        try:
+            payload, status = await handler(request, **params)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            payload, status = {"result": False, "message": "リクエストボディが不正な JSON です。"}, 400
+        except Exception as e:
+            logger.warning(f"❌ {rule} の処理に失敗: {e}")
+            payload, status = {"result": False, "message": "サーバ内部エラー"}, 500
+
+        # jsonify と同じ形式（コンパクトな JSON + 改行）で返す
+        body = (self.flask_app.json.dumps(payload, separators=(",", ":")) + "\n").encode()
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        if "origin" in request.headers:
+            headers.append((b"access-control-allow-origin", b"*"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+        if self.flask_app.config.get("METRICS"):
+            record_request(blueprint, rule, scope["method"], status, time.perf_counter() - started)
+
+    async def calendar_tag_get(self, request, community_id):
+        """
+        C5 タグ取得（calendar_process.route.get_community_date_tag）
+        """
+        date = request.args.get("date")
+        if not date:
+            return {"error": "date未指定"}, 400
+        date = normalize_date(date)
+        if not date:
+            return {"error": "dateの形式が不正です（YYYY-MM-DD）"}, 400
+        success, result = await self.calendar.tag_get_from_community_and_date(community_id, date)
+        return result, 200 if success else 500
+
+    async def calendar_tag_get_user(self, request, community_id, user_id):
+        """
+        C5 ユーザー別タグ取得（calendar_process.route.get_community_date_user_id）
+        """
+        date = request.args.get("date")
+        if not date:
+            return {"error": "date未指定"}, 400
+        date = normalize_date(date)
+        if not date:
+            return {"error": "dateの形式が不正です（YYYY-MM-DD）"}, 400
+        success, result = await self.calendar.tag_get_from_community_date_user(community_id, date, user_id)
+        return result, 200 if success else 500
+
+    async def manager_tags(self, request):
+        """
+        C10 M2 カレンダー情報要求（calendar_manager.route.manager_get_calendar_tags）
+        """
+        data = request.get_json()
+        if not data:
+            return {"result": False, "message": "リクエストボディが空です。"}, 400
+        community_id = data.get("community_id")
+        date = data.get("date")
+        if not community_id:
+            return {"result": False, "message": "community_idが未指定です。"}, 400
+        if not date:
+            return {"result": False, "message": "dateが未指定です。"}, 400
+        result = await self.manager.request_calendar_data(community_id, date)
+        return result, 200 if result["result"] else 500
+
+    async def manager_tags_user(self, request):
+        """
+        C10 ユーザー別タグ取得（calendar_manager.route.find_tags_by_user_date_community）
+        """
+        data = request.get_json() or {}
+        result = await self.manager.find_user_date_community(
+            data.get("community_id"), data.get("date"), data.get("user_id")
+        )
+        return result, 200 if result["result"] else 500
+
+    async def manager_matching_tags(self, request):
+        """
+        C10 M5 マッチングタグ取得要求（calendar_manager.route.manager_find_matching_tags）
+        """
+        data = request.get_json()
+        if not data:
+            return {"result": False, "message": "リクエストボディが空です。"}, 400
+        values = {key: data.get(key) for key in ("community_id", "tag_name", "date", "registered_user_id")}
+        for key, val in values.items():
+            if not val:
+                return {"result": False, "message": f"{key}が未指定です。"}, 400
+        result = await self.manager.find_matching_tag(**values)
+        return result, 200 if result["result"] else 500
+
+    async def matching(self, request):
+        """
+        C6 マッチング処理要求（matching.route.request_matching）
+        """
+        data = request.get_json() or {}
+        values = {key: data.get(key) for key in ("community_id", "tag_name", "date", "registered_user_id")}
+        missing = [key for key, val in values.items() if not val]
+        if missing:
+            return {"result": False, "message": f"{', '.join(missing)} が未指定です。"}, 400
+        matching_user_ids = await self.matcher.find_matching_user(**values)
+        return {"result": True, "matching_user_ids": matching_user_ids}, 200
+
+    async def chat_history(self, request, community_id, tag_id):
+        """
+        M9 チャット履歴取得（community_service.get_chat_history）
+        """
+        date = request.args.get("date", "").strip()
+        if not all([community_id, tag_id, date]):
+            return {"error": "不正な入力です"}, 400
+        date = normalize_date(date)
+        if not date:
+            return {"error": "dateの形式が不正です（YYYY-MM-DD）"}, 400
+        try:
+            # 古いスレッドは圧縮アーカイブに移動されているため並行して読む
+            rows, archived = await asyncio.gather(
+                self.pool.fetchall(
+                    "SELECT sender_id, sender_name, message_content, timestamp FROM chat_messages WHERE community_id = ? AND tag_id = ? AND date = ? ORDER BY timestamp ASC",
+                    (community_id, tag_id, to_day(date))
+                ),
+                read_archived_thread_async(self.pool, community_id, tag_id, date),
+            )
+        except Exception as e:
+            logger.warning(f"❌ チャット履歴取得失敗: {e}")
+            return {"error": "チャット履歴の取得に失敗しました。"}, 500
+        chat_history = archived + [{"sender_id": r["sender_id"], "sender_name": r["sender_name"], "message_content": r["message_content"], "timestamp": r["timestamp"]} for r in rows]
+        return {"chat_history": chat_history}, 200
+
+    # --- Flask アプリへの受け渡し ---
+
+    async def _call_wsgi(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        environ = _wsgi_environ(scope, await _read_body(receive))
+        status, headers, body, stream = await loop.run_in_executor(self.executor, self._run_wsgi, environ)
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+        })
+        if stream is None:
+            await send({"type": "http.response.body", "body": b"".join(body)})
+        else:
+            await self._send_stream(stream, body, receive, send)
+
+    def _run_wsgi(self, environ):
+        """
+        スレッドプール上で Flask アプリを呼ぶ
+        Content-Length のある応答は本文まで読み切り、ない応答（ストリーミング）は反復可能なまま返す。
+        """
+        response = {}
+        body = []
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = headers
+            return body.append
+
+        result = self.flask_app(environ, start_response)
+        if not any(name.lower() == "content-length" for name, _ in response["headers"]):
+            return response["status"], response["headers"], body, result
+        try:
+            body.extend(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], body, None
+
+    async def _send_stream(self, stream, body, receive, send):
+        """
+        ストリーミング応答を専用スレッドで反復し、届いた分から送る
+        クライアントが切断したら、次の chunk（SSE ではハートビート）でスレッドを終える。
+        """
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        stopped = threading.Event()
+
+        def pump():
+            try:
+                for chunk in stream:
+                    if stopped.is_set():
+                        break
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+            except Exception as e:
+                logger.warning(f"❌ ストリーミング応答の生成に失敗: {e}")
+            finally:
+                if hasattr(stream, "close"):
+                    stream.close()
+                try:
+                    loop.call_soon_threadsafe(chunks.put_nowait, None)
+                except RuntimeError:
+                    # イベントループが終了済み
+                    pass
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            stopped.set()
+
+        for chunk in body:
+            chunks.put_nowait(chunk)
+        threading.Thread(target=pump, name="wsgi-stream", daemon=True).start()
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            while (chunk := await chunks.get()) is not None:
+                if chunk and not stopped.is_set():
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            if not stopped.is_set():
+                await send({"type": "http.response.body", "body": b""})
+        except OSError:
+            stopped.set()
+        finally:
+            watcher.cancel()
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def _wsgi_environ(scope, body):
+    """
+    ASGI の scope から WSGI の environ を作る（PEP 3333）
+    """
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"], environ["REMOTE_PORT"] = scope["client"][0], str(scope["client"][1])
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_LENGTH":
+            continue
+        key = name if name == "CONTENT_TYPE" else f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def create_asgi_app(config=None):
+    """
+    ASGI アプリケーションを生成する
+    Args:
+        config (dict | object, optional): create_app() に渡す設定
+    Returns:
+        AsyncApp: ASGI アプリケーション
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    return AsyncApp(create_app(config))
+
+
+def __getattr__(name):
+    # uvicorn の "asgi:application" 指定のために、初回参照時にアプリを生成する
+    if name == "application":
+        global application
+        application = create_asgi_app()
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
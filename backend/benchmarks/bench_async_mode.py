@@ -0,0 +1,318 @@
+"""
+ASGI モードとスレッド型 WSGI モードの比較
+同じ一時DB（generate_dataset で生成）に対してモードごとに1プロセスのサーバを起動し、
+多数の遅いクライアント（リクエストヘッダを少しずつ送り続ける接続）を保持したまま、
+ホットな読み取りエンドポイント（C5 タグ取得・C6 マッチング・チャット履歴）へ
+指定した同時接続数でリクエストを流す。
+モードごとのスループット・p50/p95/p99・エラー数、最後まで保持できた遅いクライアント数、
+サーバのスレッド数（最大）・最大 RSS・1リクエストあたりの CPU 時間を JSON で出力する。
+
+- wsgi: werkzeug のスレッド型サーバ（python app.py と同じく接続ごとに1スレッド）
+- asgi: uvicorn + asgi.application（1ワーカー・1イベントループ）
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.bench_async_mode --concurrency 500 --slow-clients 2000 --duration 20
+    python -m benchmarks.bench_async_mode --modes asgi --output asgi.json
+負荷を掛けるクライアントも同じマシンで動くため、CPU 数が少ない環境ではスループットの絶対値より
+モード間の差と cpu_ms_per_request を見ること。
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generate_dataset import DatasetGenerator
+from benchmarks.loadtest import Recorder
+
+HOST = "127.0.0.1"
+
+
+def _raise_fd_limit(needed):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = min(hard, max(soft, needed))
+    if target > soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    return target
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+# --- サーバ（子プロセス） ---
+
+def serve(mode, port, db_path):
+    """
+    指定したモードでサーバを起動する（子プロセスで実行される）
+    """
+    _raise_fd_limit(65536)
+    # 両モードともアクセスログは出さない（uvicorn は log_level="warning"）
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    if mode == "wsgi":
+        from werkzeug.serving import make_server
+        from app import create_app
+
+        make_server(HOST, port, create_app({"DATABASE_PATH": db_path}), threaded=True).serve_forever()
+    else:
+        import uvicorn
+        from asgi import create_asgi_app
+
+        uvicorn.run(
+            create_asgi_app({"DATABASE_PATH": db_path}),
+            host=HOST, port=port, lifespan="on", log_level="warning", backlog=4096,
+        )
+
+
+def start_server(mode, db_path):
+    port = _free_port()
+    base_url = f"http://{HOST}:{port}"
+    env = dict(os.environ, FLASK_URL=base_url, C8_BASE_URL=f"{base_url}/api", DATABASE_PATH=db_path)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_async_mode", "--serve", mode, "--port", str(port), "--db", db_path],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{mode} サーバが起動しませんでした")
+
+
+def _cpu_seconds(pid):
+    """
+    プロセスが使った CPU 時間（user + system、秒）
+    """
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _proc_status(pid):
+    """
+    /proc/<pid>/status のスレッド数と最大 RSS（MB）
+    """
+    threads = rss = None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    threads = int(line.split()[1])
+                elif line.startswith("VmHWM:"):
+                    rss = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return threads, rss
+
+
+# --- 負荷 ---
+
+def load_targets(db_path, limit=500):
+    """
+    リクエストに使うコミュニティ・日付・タグ・チャットスレッドを DB から選ぶ
+    """
+    db = sqlite3.connect(db_path)
+    try:
+        # date は通し日数（database/dates.py）なので 'YYYY-MM-DD' に戻して使う
+        tags = db.execute(
+            "SELECT t.community_id, date(t.date * 86400, 'unixepoch'), n.name, t.submitter_id "
+            "FROM tags t JOIN tag_names n ON n.id = t.name_id ORDER BY random() LIMIT ?", (limit,)
+        ).fetchall()
+        threads = db.execute(
+            "SELECT community_id, tag_id, date(date * 86400, 'unixepoch') FROM chat_messages "
+            "GROUP BY community_id, tag_id, date ORDER BY random() LIMIT ?", (limit,)
+        ).fetchall()
+    finally:
+        db.close()
+    return tags, threads
+
+
+def make_requests(tags, threads):
+    """
+    (名前, パス, JSON ボディ) を返す関数のリスト
+    """
+    def calendar(rnd):
+        community_id, date, _, _ = rnd.choice(tags)
+        return "GET /api/<cid>/calendar/tag/get", f"/api/{community_id}/calendar/tag/get?date={date}", None
+
+    def matching(rnd):
+        community_id, date, name, submitter_id = rnd.choice(tags)
+        body = {"community_id": community_id, "tag_name": name, "date": date, "registered_user_id": submitter_id}
+        return "GET /api/matching/", "/api/matching/", body
+
+    def chat_history(rnd):
+        community_id, tag_id, date = rnd.choice(threads)
+        return ("GET /api/community/<cid>/tag/<tid>/chat/history",
+                f"/api/community/{community_id}/tag/{tag_id}/chat/history?date={date}", None)
+
+    return [calendar, matching, chat_history]
+
+
+async def hold_slow_client(port, interval, stop):
+    """
+    リクエストヘッダを interval 秒ごとに1行ずつ送り、stop まで接続を保持する
+    Returns:
+        bool: 最後まで接続を保持できたか
+    """
+    try:
+        reader, writer = await asyncio.open_connection(HOST, port)
+    except OSError:
+        return False
+    try:
+        writer.write(f"GET /api/matching/ HTTP/1.1\r\nHost: {HOST}\r\n".encode())
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            if reader.at_eof():
+                return False
+            writer.write(b"X-Slow-Client: 1\r\n")
+            await writer.drain()
+        return True
+    except (ConnectionError, OSError):
+        return False
+    finally:
+        writer.close()
+
+
+async def run_load(port, args, requests):
+    import aiohttp
+
+    recorder = Recorder()
+    stop = asyncio.Event()
+
+    # 遅いクライアントは listen キューを溢れさせないよう少しずつ接続する
+    slow = []
+    for start in range(0, args.slow_clients, 100):
+        batch = min(100, args.slow_clients - start)
+        slow += [asyncio.create_task(hold_slow_client(port, args.slow_interval, stop)) for _ in range(batch)]
+        await asyncio.sleep(0.05)
+
+    async def worker(n, session, deadline):
+        rnd = random.Random(args.seed + n)
+        while time.monotonic() < deadline:
+            name, path, body = rnd.choice(requests)(rnd)
+            started = time.perf_counter()
+            try:
+                async with session.get(path, json=body) as response:
+                    await response.read()
+                    ok = response.status == 200
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                ok = False
+            recorder.record(name, time.perf_counter() - started, ok)
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(f"http://{HOST}:{port}", connector=connector, timeout=timeout) as session:
+        started = time.perf_counter()
+        deadline = time.monotonic() + args.duration
+        await asyncio.gather(*(worker(n, session, deadline) for n in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    stop.set()
+    held = sum(await asyncio.gather(*slow))
+    report = recorder.report(elapsed)
+    report["slow_clients_held"] = held
+    return report
+
+
+async def _sample_threads(pid, samples, stop):
+    while not stop.is_set():
+        threads, _ = _proc_status(pid)
+        if threads:
+            samples.append(threads)
+        await asyncio.sleep(0.5)
+
+
+async def bench_mode(mode, db_path, args, requests):
+    process, port = start_server(mode, db_path)
+    try:
+        samples = []
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(_sample_threads(process.pid, samples, stop))
+        cpu_before = _cpu_seconds(process.pid)
+        report = await run_load(port, args, requests)
+        cpu_seconds = _cpu_seconds(process.pid) - cpu_before
+        stop.set()
+        await sampler
+        _, max_rss = _proc_status(process.pid)
+        report["server"] = {
+            "max_threads": max(samples, default=None),
+            "max_rss_mb": max_rss,
+            "cpu_seconds": round(cpu_seconds, 2),
+            # 同じマシンで負荷を掛けているため、スループットよりこの値でモードを比べる
+            "cpu_ms_per_request": round(cpu_seconds * 1000 / max(report["total_requests"], 1), 3),
+        }
+        return report
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ASGI モードとスレッド型 WSGI モードの比較")
+    parser.add_argument("--modes", default="wsgi,asgi", help="比較するモード（カンマ区切り）")
+    parser.add_argument("--concurrency", type=int, default=500, help="リクエストを流す同時接続数")
+    parser.add_argument("--slow-clients", type=int, default=2000, help="保持する遅いクライアントの数")
+    parser.add_argument("--slow-interval", type=float, default=1.0, help="遅いクライアントがヘッダを送る間隔（秒）")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--communities", type=int, default=200)
+    parser.add_argument("--tags", type=int, default=50_000)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="結果を書き出す JSON ファイル")
+    # 子プロセスとしてサーバを起動するときの引数
+    parser.add_argument("--serve", choices=("wsgi", "asgi"), help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve, args.port, args.db)
+        return
+
+    _raise_fd_limit((args.concurrency + args.slow_clients) * 2 + 256)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "messages.db")
+        sizes = {"users": args.users, "communities": args.communities, "tags": args.tags, "messages": args.messages}
+        with open(os.devnull, "w") as devnull:
+            DatasetGenerator(db_path, sizes, seed=args.seed, days=60, log=devnull).run()
+        requests = make_requests(*load_targets(db_path))
+
+        result = {
+            "config": {
+                "concurrency": args.concurrency, "slow_clients": args.slow_clients,
+                "duration": args.duration, "cpu_count": os.cpu_count(), "dataset": sizes,
+            },
+            "modes": {},
+        }
+        for mode in args.modes.split(","):
+            print(f"{mode}: {args.concurrency} 並列, 遅いクライアント {args.slow_clients}", file=sys.stderr)
+            result["modes"][mode] = asyncio.run(bench_mode(mode, db_path, args, requests))
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
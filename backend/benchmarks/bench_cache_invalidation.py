@@ -0,0 +1,154 @@
+"""
+プロセス間キャッシュ無効化（database/invalidation.py）の計測
+gunicorn のワーカーに見立てた読み取りプロセス（--readers 個、spawn で起動し、それぞれ create_app する）が
+GET /api/community/info_by_id を繰り返し呼び、親プロセスが PUT /api/community/template_tags で
+テンプレートタグ名を 1, 2, 3, ... と書き換える。
+
+各書き込みについて「書き込みリクエストの開始から、各読み取りプロセスがその値（以降の値）を初めて返すまで」の
+時間を古い値が見えていた時間（staleness）として集め、確認間隔（CACHE_INVALIDATION_INTERVAL_MS）ごとに
+p50/p95/p99/max と読み取りのヒット率・件数/秒を JSON で出力する。
+max が確認間隔 + 読み取り間隔程度に収まっていれば、他プロセスの書き込みが遅れて見える時間は有界。
+"off" はキャッシュを使わない場合（CACHE_ENABLED=0、毎回 DB を読む）。
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.bench_cache_invalidation --readers 4 --writes 50 --intervals off,0,100,500
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.loadtest import _percentile_ms
+
+
+def _make_app(db_path, interval):
+    os.environ.setdefault("FLASK_URL", "http://127.0.0.1:1")
+    from app import create_app
+
+    config = {"DATABASE_PATH": db_path, "AUTO_MATCHING": False}
+    if interval == "off":
+        config["CACHE_ENABLED"] = False
+    else:
+        config.update(CACHE_ENABLED=True, CACHE_INVALIDATION_INTERVAL_MS=float(interval))
+    return create_app(config)
+
+
+def _reader(db_path, interval, community_id, read_gap, ready, stop, results):
+    client = _make_app(db_path, interval).test_client()
+    seen = []
+    reads = 0
+    last = None
+    ready.wait()
+    started = time.perf_counter()
+    while not stop.is_set():
+        tags = client.get("/api/community/info_by_id", query_string={"community_id": community_id}).get_json()["tags"]
+        reads += 1
+        value = int(tags[0]["tag"])
+        if value != last:
+            # 値が変わった時刻だけを記録する（time.time() はプロセス間で比べられる）
+            seen.append((value, time.time()))
+            last = value
+        if read_gap:
+            time.sleep(read_gap)
+    from monitoring.metrics import CACHE_REQUESTS
+
+    counts = CACHE_REQUESTS.snapshot()
+    results.put({
+        "seen": seen, "reads": reads, "seconds": time.perf_counter() - started,
+        "hits": counts.get(("community_info", "hit"), 0), "misses": counts.get(("community_info", "miss"), 0),
+    })
+
+
+def bench_interval(interval, args):
+    db_path = os.path.join(tempfile.mkdtemp(), "cache_invalidation.db")
+    client = _make_app(db_path, interval).test_client()
+    community_id = client.post("/api/community/create", data={"community_name": "bench"}).get_json()["community_id"]
+    tag_id = client.post("/api/community/template_tags", json={
+        "community_id": community_id, "tag": "0", "colorCode": "ff0000"
+    }).get_json()["template_tag_id"]
+
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Barrier(args.readers + 1)
+    stop = ctx.Event()
+    results = ctx.Queue()
+    readers = [
+        ctx.Process(target=_reader, args=(db_path, interval, community_id, args.read_gap_ms / 1000, ready, stop, results))
+        for _ in range(args.readers)
+    ]
+    for process in readers:
+        process.start()
+    ready.wait()
+    # 読み取りプロセスのキャッシュが温まってから書き込む
+    time.sleep(0.5)
+
+    writes = []
+    for n in range(1, args.writes + 1):
+        written_at = time.time()
+        client.put("/api/community/template_tags", json={
+            "community_id": community_id, "template_tag_id": tag_id, "tag": str(n), "colorCode": "ff0000"
+        })
+        writes.append((n, written_at))
+        time.sleep(args.write_gap_ms / 1000)
+    # 最後の書き込みが届くまで待ってから止める
+    time.sleep(max(1.0, 2 * (0 if interval == "off" else float(interval)) / 1000))
+    stop.set()
+    outcomes = [results.get() for _ in readers]
+    for process in readers:
+        process.join()
+
+    staleness = []
+    missed = 0
+    for outcome in outcomes:
+        for n, written_at in writes:
+            first = next((at for value, at in outcome["seen"] if value >= n), None)
+            if first is None:
+                missed += 1
+            else:
+                staleness.append(max(0.0, first - written_at))
+    staleness.sort()
+    reads = sum(o["reads"] for o in outcomes)
+    lookups = sum(o["hits"] + o["misses"] for o in outcomes)
+    return {
+        "reads_per_second": round(sum(o["reads"] / o["seconds"] for o in outcomes), 1),
+        "reads": reads,
+        "hit_ratio": round(sum(o["hits"] for o in outcomes) / lookups, 4) if lookups else 0,
+        "writes": len(writes),
+        "never_seen": missed,
+        "staleness_ms": {
+            "p50": _percentile_ms(staleness, 50),
+            "p95": _percentile_ms(staleness, 95),
+            "p99": _percentile_ms(staleness, 99),
+            "max": _percentile_ms(staleness, 100),
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="プロセス間キャッシュ無効化の計測")
+    parser.add_argument("--readers", type=int, default=4, help="読み取りプロセス数")
+    parser.add_argument("--writes", type=int, default=50, help="書き込み回数")
+    parser.add_argument("--write-gap-ms", type=float, default=50, help="書き込みの間隔")
+    parser.add_argument("--read-gap-ms", type=float, default=1, help="各読み取りプロセスの読み取り間隔")
+    parser.add_argument("--intervals", default="off,0,100,500", help="比較する確認間隔（ミリ秒、カンマ区切り。off はキャッシュなし）")
+    parser.add_argument("--output", help="結果を書き出す JSON ファイル")
+    args = parser.parse_args(argv)
+
+    result = {
+        "config": {
+            "readers": args.readers, "writes": args.writes,
+            "write_gap_ms": args.write_gap_ms, "read_gap_ms": args.read_gap_ms,
+        },
+        "intervals": {interval: bench_interval(interval, args) for interval in args.intervals.split(",")},
+    }
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
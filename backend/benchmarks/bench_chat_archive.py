@@ -0,0 +1,122 @@
+"""
+チャット履歴アーカイブの効果測定
+一時DBに過去1年分のチャットを生成し、アーカイブ前後のDBサイズと
+スレッド読み出しレイテンシ（ホットテーブル / アーカイブ）を比較する。
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.bench_chat_archive --messages 200000
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+from modules.community_management.chat_archive import (
+    archive_chat_threads, database_bytes, read_archived_thread
+)
+from database.dates import from_day, to_day
+from database.migrate import migrate
+
+INSERT_MESSAGE_SQL = (
+    "INSERT INTO chat_messages (id, community_id, tag_id, date, sender_id, sender_name, message_content, timestamp) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _time_reads(fn, threads, repeat=3):
+    samples = []
+    for _ in range(repeat):
+        for thread in threads:
+            t0 = time.perf_counter()
+            fn(*thread)
+            samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return {
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="チャットアーカイブのサイズ・読み出し性能を測る")
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--communities", type=int, default=50)
+    parser.add_argument("--tags", type=int, default=10)
+    parser.add_argument("--older-than-days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    today = datetime.date.today()
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "archive_bench.db")
+    migrate(path)
+    db = sqlite3.connect(path)
+
+    communities = [uuid.uuid4().hex for _ in range(args.communities)]
+    tags = [uuid.uuid4().hex for _ in range(args.tags)]
+    words = ["了解です", "何時にしますか", "駅前で集合しましょう", "参加します", "遅れます", "ありがとう"]
+    rows = []
+    for _ in range(args.messages):
+        day = today - datetime.timedelta(days=rng.randint(0, 365))
+        ts = f"{day.isoformat()} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+        sender = f"user{rng.randint(1, 500)}"
+        rows.append((uuid.uuid4().hex, rng.choice(communities), rng.choice(tags), to_day(day),
+                     sender, sender, rng.choice(words), ts))
+    db.executemany(INSERT_MESSAGE_SQL, rows)
+    db.commit()
+
+    cutoff = today - datetime.timedelta(days=args.older_than_days)
+    old_threads = list({(r[1], r[2], from_day(r[3])) for r in rows if r[3] < to_day(cutoff)})
+    sample = rng.sample(old_threads, min(200, len(old_threads)))
+
+    def read_hot(community_id, tag_id, date):
+        db.execute(
+            "SELECT sender_id, sender_name, message_content, timestamp FROM chat_messages "
+            "WHERE community_id = ? AND tag_id = ? AND date = ? ORDER BY timestamp ASC",
+            (community_id, tag_id, to_day(date))
+        ).fetchall()
+
+    hot_latency = _time_reads(read_hot, sample)
+    used_before = database_bytes(db)
+    db.execute("VACUUM")
+    file_before = os.path.getsize(path)
+
+    t0 = time.perf_counter()
+    stats = archive_chat_threads(db, args.older_than_days, today=today)
+    archive_seconds = time.perf_counter() - t0
+    used_after = database_bytes(db)
+    db.execute("VACUUM")
+    file_after = os.path.getsize(path)
+
+    archived_latency = _time_reads(lambda c, t, d: read_archived_thread(db, c, t, d), sample)
+
+    result = {
+        "messages": args.messages,
+        "archived_messages": stats["messages"],
+        "archive_months": stats["months"],
+        "archive_seconds": round(archive_seconds, 3),
+        "codec_raw_bytes": stats["raw_bytes"],
+        "codec_compressed_bytes": stats["compressed_bytes"],
+        "used_bytes_before": used_before,
+        "used_bytes_after": used_after,
+        "file_bytes_before": file_before,
+        "file_bytes_after": file_after,
+        "saved_ratio": round(1 - file_after / file_before, 3),
+        "read_hot": hot_latency,
+        "read_archived": archived_latency,
+    }
+    db.close()
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
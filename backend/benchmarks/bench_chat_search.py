@@ -0,0 +1,143 @@
+"""
+チャット全文検索の性能測定
+一時DBに大量のチャットメッセージを生成し、FTS5 索引による検索と
+LIKE による全件走査を比較する。索引の構築時間とファイルサイズも出力する。
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.bench_chat_search --messages 10000000
+（1000万件の生成には数十分かかるため、既定値は100万件）
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+from modules.community_management.chat_search import build_match_expression, search_chat_messages
+from database.dates import to_day
+from database.migrate import migrate
+
+INSERT_MESSAGE_SQL = (
+    "INSERT INTO chat_messages (id, community_id, tag_id, date, sender_id, sender_name, message_content, timestamp) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+PHRASES = [
+    "駅前で集合しましょう", "明日の練習は中止です", "ボールを持ってきてください", "遅れます、すみません",
+    "今日は楽しかったです", "雨なので体育館に変更", "参加します！", "何時に集合ですか",
+    "see you tomorrow", "meeting at the station", "お疲れさまでした", "写真を共有します",
+    "来週の予定を決めましょう", "グラウンドの予約が取れました", "差し入れありがとうございます",
+]
+RARE = ["キャンセル待ち", "忘れ物の傘", "ユニフォーム代"]
+
+
+def _stats(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="チャット全文検索の性能を測る")
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--communities", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--like-queries", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    path = os.path.join(tempfile.mkdtemp(), "chat_search_bench.db")
+    migrate(path)
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = OFF")
+    # 本文を入れ終えてから索引を一括構築する（同期トリガは外しておき、構築時に作り直す）
+    triggers = db.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'chat_messages_fts_%'"
+    ).fetchall()
+    for name, _ in triggers:
+        db.execute(f"DROP TRIGGER {name}")
+
+    communities = [uuid.uuid4().hex for _ in range(args.communities)]
+    tags = [uuid.uuid4().hex for _ in range(20)]
+    base = datetime.date.today()
+
+    def rows(count):
+        for _ in range(count):
+            text = rng.choice(PHRASES)
+            if rng.random() < 0.001:
+                text += " " + rng.choice(RARE)
+            day = base - datetime.timedelta(days=rng.randint(0, 60))
+            sender = f"user{rng.randint(1, 100000)}"
+            yield (uuid.uuid4().hex, rng.choice(communities), rng.choice(tags), to_day(day),
+                   sender, sender, text, f"{day.isoformat()} 12:00:00")
+
+    t0 = time.perf_counter()
+    db.executemany(INSERT_MESSAGE_SQL, rows(args.messages))
+    db.commit()
+    load_seconds = time.perf_counter() - t0
+    db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size_without_index = os.path.getsize(path)
+
+    t0 = time.perf_counter()
+    for _, sql in triggers:
+        db.execute(sql)
+    db.execute("INSERT INTO chat_messages_fts (chat_messages_fts) VALUES ('rebuild')")
+    db.commit()
+    index_seconds = time.perf_counter() - t0
+    db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size_with_index = os.path.getsize(path)
+
+    # 索引済み状態での追加書き込み（トリガ経由）のスループット
+    t0 = time.perf_counter()
+    extra = 20000
+    db.executemany(INSERT_MESSAGE_SQL, rows(extra))
+    db.commit()
+    trigger_insert_rate = extra / (time.perf_counter() - t0)
+
+    result = {
+        "messages": args.messages,
+        "load_seconds": round(load_seconds, 1),
+        "index_build_seconds": round(index_seconds, 1),
+        "db_bytes_without_index": size_without_index,
+        "db_bytes_with_index": size_with_index,
+        "insert_rate_with_triggers_per_s": round(trigger_insert_rate),
+    }
+
+    for kind, words in (("common", ["集合しま", "練習は中止", "tomorrow"]), ("rare", RARE)):
+        samples = []
+        for _ in range(args.queries):
+            t0 = time.perf_counter()
+            search_chat_messages(db, rng.choice(communities), rng.choice(words), 20, 0)
+            samples.append(time.perf_counter() - t0)
+        result[f"fts_{kind}"] = _stats(samples)
+
+    samples = []
+    for _ in range(args.like_queries):
+        community_id = rng.choice(communities)
+        word = rng.choice(RARE)
+        t0 = time.perf_counter()
+        db.execute(
+            "SELECT id FROM chat_messages WHERE community_id = ? AND message_content LIKE ? LIMIT 21",
+            (community_id, f"%{word}%")
+        ).fetchall()
+        samples.append(time.perf_counter() - t0)
+    result["like_scan_rare"] = _stats(samples)
+    result["example_match"] = build_match_expression("<community_id>", "練習は 中止です")
+
+    db.close()
+    json.dump(result, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+
+
+if __name__ == "__main__":
+    main()
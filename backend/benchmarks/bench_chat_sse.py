@@ -0,0 +1,124 @@
+"""
+チャットSSE配信の負荷試験
+1ワーカー（スレッド型 WSGI サーバ1プロセス）に数千件の待機中SSE接続を張り、
+ブローカーへ publish したメッセージが全購読者に届くまでの時間を計測する。
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.bench_chat_sse --subscribers 2000 --messages 20
+結果は JSON で標準出力に出す。
+"""
+
+import argparse
+import json
+import resource
+import selectors
+import socket
+import statistics
+import sys
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+
+def _raise_fd_limit(needed):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = min(hard, max(soft, needed))
+    if target > soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    return target
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.2, help="publish 間隔（秒）")
+    args = parser.parse_args(argv)
+
+    _raise_fd_limit(args.subscribers * 2 + 256)
+
+    from app import app
+    from modules.community_management.chat_broker import chat_broker
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    key = ("bench-community", "bench-tag", "2025-01-01")
+    path = f"/api/community/{key[0]}/tag/{key[1]}/chat/stream?date={key[2]}"
+    request_bytes = (
+        f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n"
+    ).encode()
+
+    sel = selectors.DefaultSelector()
+    started = time.perf_counter()
+    sockets = []
+    for _ in range(args.subscribers):
+        s = socket.create_connection(("127.0.0.1", port))
+        s.sendall(request_bytes)
+        s.setblocking(False)
+        sel.register(s, selectors.EVENT_READ)
+        sockets.append(s)
+
+    deadline = time.monotonic() + 60
+    while chat_broker.subscriber_count() < args.subscribers and time.monotonic() < deadline:
+        time.sleep(0.05)
+    subscribe_seconds = time.perf_counter() - started
+    connected = chat_broker.subscriber_count()
+
+    # 接続直後のヘッダと retry 行を読み捨てる
+    end = time.monotonic() + 1.0
+    while time.monotonic() < end:
+        for sk, _ in sel.select(timeout=0.1):
+            sk.fileobj.recv(65536)
+
+    fanout_latencies = []
+    delivered_total = 0
+    for i in range(args.messages):
+        marker = f"bench-{i}"
+        pending = set(sockets)
+        t0 = time.perf_counter()
+        chat_broker.publish(key, {"message_content": marker})
+        wait_until = time.monotonic() + 10
+        while pending and time.monotonic() < wait_until:
+            for sk, _ in sel.select(timeout=0.5):
+                data = sk.fileobj.recv(65536)
+                if marker.encode() in data:
+                    pending.discard(sk.fileobj)
+        fanout_latencies.append(time.perf_counter() - t0)
+        delivered_total += len(sockets) - len(pending)
+        time.sleep(args.interval)
+
+    result = {
+        "subscribers_requested": args.subscribers,
+        "subscribers_connected": connected,
+        "subscribe_seconds": round(subscribe_seconds, 3),
+        "messages": args.messages,
+        "delivered": delivered_total,
+        "expected": args.messages * len(sockets),
+        "fanout_ms_p50": round(_percentile(fanout_latencies, 50) * 1000, 2),
+        "fanout_ms_p95": round(_percentile(fanout_latencies, 95) * 1000, 2),
+        "fanout_ms_mean": round(statistics.mean(fanout_latencies) * 1000, 2),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "threads": threading.active_count(),
+    }
+
+    for s in sockets:
+        sel.unregister(s)
+        s.close()
+    server.shutdown()
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
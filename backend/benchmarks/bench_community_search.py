@@ -0,0 +1,100 @@
+"""
+コミュニティ名検索のレイテンシ測定
+一時DBに大量のコミュニティを登録し、前方一致・部分一致クエリの
+応答時間（1ページ分の取得）を計測する。
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.bench_community_search --communities 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+from database.migrate import migrate
+from modules.community_management.community_search import search_communities
+
+SYLLABLES = [
+    "テニス", "サッカー", "山", "登山", "写真", "カフェ", "読書", "映画", "料理", "ラン",
+    "ボード", "ゲーム", "音楽", "バンド", "旅", "釣り", "キャンプ", "将棋", "囲碁", "英語",
+    "club", "team", "lab", "fans", "night", "tokyo", "osaka", "go", "run", "study",
+]
+SUFFIXES = ["部", "の会", "サークル", "同好会", "クラブ", "", "研", "仲間"]
+
+
+def _name(rng):
+    while True:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+        name += rng.choice(SUFFIXES) + str(rng.randint(0, 999))
+        if len(name) <= 16:
+            return name
+
+
+def _stats(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 3),
+        "p99_ms": round(samples[int(len(samples) * 0.99)] * 1000, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="コミュニティ検索の応答時間を測る")
+    parser.add_argument("--communities", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    path = os.path.join(tempfile.mkdtemp(), "search_bench.db")
+    migrate(path)
+    db = sqlite3.connect(path)
+
+    names = set()
+    while len(names) < args.communities:
+        names.add(_name(rng))
+    t0 = time.perf_counter()
+    db.executemany(
+        "INSERT INTO communities (id, name) VALUES (?, ?)",
+        ((uuid.uuid4().hex, n) for n in names)
+    )
+    db.commit()
+    insert_seconds = time.perf_counter() - t0
+
+    names = sorted(names)
+    queries = {"prefix_short": [], "prefix": [], "substring": []}
+    for _ in range(args.queries):
+        name = rng.choice(names)
+        queries["prefix_short"].append(name[:2])
+        queries["prefix"].append(name[:rng.randint(3, min(6, len(name)))] if len(name) >= 3 else name)
+        start = rng.randint(0, max(0, len(name) - 3))
+        queries["substring"].append(name[start:start + 3])
+
+    result = {
+        "communities": args.communities,
+        "insert_with_index_seconds": round(insert_seconds, 3),
+    }
+    for kind, qs in queries.items():
+        samples = []
+        hits = 0
+        for q in qs:
+            t0 = time.perf_counter()
+            rows, _ = search_communities(db, q, 20, 0)
+            samples.append(time.perf_counter() - t0)
+            hits += len(rows)
+        result[kind] = dict(_stats(samples), avg_hits=round(hits / len(qs), 1))
+
+    db.close()
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
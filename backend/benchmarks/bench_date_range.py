@@ -0,0 +1,183 @@
+"""
+日付の保存形式（database/dates.py）の比較：月単位の範囲検索とサイズ
+同じタグ・チャットを、v0007 までのスキーマ（date は 'YYYY-MM-DD' の文字列）と
+現在のスキーマ（date は通し日数の INTEGER）の2つの一時DBに入れ、
+コミュニティ・月ごとの検索（カレンダーの月表示・月単位のスレッド一覧）の時間と、
+テーブル・索引のサイズ（dbstat）を比較する。
+
+- text_substr: 文字列の日付を substr(date, 1, 7) = 'YYYY-MM' で絞る（索引の date 部分を使えない）
+- text_range:  文字列の日付を 'YYYY-MM-01' <= date < 翌月1日 で絞る
+               （表記が揃っているときだけ正しい。以前のスキーマでは保証されていなかった）
+- day_range:   通し日数で first <= date < next_first と絞る
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.bench_date_range --tags 500000 --messages 500000
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+
+from benchmarks.loadtest import _percentile_ms
+from database.dates import from_day, month_range, to_day
+from database.migrate import migrate
+
+# v0008（日付を通し日数にする）の直前のスキーマ
+TEXT_SCHEMA_VERSION = 7
+
+TAGS_SQL = {
+    "text_substr": "SELECT id, name_id, date FROM tags WHERE community_id = ? AND substr(date, 1, 7) = ?",
+    "text_range": "SELECT id, name_id, date FROM tags WHERE community_id = ? AND date >= ? AND date < ?",
+    "day_range": "SELECT id, name_id, date FROM tags WHERE community_id = ? AND date >= ? AND date < ?",
+}
+THREADS_SQL = {
+    "text_substr": "SELECT tag_id, date, COUNT(*) FROM chat_messages "
+                   "WHERE community_id = ? AND substr(date, 1, 7) = ? GROUP BY tag_id, date",
+    "text_range": "SELECT tag_id, date, COUNT(*) FROM chat_messages "
+                  "WHERE community_id = ? AND date >= ? AND date < ? GROUP BY tag_id, date",
+    "day_range": "SELECT tag_id, date, COUNT(*) FROM chat_messages "
+                 "WHERE community_id = ? AND date >= ? AND date < ? GROUP BY tag_id, date",
+}
+
+
+def _params(variant, community_id, month):
+    if variant == "text_substr":
+        return community_id, month
+    first, next_first = month_range(month)
+    if variant == "text_range":
+        return community_id, from_day(first), from_day(next_first)
+    return community_id, first, next_first
+
+
+def _generate(args):
+    rng = random.Random(args.seed)
+    start = datetime.date.fromisoformat(args.start_date)
+    communities = [uuid.uuid4().hex for _ in range(args.communities)]
+    templates = {c: [uuid.uuid4().hex for _ in range(5)] for c in communities}
+    days = [start + datetime.timedelta(days=d) for d in range(args.days)]
+    tags = [
+        (uuid.uuid4().hex, rng.randrange(len(communities) * 5) + 1, communities[rng.randrange(len(communities))],
+         f"user{rng.randrange(10000)}", rng.choice(days))
+        for _ in range(args.tags)
+    ]
+    messages = []
+    for _ in range(args.messages):
+        community_id = communities[rng.randrange(len(communities))]
+        day = rng.choice(days)
+        sender = f"user{rng.randrange(10000)}"
+        messages.append((uuid.uuid4().hex, community_id, rng.choice(templates[community_id]), day,
+                         sender, sender, "了解です", f"{day.isoformat()} 12:00:00"))
+    return communities, tags, messages
+
+
+def _load(path, version, communities, tags, messages):
+    """
+    version のスキーマの DB を作り、date を文字列（v0007）または通し日数で入れる
+    """
+    migrate(path, target=version)
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode = OFF")
+    db.execute("PRAGMA synchronous = OFF")
+    as_date = (lambda d: d.isoformat()) if version == TEXT_SCHEMA_VERSION else to_day
+    db.executemany(
+        "INSERT INTO tag_names (id, community_id, normalized, name, color) VALUES (?, ?, ?, ?, 'ff0000')",
+        ((n, communities[(n - 1) // 5], f"tag{n}", f"tag{n}") for n in range(1, len(communities) * 5 + 1))
+    )
+    db.executemany(
+        "INSERT INTO tags (id, name_id, color, submitter_id, community_id, date, notified) VALUES (?, ?, NULL, ?, ?, ?, 0)",
+        ((tag_id, name_id, submitter, community_id, as_date(day)) for tag_id, name_id, community_id, submitter, day in tags)
+    )
+    db.executemany(
+        "INSERT INTO chat_messages (id, community_id, tag_id, date, sender_id, sender_name, message_content, timestamp) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        ((m[0], m[1], m[2], as_date(m[3]), *m[4:]) for m in messages)
+    )
+    db.commit()
+    db.execute("ANALYZE")
+    db.execute("VACUUM")
+    return db
+
+
+def _sizes(db):
+    """
+    tags・chat_messages とその索引のバイト数（dbstat）
+    """
+    rows = db.execute(
+        "SELECT s.name, SUM(s.pgsize) FROM dbstat s JOIN sqlite_master m ON m.name = s.name "
+        "WHERE m.tbl_name IN ('tags', 'chat_messages') GROUP BY s.name ORDER BY s.name"
+    ).fetchall()
+    return dict(rows)
+
+
+def _bench(db, sql, variant, targets, repeat):
+    samples = []
+    rows = 0
+    for _ in range(repeat):
+        for community_id, month in targets:
+            params = _params(variant, community_id, month)
+            t0 = time.perf_counter()
+            rows += len(db.execute(sql, params).fetchall())
+            samples.append(time.perf_counter() - t0)
+    samples.sort()
+    plan = " / ".join(r[3] for r in db.execute("EXPLAIN QUERY PLAN " + sql, _params(variant, *targets[0])))
+    return {
+        "p50_ms": _percentile_ms(samples, 50),
+        "p95_ms": _percentile_ms(samples, 95),
+        "queries_per_second": round(len(samples) / sum(samples), 1),
+        "rows_per_query": round(rows / len(samples), 1),
+        "plan": plan,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="日付の保存形式による月単位の範囲検索・サイズの比較")
+    parser.add_argument("--tags", type=int, default=500000)
+    parser.add_argument("--messages", type=int, default=500000)
+    parser.add_argument("--communities", type=int, default=200)
+    parser.add_argument("--days", type=int, default=730, help="タグ・チャットを分散させる日数")
+    parser.add_argument("--start-date", default="2024-01-01")
+    parser.add_argument("--queries", type=int, default=200, help="(コミュニティ, 月) の組の数")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="結果を書き出す JSON ファイル")
+    args = parser.parse_args(argv)
+
+    communities, tags, messages = _generate(args)
+    rng = random.Random(args.seed + 1)
+    months = sorted({(datetime.date.fromisoformat(args.start_date) + datetime.timedelta(days=d)).isoformat()[:7]
+                     for d in range(args.days)})
+    targets = [(rng.choice(communities), rng.choice(months)) for _ in range(args.queries)]
+
+    workdir = tempfile.mkdtemp()
+    dbs = {
+        "text": _load(os.path.join(workdir, "text.db"), TEXT_SCHEMA_VERSION, communities, tags, messages),
+        "day": _load(os.path.join(workdir, "day.db"), None, communities, tags, messages),
+    }
+    result = {
+        "config": {k: getattr(args, k) for k in ("tags", "messages", "communities", "days", "queries", "repeat")},
+        "bytes": {name: _sizes(db) for name, db in dbs.items()},
+        "calendar_month": {},
+        "chat_month_threads": {},
+    }
+    for variant in TAGS_SQL:
+        db = dbs["day" if variant == "day_range" else "text"]
+        result["calendar_month"][variant] = _bench(db, TAGS_SQL[variant], variant, targets, args.repeat)
+        result["chat_month_threads"][variant] = _bench(db, THREADS_SQL[variant], variant, targets, args.repeat)
+    for db in dbs.values():
+        db.close()
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
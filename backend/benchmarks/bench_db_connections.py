@@ -0,0 +1,81 @@
+"""
+リクエストあたりの DB 接続オープン数の測定
+Flask のテストクライアントで代表的なエンドポイントを呼び、
+sqlite3.connect が呼ばれた回数をエンドポイントごとに数える。
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.bench_db_connections --requests 200
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+_opened = 0
+_real_connect = sqlite3.connect
+
+
+def _counting_connect(*args, **kwargs):
+    global _opened
+    _opened += 1
+    return _real_connect(*args, **kwargs)
+
+
+def main(argv=None):
+    global _opened
+    parser = argparse.ArgumentParser(description="リクエストあたりの DB 接続オープン数を測る")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(), "connections.db"))
+    os.environ.setdefault("FLASK_URL", "http://127.0.0.1:5001")
+    sqlite3.connect = _counting_connect
+
+    from app import app
+    client = app.test_client()
+
+    user_id = uuid.uuid4().hex
+    client.post("/api/users/register", json={
+        "id": user_id, "hashed_pw": "x", "name": "bench", "email": f"{user_id}@example.com"
+    })
+    sid = client.post("/api/sid/create", json={"user_id": user_id}).get_json()["sid"]
+    community_id = client.post("/api/community/create", data={"community_name": user_id[:12]}).get_json()["community_id"]
+    client.post("/api/community/join", json={"community_name": user_id[:12], "user_id": user_id})
+
+    endpoints = {
+        "GET /api/community/joined": lambda: client.get("/api/community/joined", query_string={"user_id": user_id}),
+        "GET /api/community/template_tags": lambda: client.get("/api/community/template_tags", query_string={"community_id": community_id}),
+        "GET chat/history": lambda: client.get(f"/api/community/{community_id}/tag/t/chat/history", query_string={"date": "2025-01-01"}),
+        "GET /api/community/info_by_id": lambda: client.get("/api/community/info_by_id", query_string={"community_id": community_id}),
+        "GET /api/users/search": lambda: client.get("/api/users/search", query_string={"id": user_id}),
+        "POST /api/sid/validate": lambda: client.post("/api/sid/validate", json={"user_id": user_id, "sid": sid}),
+        "GET /api/calendar-manager/tags": lambda: client.get("/api/calendar-manager/tags", json={"community_id": community_id, "date": "2025-01-01"}),
+    }
+
+    result = {"requests_per_endpoint": args.requests, "endpoints": {}}
+    total_opened = 0
+    for name, call in endpoints.items():
+        call()  # ウォームアップ（プールの初回接続を除外する）
+        _opened = 0
+        t0 = time.perf_counter()
+        for _ in range(args.requests):
+            call()
+        elapsed = time.perf_counter() - t0
+        total_opened += _opened
+        result["endpoints"][name] = {
+            "connections_opened_per_request": round(_opened / args.requests, 3),
+            "mean_ms": round(elapsed / args.requests * 1000, 3),
+        }
+    result["connections_opened_per_request_overall"] = round(total_opened / (args.requests * len(endpoints)), 3)
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
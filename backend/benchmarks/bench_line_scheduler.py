@@ -0,0 +1,228 @@
+"""
+LINE 送信スケジューラ（modules/notification/line_scheduler.py）の計測
+LINE Messaging API の代わりに、チャネルの上限（--quota 件/秒）を超えると 429 と Retry-After を返す
+ローカルのサーバを立て、マッチング通知の集中（--matches 件）と一括送信（--bulk 件）を流す。
+
+- direct: これまでの送り方（呼び出し元スレッドがそのまま push し、エラーはその場で失敗）
+- scheduler: LineSendScheduler 経由（トークンバケット・優先度・Retry-After での送り直し）
+
+モードごとに届いた件数・失敗件数・受けた 429 の件数・所要時間・実効レートと、
+優先度ごとの送信完了までの時間（p50/p95/p99）を JSON で出力する。
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.bench_line_scheduler --quota 200 --matches 2000 --bulk 1000
+    python -m benchmarks.bench_line_scheduler --modes scheduler --scheduler-rate 300   # 上限より速く設定した場合
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.loadtest import _percentile_ms
+
+HOST = "127.0.0.1"
+
+
+class FakeLineServer:
+    """
+    push API の代わり。1秒ごとの受け付け件数が quota を超えたら 429（Retry-After: 1）を返す
+    同じ X-Line-Retry-Key の送り直しは 409（受け付け済み）にして、届いた件数に数えない。
+    """
+
+    def __init__(self, quota, latency):
+        self.quota = quota
+        self.latency = latency
+        self.delivered = 0
+        self.rate_limited = 0
+        self._window = None
+        self._count = 0
+        self._retry_keys = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((HOST, 0), self._handler())
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 1024
+
+    @property
+    def endpoint(self):
+        return f"http://{HOST}:{self._server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _accept(self, retry_key):
+        with self._lock:
+            window = int(time.monotonic())
+            if window != self._window:
+                self._window, self._count = window, 0
+            if retry_key and retry_key in self._retry_keys:
+                return 409
+            if self._count >= self.quota:
+                self.rate_limited += 1
+                return 429
+            self._count += 1
+            self.delivered += 1
+            if retry_key:
+                self._retry_keys.add(retry_key)
+            return 200
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(server.latency)
+                status = server._accept(self.headers.get("X-Line-Retry-Key"))
+                if status == 200:
+                    body = b"{}"
+                elif status == 409:
+                    body = b'{"message":"The retry key is already accepted"}'
+                else:
+                    body = b'{"message":"The API rate limit has been exceeded. Try again later."}'
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 409:
+                    self.send_header("X-Line-Accepted-Request-Id", "accepted")
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def _jobs(args):
+    # 一括送信を先に積み、後から来たマッチング通知が追い越して先に届くかを見る
+    jobs = [("bulk", f"Ubulk{n:05d}") for n in range(args.bulk)]
+    jobs += [("match", f"Umatch{n:05d}") for n in range(args.matches)]
+    return jobs
+
+
+def run_direct(server, args):
+    """
+    これまでの Notification.send_match_message と同じく、呼び出し元スレッドがそのまま push する
+    """
+    from linebot import LineBotApi
+    from linebot.exceptions import LineBotApiError
+    from linebot.models import TextSendMessage
+
+    api = LineBotApi("dummy-token", endpoint=server.endpoint)
+    message = TextSendMessage(text="ベンチマーク")
+    latencies = {"match": [], "bulk": []}
+    failed = {"match": 0, "bulk": 0}
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def push(kind, user_id):
+        try:
+            api.push_message(user_id, messages=message)
+            latencies[kind].append(time.perf_counter() - started)
+        except LineBotApiError:
+            with lock:
+                failed[kind] += 1
+
+    with ThreadPoolExecutor(args.callers) as pool:
+        wait([pool.submit(push, kind, user_id) for kind, user_id in _jobs(args)])
+    return latencies, failed, time.perf_counter() - started
+
+
+def run_scheduler(server, args):
+    from linebot import LineBotApi
+    from linebot.models import TextSendMessage
+    from modules.notification.line_scheduler import PRIORITY_BULK, PRIORITY_MATCH, LineSendScheduler
+
+    scheduler = LineSendScheduler(
+        LineBotApi("dummy-token", endpoint=server.endpoint),
+        rate=args.scheduler_rate or args.quota, workers=args.callers,
+    )
+    message = TextSendMessage(text="ベンチマーク")
+    latencies = {"match": [], "bulk": []}
+    failed = {"match": 0, "bulk": 0}
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def done(kind, future):
+        if future.exception() is None:
+            latencies[kind].append(time.perf_counter() - started)
+        else:
+            with lock:
+                failed[kind] += 1
+
+    futures = []
+    for kind, user_id in _jobs(args):
+        future = scheduler.submit(user_id, message, PRIORITY_MATCH if kind == "match" else PRIORITY_BULK)
+        future.add_done_callback(lambda f, kind=kind: done(kind, f))
+        futures.append(future)
+    wait(futures)
+    return latencies, failed, time.perf_counter() - started
+
+
+def bench_mode(mode, args):
+    server = FakeLineServer(args.quota, args.latency_ms / 1000)
+    server.start()
+    try:
+        runner = run_direct if mode == "direct" else run_scheduler
+        latencies, failed, elapsed = runner(server, args)
+    finally:
+        server.stop()
+    return {
+        "delivered": server.delivered,
+        "failed": sum(failed.values()),
+        "rate_limited_responses": server.rate_limited,
+        "seconds": round(elapsed, 2),
+        "delivered_per_second": round(server.delivered / elapsed, 1),
+        "priorities": {
+            kind: {
+                "delivered": len(samples),
+                "failed": failed[kind],
+                # 開始から送信完了までの時間
+                "p50_ms": _percentile_ms(sorted(samples), 50),
+                "p95_ms": _percentile_ms(sorted(samples), 95),
+                "p99_ms": _percentile_ms(sorted(samples), 99),
+            }
+            for kind, samples in latencies.items()
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LINE 送信スケジューラの計測")
+    parser.add_argument("--modes", default="direct,scheduler", help="比較するモード（カンマ区切り）")
+    parser.add_argument("--quota", type=int, default=200, help="擬似 LINE サーバの上限（件/秒）")
+    parser.add_argument("--scheduler-rate", type=float, help="スケジューラの送信レート（省略時は --quota）")
+    parser.add_argument("--matches", type=int, default=2000, help="マッチング通知の件数")
+    parser.add_argument("--bulk", type=int, default=1000, help="一括送信の件数")
+    parser.add_argument("--callers", type=int, default=16, help="送信する並列数（direct の呼び出し元スレッド・送信スレッド）")
+    parser.add_argument("--latency-ms", type=float, default=20, help="擬似 LINE サーバの応答時間")
+    parser.add_argument("--output", help="結果を書き出す JSON ファイル")
+    args = parser.parse_args(argv)
+
+    result = {
+        "config": {
+            "quota": args.quota, "scheduler_rate": args.scheduler_rate or args.quota,
+            "matches": args.matches, "bulk": args.bulk, "callers": args.callers, "latency_ms": args.latency_ms,
+        },
+        "modes": {mode: bench_mode(mode, args) for mode in args.modes.split(",")},
+    }
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
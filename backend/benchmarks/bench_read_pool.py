@@ -0,0 +1,265 @@
+"""
+読み取り専用プールによる読み取りスループットのスケーリング測定
+書き込みスレッド（チャット投稿・タグ追加）を動かしたまま、読み取りスレッド数を増やして
+GET エンドポイント（タグ取得・チャット履歴・所属コミュニティ・ユーザ検索）のスループットを測る。
+読み取り専用プールを使う場合と、GET も通常のプールを使う場合（DATABASE_READONLY_POOL=False）を比較する。
+
+--layer で測定する層を選ぶ。
+- sql:  get_db() でプールから接続を借り、各 GET エンドポイントと同じクエリを大きめのデータで実行する
+        （SQLite 実行中は GIL が解放されるため、コア数に応じてスレッド数とともに伸びる）
+- http: テストクライアントで GET エンドポイントを呼ぶ（Flask の処理も含むため GIL の影響が大きい）
+各モードは別プロセスで実行する（チャット書き込みスレッドなどのワーカー内状態を共有しないため）。
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.bench_read_pool --threads 1,2,4,8,16 --duration 3 --layer sql
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DATE = "2025-06-01"
+SEED_MESSAGES = 50
+SEED_TAGS = 50
+
+# sql 層で追加投入する件数（タグは1年分の日付に分散させる）
+BULK_THREADS = 200
+BULK_MESSAGES_PER_THREAD = 500
+BULK_TAGS = 20000
+
+
+def _percentile_ms(ordered, pct):
+    if not ordered:
+        return 0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 3)
+
+
+def _seed(client):
+    user_id = uuid.uuid4().hex
+    client.post("/api/users/register", json={
+        "id": user_id, "hashed_pw": "x", "name": "bench", "email": f"{user_id}@example.com"
+    })
+    name = user_id[:12]
+    community_id = client.post("/api/community/create", data={"community_name": name}).get_json()["community_id"]
+    client.post("/api/community/join", json={"community_name": name, "user_id": user_id})
+    tag_id = uuid.uuid4().hex
+    for i in range(SEED_MESSAGES):
+        _post_chat(client, community_id, tag_id, user_id, i)
+    for i in range(SEED_TAGS):
+        _add_tag(client, community_id, user_id, i)
+    return user_id, community_id, tag_id
+
+
+def _post_chat(client, community_id, tag_id, user_id, i):
+    return client.post(f"/api/community/{community_id}/tag/{tag_id}/chat/post", json={
+        "date": DATE, "message": f"message {i}", "sender_id": user_id, "sender_name": "bench"
+    })
+
+
+def _add_tag(client, community_id, user_id, i):
+    return client.post("/api/calendar-manager/tag/add", json={
+        "tag_id": uuid.uuid4().hex, "tag_name": f"tag{i}", "tag_color": "ff0000",
+        "submitter_id": user_id, "community_id": community_id, "date": DATE
+    })
+
+
+def _bulk_load(path, community_id, user_id):
+    """
+    sql 層用に chat_messages と tags を大量に投入する
+    """
+    from database.connection import connect
+    from database.dates import to_day
+    from database.tag_names import intern_tag_name
+
+    db = connect(path)
+    db.executemany(
+        "INSERT INTO chat_messages (id, community_id, tag_id, date, sender_id, sender_name, message_content, timestamp) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (uuid.uuid4().hex, community_id, f"bulk{t}", to_day(DATE), user_id, "bench",
+             f"message {t}-{i}", f"{DATE} 12:{i // 60 % 60:02d}:{i % 60:02d}")
+            for t in range(BULK_THREADS) for i in range(BULK_MESSAGES_PER_THREAD)
+        )
+    )
+    name_ids = [intern_tag_name(db, community_id, f"tag{n}", "ff0000") for n in range(100)]
+    db.executemany(
+        "INSERT INTO tags (id, name_id, color, submitter_id, community_id, date, notified) VALUES (?, ?, NULL, ?, ?, ?, 0)",
+        ((uuid.uuid4().hex, name_ids[i % 100], user_id, community_id, to_day(f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}"))
+         for i in range(BULK_TAGS))
+    )
+    db.commit()
+    db.close()
+
+
+def _sql_reads(app, community_id, user_id):
+    """
+    各 GET エンドポイントと同じクエリを get_db() 経由で実行する読み取り処理
+    """
+    from database.connection import get_db
+    from database.dates import to_day
+    from modules.calendar_manager.calendar_manager import Tag
+
+    def run(query, params):
+        with app.test_request_context("/", method="GET"):
+            get_db().execute(query, params).fetchall()
+
+    def calendar_tags(n):
+        with app.test_request_context("/", method="GET"):
+            Tag.query.filter_by(community_id=community_id).filter_by(date=DATE).all()
+
+    return [
+        calendar_tags,
+        lambda n: run(
+            "SELECT sender_id, sender_name, message_content, timestamp FROM chat_messages "
+            "WHERE community_id = ? AND tag_id = ? AND date = ? ORDER BY timestamp ASC",
+            (community_id, f"bulk{n % BULK_THREADS}", to_day(DATE))
+        ),
+        lambda n: run(
+            "SELECT c.id, c.name, c.image_path FROM communities c "
+            "INNER JOIN members m ON c.id = m.community_id WHERE m.user_id = ?",
+            (user_id,)
+        ),
+        lambda n: run("SELECT * FROM users WHERE user_id = ?", (user_id,)),
+    ]
+
+
+def _sql_writes(app, community_id, tag_id, user_id):
+    from database.connection import get_db
+    from database.dates import to_day
+    from database.tag_names import intern_tag_name
+    from modules.community_management.community_management import chat_writer
+
+    def write(i):
+        chat_writer.write({
+            "id": uuid.uuid4().hex, "community_id": community_id, "tag_id": tag_id, "date": to_day(DATE),
+            "sender_id": user_id, "sender_name": "bench", "message_content": f"message {i}",
+            "timestamp": f"{DATE} 13:00:00",
+        })
+        with app.test_request_context("/", method="POST"):
+            db = get_db()
+            db.execute(
+                "INSERT INTO tags (id, name_id, color, submitter_id, community_id, date, notified) VALUES (?, ?, NULL, ?, ?, ?, 0)",
+                (uuid.uuid4().hex, intern_tag_name(db, community_id, "new", "ff0000"), user_id, community_id, to_day(DATE))
+            )
+            db.commit()
+    return write
+
+
+def run_mode(readonly_pool, thread_counts, duration, layer):
+    """
+    1モード分を測定する（子プロセスで実行される）
+    """
+    from app import create_app
+
+    path = os.path.join(tempfile.mkdtemp(), "read_pool.db")
+    app = create_app({"DATABASE_PATH": path, "DATABASE_READONLY_POOL": readonly_pool})
+    user_id, community_id, tag_id = _seed(app.test_client())
+
+    if layer == "sql":
+        _bulk_load(path, community_id, user_id)
+        sql_reads = _sql_reads(app, community_id, user_id)
+        sql_write = _sql_writes(app, community_id, tag_id, user_id)
+        reads = [lambda c, n, f=f: f(n) for f in sql_reads]
+        write = lambda c, i: sql_write(i)  # noqa: E731
+    else:
+        reads = [
+            lambda c, n: c.get("/api/calendar-manager/tags", json={"community_id": community_id, "date": DATE}),
+            lambda c, n: c.get(f"/api/community/{community_id}/tag/{tag_id}/chat/history", query_string={"date": DATE}),
+            lambda c, n: c.get("/api/community/joined", query_string={"user_id": user_id}),
+            lambda c, n: c.get("/api/users/search", query_string={"id": user_id}),
+        ]
+
+        def write(c, i):
+            _post_chat(c, community_id, tag_id, user_id, i)
+            _add_tag(c, community_id, user_id, i)
+
+    results = {}
+    for threads in thread_counts:
+        stop = threading.Event()
+        latencies = [[] for _ in range(threads)]
+        errors = [0] * threads
+        writes = [0]
+
+        def writer():
+            client = app.test_client()
+            i = 0
+            while not stop.is_set():
+                write(client, i)
+                writes[0] += 2
+                i += 1
+
+        def reader(n):
+            client = app.test_client()
+            i = n
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    response = reads[i % len(reads)](client, i)
+                    if response is not None and response.status_code != 200:
+                        errors[n] += 1
+                except Exception:
+                    errors[n] += 1
+                latencies[n].append(time.perf_counter() - t0)
+                i += 1
+
+        workers = [threading.Thread(target=writer)]
+        workers += [threading.Thread(target=reader, args=(n,)) for n in range(threads)]
+        for w in workers:
+            w.start()
+        time.sleep(duration)
+        stop.set()
+        for w in workers:
+            w.join()
+
+        ordered = sorted(x for per_thread in latencies for x in per_thread)
+        results[str(threads)] = {
+            "reads_per_sec": round(len(ordered) / duration, 1),
+            "writes_per_sec": round(writes[0] / duration, 1),
+            "read_errors": sum(errors),
+            "read_ms_p50": _percentile_ms(ordered, 50),
+            "read_ms_p95": _percentile_ms(ordered, 95),
+            "read_ms_p99": _percentile_ms(ordered, 99),
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="読み取り専用プールの読み取りスケーリングを測る")
+    parser.add_argument("--threads", default="1,2,4,8,16", help="読み取りスレッド数（カンマ区切り）")
+    parser.add_argument("--duration", type=float, default=3.0, help="スレッド数ごとの測定秒数")
+    parser.add_argument("--layer", choices=["sql", "http"], default="sql")
+    parser.add_argument("--mode", choices=["readonly", "shared"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    thread_counts = [int(t) for t in args.threads.split(",")]
+
+    if args.mode:
+        result = run_mode(args.mode == "readonly", thread_counts, args.duration, args.layer)
+        print(json.dumps(result))
+        return
+
+    env = dict(os.environ)
+    env.setdefault("FLASK_URL", "http://127.0.0.1:5001")
+    result = {"layer": args.layer, "duration_sec": args.duration, "cpu_count": os.cpu_count(), "modes": {}}
+    for mode in ("shared", "readonly"):
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_read_pool", "--mode", mode,
+             "--threads", args.threads, "--duration", str(args.duration), "--layer", args.layer],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+        )
+        result["modes"][mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+タグの主キーの持ち方による DB サイズ・挿入スループットの比較
+tags と同じ列・索引のテーブルに --rows 件（既定 1000 万件）を --batch 件ずつ COMMIT しながら入れ、
+方式ごとに挿入スループット（100 万件ごとの区間と全体）、ファイルサイズ、
+テーブル・索引ごとのバイト数（dbstat）、外部 ID での1件取得の時間を JSON で出力する。
+
+- uuid4_text_pk: v0008 までの形。id VARCHAR PRIMARY KEY（暗黙の rowid + id の一意索引）に str(uuid4())
+- int_pk_uuid4:  seq INTEGER PRIMARY KEY + id UNIQUE に str(uuid4())（移行した既存行と同じ）
+- int_pk_uuid7:  seq INTEGER PRIMARY KEY + id UNIQUE に str(uuid7())（新しい行、database/ids.py）
+- int_pk_only:   参考。外部 ID の列を持たない場合（id の一意索引が無い下限）
+
+PRAGMA はアプリと同じ（database/connection.py の PRAGMAS）。各方式は別の DB ファイルに入れる。
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.bench_row_keys --rows 10000000
+    python -m benchmarks.bench_row_keys --rows 1000000 --schemes int_pk_uuid4,int_pk_uuid7
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from benchmarks.loadtest import _percentile_ms
+from database.connection import PRAGMAS, connect
+from database.dates import to_day
+from database.ids import uuid7
+
+_COLUMNS = """
+    name_id INTEGER NOT NULL,
+    color VARCHAR(6),
+    submitter_id VARCHAR(100) NOT NULL,
+    community_id VARCHAR(100) NOT NULL,
+    date INTEGER NOT NULL,
+    notified BOOLEAN NOT NULL
+"""
+_INDEXES = [
+    "CREATE INDEX idx_tags_community_date ON tags (community_id, date)",
+    "CREATE INDEX idx_tags_name_date ON tags (name_id, date)",
+]
+
+# 方式ごとの (CREATE 文, ID を作る関数)
+SCHEMES = {
+    "uuid4_text_pk": (f"CREATE TABLE tags (id VARCHAR(50) NOT NULL PRIMARY KEY, {_COLUMNS})", lambda: str(uuid.uuid4())),
+    "int_pk_uuid4": (f"CREATE TABLE tags (seq INTEGER PRIMARY KEY, id VARCHAR(50) NOT NULL UNIQUE, {_COLUMNS})",
+                     lambda: str(uuid.uuid4())),
+    "int_pk_uuid7": (f"CREATE TABLE tags (seq INTEGER PRIMARY KEY, id VARCHAR(50) NOT NULL UNIQUE, {_COLUMNS})",
+                     lambda: str(uuid7())),
+    "int_pk_only": (f"CREATE TABLE tags (seq INTEGER PRIMARY KEY, {_COLUMNS})", None),
+}
+
+SEGMENT = 1_000_000
+FIRST_DAY = to_day("2024-01-01")
+LOOKUPS = 2000
+
+
+def _rows(rng, make_id, count, communities):
+    # 日付は 2 年分、コミュニティ・名前はランダム（索引の形は実データと同じ）
+    for _ in range(count):
+        community = rng.randrange(communities)
+        values = (community * 6 + rng.randrange(6) + 1, None, f"user{rng.randrange(100000)}",
+                  f"community{community:08d}", FIRST_DAY + rng.randrange(730), 0)
+        yield values if make_id is None else (make_id(), *values)
+
+
+def bench_scheme(name, args, workdir):
+    create_sql, make_id = SCHEMES[name]
+    path = os.path.join(workdir, f"{name}.db")
+    db = connect(path, PRAGMAS)
+    db.execute(create_sql)
+    for sql in _INDEXES:
+        db.execute(sql)
+    db.commit()
+
+    columns = "name_id, color, submitter_id, community_id, date, notified"
+    if make_id is not None:
+        columns = "id, " + columns
+    insert_sql = f"INSERT INTO tags ({columns}) VALUES ({', '.join('?' * len(columns.split(', ')))})"
+
+    rng = random.Random(args.seed)
+    segments = []
+    sample_ids = []
+    inserted = 0
+    db_seconds = 0.0
+    segment_rows = 0
+    segment_seconds = 0.0
+    while inserted < args.rows:
+        count = min(args.batch, args.rows - inserted)
+        batch = list(_rows(rng, make_id, count, args.communities))
+        if make_id is not None and rng.random() < 0.05:
+            sample_ids.append(batch[rng.randrange(count)][0])
+        # ID・行の生成は含めず、INSERT と COMMIT の時間だけを測る
+        t0 = time.perf_counter()
+        db.executemany(insert_sql, batch)
+        db.commit()
+        elapsed = time.perf_counter() - t0
+        db_seconds += elapsed
+        segment_seconds += elapsed
+        inserted += count
+        segment_rows += count
+        if segment_rows >= SEGMENT or inserted == args.rows:
+            segments.append(round(segment_rows / segment_seconds))
+            segment_rows = 0
+            segment_seconds = 0.0
+            if args.progress:
+                print(f"{name}: {inserted:,} 件 ({segments[-1]:,} 件/秒)", flush=True)
+
+    lookups = []
+    for external_id in (sample_ids * (LOOKUPS // max(len(sample_ids), 1) + 1))[:LOOKUPS]:
+        t0 = time.perf_counter()
+        db.execute("SELECT * FROM tags WHERE id = ?", (external_id,)).fetchone()
+        lookups.append(time.perf_counter() - t0)
+    lookups.sort()
+
+    db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    sizes = dict(db.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY name").fetchall())
+    db.close()
+    result = {
+        "rows_per_second": round(args.rows / db_seconds),
+        "rows_per_second_by_million": segments,
+        "file_mb": round(os.path.getsize(path) / 1024 / 1024, 1),
+        "mb": {k: round(v / 1024 / 1024, 1) for k, v in sizes.items() if not k.startswith("sqlite_schema")},
+        "lookup_by_id_ms": {"p50": _percentile_ms(lookups, 50), "p99": _percentile_ms(lookups, 99)} if lookups else None,
+    }
+    if not args.keep:
+        os.remove(path)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="タグの主キーの持ち方による DB サイズ・挿入スループットの比較")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch", type=int, default=10_000, help="1回の COMMIT で入れる件数")
+    parser.add_argument("--communities", type=int, default=10_000)
+    parser.add_argument("--schemes", default=",".join(SCHEMES))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workdir", help="DB を作るディレクトリ（省略時は一時ディレクトリ）")
+    parser.add_argument("--keep", action="store_true", help="計測後も DB ファイルを残す")
+    parser.add_argument("--progress", action="store_true", help="100 万件ごとに途中経過を表示する")
+    parser.add_argument("--output", help="結果を書き出す JSON ファイル")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp()
+    result = {
+        "config": {"rows": args.rows, "batch": args.batch, "communities": args.communities},
+        "schemes": {name: bench_scheme(name, args, workdir) for name in args.schemes.split(",")},
+    }
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+SQLite の PRAGMA 設定ごとの同時書き込み性能の測定
+カレンダー（タグ追加・取得）、チャット（投稿・履歴取得）、ログイン（ユーザ検索・SID 作成）を
+混ぜた負荷を、マルチスレッド・マルチプロセスで同じ DB ファイルに掛け、
+スループットと "database is locked" エラー率を比較する。
+
+- baseline: 従来の設定（ロールバックジャーナル、synchronous=FULL、busy_timeout なし、mmap なし）
+- tuned:    database.connection.PRAGMAS（WAL、synchronous=NORMAL、busy_timeout、mmap、cache_size）
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.bench_sqlite_pragmas --duration 5 --processes 4 --threads 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from database.connection import PRAGMAS, connect
+from database.dates import to_day
+from database.migrate import migrate
+from database.tag_names import intern_tag_name
+from modules.community_management.chat_writer import INSERT_CHAT_SQL
+
+BASELINE_PRAGMAS = {
+    "busy_timeout": 0,
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "cache_size": -2000,
+    "mmap_size": 0,
+}
+
+CONFIGS = {
+    "baseline": BASELINE_PRAGMAS,
+    "tuned": dict(PRAGMAS),
+}
+
+USERS = 200
+COMMUNITIES = 20
+DATES = [to_day(f"2025-06-{d:02d}") for d in range(1, 31)]
+
+
+def _prepare(path, pragmas):
+    migrate(path)
+    db = connect(path, pragmas)
+    db.executemany(
+        "INSERT INTO users (user_id, user_name, email, password, profile_image) VALUES (?, ?, ?, ?, NULL)",
+        [(f"u{i}", f"user{i}", f"user{i}@example.com", "x") for i in range(USERS)]
+    )
+    db.executemany(
+        "INSERT INTO communities (id, name, image_path) VALUES (?, ?, NULL)",
+        [(f"c{i}", f"community{i}") for i in range(COMMUNITIES)]
+    )
+    db.commit()
+    db.close()
+
+
+def _calendar(db, rnd):
+    community_id = f"c{rnd.randrange(COMMUNITIES)}"
+    date = rnd.choice(DATES)
+    db.execute(
+        "INSERT INTO tags (id, name_id, color, submitter_id, community_id, date, notified) VALUES (?, ?, NULL, ?, ?, ?, 0)",
+        (uuid.uuid4().hex, intern_tag_name(db, community_id, "ランチ", "ff0000"), f"u{rnd.randrange(USERS)}", community_id, date)
+    )
+    db.commit()
+    db.execute(
+        "SELECT t.*, n.name, n.color FROM tags t JOIN tag_names n ON n.id = t.name_id WHERE t.community_id = ? AND t.date = ?",
+        (community_id, date)
+    ).fetchall()
+
+
+def _chat(db, rnd):
+    community_id = f"c{rnd.randrange(COMMUNITIES)}"
+    date = rnd.choice(DATES)
+    sender_id = f"u{rnd.randrange(USERS)}"
+    db.execute(INSERT_CHAT_SQL, {
+        "id": uuid.uuid4().hex, "community_id": community_id, "tag_id": "t1", "date": date,
+        "sender_id": sender_id, "sender_name": sender_id, "message_content": "今日のお昼どうする？",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    db.commit()
+    db.execute(
+        "SELECT * FROM chat_messages WHERE community_id = ? AND tag_id = ? AND date = ? ORDER BY timestamp",
+        (community_id, "t1", date)
+    ).fetchall()
+
+
+def _login(db, rnd):
+    i = rnd.randrange(USERS)
+    db.execute("SELECT * FROM users WHERE email = ?", (f"user{i}@example.com",)).fetchone()
+    db.execute("INSERT INTO user_auth (user_id, sid) VALUES (?, ?)", (f"u{i}", uuid.uuid4().hex))
+    db.commit()
+
+
+# (処理, 重み) カレンダー 40% / チャット 40% / ログイン 20%
+OPERATIONS = [(_calendar, 4), (_chat, 4), (_login, 2)]
+
+
+def _thread_loop(path, pragmas, deadline, seed, out):
+    rnd = random.Random(seed)
+    funcs = [f for f, w in OPERATIONS for _ in range(w)]
+    db = connect(path, pragmas)
+    ok = locked = other = 0
+    latencies = []
+    while time.monotonic() < deadline:
+        t0 = time.perf_counter()
+        try:
+            rnd.choice(funcs)(db, rnd)
+            ok += 1
+            latencies.append(time.perf_counter() - t0)
+        except sqlite3.OperationalError as e:
+            if db.in_transaction:
+                db.rollback()
+            if "locked" in str(e) or "busy" in str(e):
+                locked += 1
+            else:
+                other += 1
+    db.close()
+    out.append((ok, locked, other, latencies))
+
+
+def _run_process(path, pragmas, duration, threads, seed):
+    deadline = time.monotonic() + duration
+    out = []
+    workers = [
+        threading.Thread(target=_thread_loop, args=(path, pragmas, deadline, seed * 1000 + i, out))
+        for i in range(threads)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return out
+
+
+def _percentile_ms(ordered, pct):
+    if not ordered:
+        return 0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 3)
+
+
+def run_scenario(pragmas, processes, threads, duration):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    _prepare(path, pragmas)
+    ctx = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=ctx) as pool:
+        futures = [pool.submit(_run_process, path, pragmas, duration, threads, p) for p in range(processes)]
+        results = [r for f in futures for r in f.result()]
+
+    ok = sum(r[0] for r in results)
+    locked = sum(r[1] for r in results)
+    other = sum(r[2] for r in results)
+    latencies = sorted(x for r in results for x in r[3])
+    attempts = ok + locked + other
+    return {
+        "ops": ok,
+        "ops_per_sec": round(ok / duration, 1),
+        "locked_errors": locked,
+        "other_errors": other,
+        "lock_error_rate": round(locked / attempts, 4) if attempts else 0,
+        "latency_ms_p50": _percentile_ms(latencies, 50),
+        "latency_ms_p95": _percentile_ms(latencies, 95),
+        "latency_ms_p99": _percentile_ms(latencies, 99),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PRAGMA 設定ごとの同時書き込み性能を測る")
+    parser.add_argument("--duration", type=float, default=5.0, help="1シナリオあたりの秒数")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    scenarios = {
+        f"threads_1x{args.threads}": (1, args.threads),
+        f"processes_{args.processes}x1": (args.processes, 1),
+        f"mixed_{args.processes}x{args.threads}": (args.processes, args.threads),
+    }
+    result = {"duration_sec": args.duration, "pragmas": CONFIGS, "scenarios": {}}
+    for scenario, (processes, threads) in scenarios.items():
+        result["scenarios"][scenario] = {
+            name: run_scenario(pragmas, processes, threads, args.duration)
+            for name, pragmas in CONFIGS.items()
+        }
+
+    json.dump(result, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+
+
+if __name__ == "__main__":
+    main()
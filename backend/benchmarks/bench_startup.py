@@ -0,0 +1,105 @@
+"""
+ワーカー起動時間（コールドスタート）の測定
+新しい Python プロセスで `python -X importtime` を使って app を読み込み、
+import・create_app()・最初のリクエストまでの時間と、import に時間のかかるモジュールを報告する。
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.bench_startup --runs 5 --top 15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 子プロセスで実行する起動処理
+CHILD_CODE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+app = app_module.create_app()
+t2 = time.perf_counter()
+app.test_client().get("/api/messages")
+t3 = time.perf_counter()
+print(json.dumps({
+    "import_app_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+    "modules_loaded": len(sys.modules),
+    "heavy_modules_loaded": [m for m in ("linebot", "dotenv", "requests") if m in sys.modules],
+}))
+"""
+
+
+def _parse_importtime(stderr):
+    """
+    -X importtime の出力から (モジュール名, 累積マイクロ秒, 深さ) の一覧を作る
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name_field = line.split("|")
+        depth = (len(name_field) - len(name_field.lstrip(" ")) - 1) // 2
+        entries.append((name_field.strip(), int(cumulative_us), depth))
+    return entries
+
+
+def _run_once(env):
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_CODE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    timings["process_wall_ms"] = wall_ms
+    return timings, _parse_importtime(proc.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ワーカー起動時間を測る")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="表示する import の遅いモジュール数")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "startup.db")
+    env.setdefault("FLASK_URL", "http://127.0.0.1:5001")
+
+    # 1回目はマイグレーション適用と .pyc 生成を含むので別に報告する
+    first, _ = _run_once(env)
+    runs = []
+    imports = None
+    for _ in range(args.runs):
+        timings, imports = _run_once(env)
+        runs.append(timings)
+
+    keys = ["import_app_ms", "create_app_ms", "first_request_ms", "process_wall_ms"]
+    result = {
+        "runs": args.runs,
+        "first_boot": {k: round(first[k], 1) for k in keys},
+        "median": {k: round(statistics.median(r[k] for r in runs), 1) for k in keys},
+        "modules_loaded": runs[-1]["modules_loaded"],
+        "heavy_modules_loaded": runs[-1]["heavy_modules_loaded"],
+        # 直接 import された（深さ0〜1の）モジュールのうち累積時間の長いもの
+        "slowest_imports_ms": {
+            name: round(us / 1000, 1)
+            for name, us, depth in sorted(
+                (e for e in imports if e[2] <= 1), key=lambda e: e[1], reverse=True
+            )[:args.top]
+        },
+    }
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
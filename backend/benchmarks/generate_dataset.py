@@ -0,0 +1,333 @@
+"""
+規模検証用の合成データ生成
+実際のスキーマ（マイグレーション適用済みのDB）に、ユーザ・コミュニティ・メンバー・テンプレートタグ・
+カレンダータグ・チャットメッセージを HTTP API を通さず一括投入する。
+乱数はシードで固定するため、同じ引数なら同じデータセットができる。
+
+高速化のため投入中は次のようにする（終了時に元へ戻す）。
+- journal_mode=OFF, synchronous=OFF, locking_mode=EXCLUSIVE（投入中は他のプロセスから使えない）
+- 主キー以外の索引と全文検索の同期トリガを削除し、投入後に作り直して FTS 索引を一括構築する
+- ID は既存の形式（uuid4 の hex / 文字列）のまま、上位ビットに連番を入れて昇順に生成する
+  （UUIDv7 と同様に主キー索引へ末尾追加になり、ランダムな uuid4 より大幅に速い）
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.generate_dataset                     # 10万ユーザ / 1万コミュニティ / 500万タグ / 2000万メッセージ
+    python -m benchmarks.generate_dataset --scale 0.01 --db /tmp/small.db
+"""
+
+import argparse
+import bisect
+import datetime
+import hashlib
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+from database.connection import DB_PATH, PRAGMAS, connect
+from database.dates import to_day
+from database.migrate import migrate
+from database.migrations.v0003_search_indexes import INDEXES as SEARCH_INDEXES
+from database.tag_names import normalize_tag_name
+
+# --scale 1 のときの件数
+DEFAULT_SIZES = {
+    "users": 100_000,
+    "communities": 10_000,
+    "tags": 5_000_000,
+    "messages": 20_000_000,
+}
+
+# 投入中だけ使う PRAGMA
+LOAD_PRAGMAS = {
+    "journal_mode": "OFF",
+    "synchronous": "OFF",
+    "locking_mode": "EXCLUSIVE",
+    "temp_store": "MEMORY",
+    "cache_size": -524288,
+}
+
+BATCH_SIZE = 50_000
+
+TAG_NAMES = ["ランチ", "カフェ", "ジム", "飲み会", "勉強会", "ランニング", "映画", "カラオケ", "買い物", "ゲーム"]
+TAG_COLORS = ["ff0000", "ff8800", "ffd700", "00aa00", "0088ff", "8800ff"]
+COMMUNITY_WORDS = ["サークル", "研究室", "ゼミ", "部活", "同期", "チーム", "クラブ", "仲間"]
+CHAT_PHRASES = [
+    "了解です", "何時にしますか", "駅前で集合しましょう", "参加します", "少し遅れます",
+    "今日のお昼どうする？", "また今度行きましょう", "場所はどこにしますか", "ありがとうございます",
+    "お店予約しておきます", "雨なので中止にしましょう", "明日も同じ時間で大丈夫です",
+]
+
+# データ生成時のパスワード（ユーザ登録時と同じ SHA-256）
+PASSWORD_HASH = hashlib.sha256(b"password").hexdigest()
+
+
+def _ordered_id(rnd, seq):
+    """
+    連番を上位ビットに持つ（昇順に並ぶ）uuid の hex を作る
+    """
+    return f"{seq:012x}{rnd.getrandbits(80):020x}"
+
+
+def _ordered_uuid(rnd, seq):
+    """
+    _ordered_id の str(uuid.uuid4()) 形式
+    """
+    h = _ordered_id(rnd, seq)
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def _batched(rows, size=BATCH_SIZE):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _popularity(rnd, count):
+    """
+    コミュニティの人気度（一部のコミュニティに偏る）の累積重み
+    """
+    return list(itertools.accumulate(rnd.paretovariate(1.2) for _ in range(count)))
+
+
+class DatasetGenerator:
+    """
+    1つの DB ファイルにデータセットを生成する
+    """
+
+    def __init__(self, db_path, sizes, seed=1, memberships_per_user=5, days=365,
+                 start_date="2025-01-01", log=sys.stderr):
+        self.db_path = db_path
+        self.sizes = sizes
+        self.rnd = random.Random(seed)
+        self.memberships_per_user = memberships_per_user
+        self.days = days
+        self.start_date = datetime.date.fromisoformat(start_date)
+        self.log = log
+        self.timings = {}
+        self.counts = {}
+
+        # 後のテーブルの生成で参照する値
+        self.user_ids = []
+        self.user_names = []
+        self.community_ids = []
+        self.community_weights = []
+        self.community_members = []   # コミュニティ番号 -> ユーザ番号のリスト
+        self.community_templates = []  # コミュニティ番号 -> [(テンプレートタグID, タグ名の辞書ID, 色)]
+        self.tag_names = []  # タグ名の辞書の行（テンプレートタグと一緒に作る）
+
+    def _progress(self, message):
+        print(message, file=self.log, flush=True)
+
+    def _insert(self, db, name, sql, rows):
+        started = time.perf_counter()
+        count = 0
+        for batch in _batched(rows):
+            db.executemany(sql, batch)
+            count += len(batch)
+            if count % (BATCH_SIZE * 20) == 0:
+                self._progress(f"  {name}: {count:,} 件")
+        db.commit()
+        elapsed = time.perf_counter() - started
+        self.timings[name] = round(elapsed, 2)
+        self.counts[name] = count
+        self._progress(f"✅ {name}: {count:,} 件 ({elapsed:.1f} 秒, {count / max(elapsed, 1e-9):,.0f} 件/秒)")
+
+    def _dates(self):
+        """
+        (通し日数, 'YYYY-MM-DD') の一覧。date 列には通し日数（database/dates.py）を入れる
+        """
+        first = to_day(self.start_date)
+        return [(first + d, (self.start_date + datetime.timedelta(days=d)).isoformat()) for d in range(self.days)]
+
+    def _pick_communities(self, k):
+        return [bisect.bisect_left(self.community_weights, self.rnd.random() * self.community_weights[-1])
+                for _ in range(k)]
+
+    def _member_of(self, community):
+        members = self.community_members[community]
+        return members[self.rnd.randrange(len(members))] if members else self.rnd.randrange(len(self.user_ids))
+
+    # --- テーブルごとの行の生成 ---
+
+    def _users(self):
+        for i in range(self.sizes["users"]):
+            user_id = _ordered_uuid(self.rnd, i)
+            name = f"user{i}"
+            self.user_ids.append(user_id)
+            self.user_names.append(name)
+            yield user_id, name, f"user{i}@example.com", PASSWORD_HASH
+
+    def _communities(self):
+        for i in range(self.sizes["communities"]):
+            community_id = _ordered_id(self.rnd, i)
+            self.community_ids.append(community_id)
+            self.community_members.append([])
+            # コミュニティ名は作成 API と同じく16文字以内
+            yield community_id, f"{self.rnd.choice(COMMUNITY_WORDS)}{i}"
+
+    def _template_tags(self):
+        seq = 0
+        for i, community_id in enumerate(self.community_ids):
+            templates = []
+            for name in self.rnd.sample(TAG_NAMES, self.rnd.randint(3, 6)):
+                template_id = _ordered_id(self.rnd, seq)
+                seq += 1
+                name_id = len(self.tag_names) + 1
+                color = self.rnd.choice(TAG_COLORS)
+                self.tag_names.append((name_id, community_id, normalize_tag_name(name), name, color))
+                templates.append((template_id, name_id, color))
+                yield template_id, community_id, name, color, name_id
+            self.community_templates.append(templates)
+
+    def _members(self):
+        seq = 0
+        for user in range(len(self.user_ids)):
+            k = self.rnd.randint(1, self.memberships_per_user * 2 - 1)
+            for community in set(self._pick_communities(k)):
+                self.community_members[community].append(user)
+                yield _ordered_id(self.rnd, seq), self.user_ids[user], self.community_ids[community]
+                seq += 1
+
+    def _tags(self):
+        dates = self._dates()
+        total = self.sizes["tags"]
+        for i in range(total):
+            community = self._pick_communities(1)[0]
+            _, name_id, _ = self.rnd.choice(self.community_templates[community])
+            day, _ = dates[i * len(dates) // total]
+            # 多くはテンプレートの色のまま（辞書の色を使うので NULL）、2割は別の色を選んだものとする
+            color = self.rnd.choice(TAG_COLORS) if self.rnd.random() < 0.2 else None
+            yield (
+                _ordered_uuid(self.rnd, i), name_id, color,
+                self.user_ids[self._member_of(community)], self.community_ids[community], day,
+                1 if self.rnd.random() < 0.5 else 0,
+            )
+
+    def _messages(self):
+        dates = self._dates()
+        total = self.sizes["messages"]
+        for i in range(total):
+            community = self._pick_communities(1)[0]
+            template_id = self.rnd.choice(self.community_templates[community])[0]
+            sender = self._member_of(community)
+            # 日付順に投稿されたものとして、日付ごとに時刻が進むようにする
+            position = i * len(dates) / total
+            day, date = dates[int(position)]
+            seconds = int((position % 1) * 86400)
+            timestamp = f"{date} {seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+            yield (
+                _ordered_id(self.rnd, i), self.community_ids[community], template_id, day,
+                self.user_ids[sender], self.user_names[sender], self.rnd.choice(CHAT_PHRASES), timestamp,
+            )
+
+    # --- 投入 ---
+
+    def _drop_secondary(self, db):
+        """
+        主キー以外の索引と全文検索の同期トリガを削除し、作り直し用の SQL を返す
+        """
+        rows = db.execute(
+            "SELECT type, name, sql FROM sqlite_master "
+            "WHERE type IN ('index', 'trigger') AND sql IS NOT NULL "
+            "AND tbl_name IN ('users', 'communities', 'template_tags', 'members', 'tags', 'chat_messages')"
+        ).fetchall()
+        for kind, name, _ in rows:
+            db.execute(f"DROP {kind.upper()} {name}")
+        db.commit()
+        return [sql for _, _, sql in rows]
+
+    def _rebuild_secondary(self, db, statements):
+        started = time.perf_counter()
+        for sql in statements:
+            db.execute(sql)
+        db.commit()
+        self.timings["indexes"] = round(time.perf_counter() - started, 2)
+        self._progress(f"✅ 索引・トリガ再作成 ({self.timings['indexes']:.1f} 秒)")
+
+        started = time.perf_counter()
+        existing = {r[0] for r in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table, _ in SEARCH_INDEXES:
+            if table in existing:
+                db.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+        db.commit()
+        self.timings["search_indexes"] = round(time.perf_counter() - started, 2)
+        self._progress(f"✅ 全文検索索引の構築 ({self.timings['search_indexes']:.1f} 秒)")
+
+    def run(self):
+        started = time.perf_counter()
+        migrate(self.db_path)
+
+        db = connect(self.db_path, {**PRAGMAS, **LOAD_PRAGMAS})
+        try:
+            for table in ("users", "communities", "members", "tags", "chat_messages"):
+                if db.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                    raise SystemExit(f"❌ {self.db_path} の {table} にはすでにデータがあります。空のDBを指定してください")
+
+            statements = self._drop_secondary(db)
+            self._insert(db, "users", "INSERT INTO users (user_id, user_name, email, password, profile_image) "
+                                      "VALUES (?, ?, ?, ?, NULL)", self._users())
+            self._insert(db, "communities", "INSERT INTO communities (id, name, image_path) VALUES (?, ?, NULL)",
+                         self._communities())
+            self.community_weights = _popularity(self.rnd, len(self.community_ids))
+            self._insert(db, "template_tags", "INSERT INTO template_tags (id, community_id, tag, color_code, name_id) "
+                                              "VALUES (?, ?, ?, ?, ?)", self._template_tags())
+            self._insert(db, "tag_names", "INSERT INTO tag_names (id, community_id, normalized, name, color) "
+                                          "VALUES (?, ?, ?, ?, ?)", iter(self.tag_names))
+            self._insert(db, "members", "INSERT INTO members (id, user_id, community_id) VALUES (?, ?, ?)",
+                         self._members())
+            self._insert(db, "tags", "INSERT INTO tags (id, name_id, color, submitter_id, community_id, date, notified) "
+                                     "VALUES (?, ?, ?, ?, ?, ?, ?)", self._tags())
+            self._insert(db, "chat_messages", "INSERT INTO chat_messages (id, community_id, tag_id, date, sender_id, "
+                                              "sender_name, message_content, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         self._messages())
+            self._rebuild_secondary(db, statements)
+
+            # クエリプランナ用の統計を更新し、通常の設定（WAL）に戻す
+            db.execute("PRAGMA analysis_limit = 1000")
+            db.execute("ANALYZE")
+            db.execute(f"PRAGMA journal_mode = {PRAGMAS.get('journal_mode', 'WAL')}")
+            db.commit()
+        finally:
+            db.close()
+
+        self.timings["total"] = round(time.perf_counter() - started, 2)
+        return {
+            "db": self.db_path,
+            "db_size_mb": round(os.path.getsize(self.db_path) / 1024 / 1024, 1),
+            "counts": self.counts,
+            "seconds": self.timings,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="規模検証用の合成データを生成する")
+    parser.add_argument("--db", default=DB_PATH, help="出力先のDBファイル（既定: instance/messages.db）")
+    parser.add_argument("--scale", type=float, default=1.0, help="既定の件数に掛ける倍率")
+    parser.add_argument("--seed", type=int, default=1)
+    for name, size in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{name}", type=int, help=f"{name} の件数（既定: {size:,} × scale）")
+    parser.add_argument("--memberships-per-user", type=int, default=5, help="1ユーザあたりの平均所属コミュニティ数")
+    parser.add_argument("--days", type=int, default=365, help="タグ・メッセージを分散させる日数")
+    parser.add_argument("--start-date", default="2025-01-01")
+    args = parser.parse_args(argv)
+
+    sizes = {
+        name: getattr(args, name) if getattr(args, name) is not None else max(1, int(size * args.scale))
+        for name, size in DEFAULT_SIZES.items()
+    }
+    generator = DatasetGenerator(
+        args.db, sizes, seed=args.seed, memberships_per_user=args.memberships_per_user,
+        days=args.days, start_date=args.start_date,
+    )
+    json.dump(generator.run(), sys.stdout, indent=2, ensure_ascii=False)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+全 Blueprint を対象にした負荷試験
+一時DBでアプリを HTTP サーバとして起動し（コンポーネント間の HTTP 呼び出しも同じサーバへ向ける）、
+ログイン・ユーザ情報・カレンダー・マッチング・コミュニティ・チャットを混ぜたトラフィックを
+指定した並列数で流して、エンドポイントごとのスループットと p50/p95/p99 を JSON で出力する。
+
+対象: auth_bp, user_data_bp, user_bp, calendar_bp, calendar_manager_bp,
+      community_service_bp, community_management_bp, matching_bp
+
+使い方 (backend ディレクトリで):
+    python -m benchmarks.loadtest --concurrency 8 --duration 30 --output result.json
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:5001   # 起動済みのサーバに対して実行
+    python -m benchmarks.loadtest --compare before.json               # 前回結果との比較を付ける
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+
+import requests
+
+DATES = [f"2025-07-{d:02d}" for d in range(1, 29)]
+TAG_NAMES = ["ランチ", "カフェ", "ジム", "飲み会", "勉強会"]
+CHAT_WORDS = ["了解です", "何時にしますか", "駅前で集合しましょう", "参加します", "遅れます"]
+
+
+def _percentile_ms(ordered, pct):
+    if not ordered:
+        return 0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 3)
+
+
+class Recorder:
+    """
+    エンドポイントごとの応答時間とエラー数を集計する
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._errors = {}
+
+    def record(self, name, seconds, ok):
+        with self._lock:
+            self._samples.setdefault(name, []).append(seconds)
+            if not ok:
+                self._errors[name] = self._errors.get(name, 0) + 1
+
+    def report(self, duration):
+        endpoints = {}
+        total = errors = 0
+        for name in sorted(self._samples):
+            ordered = sorted(self._samples[name])
+            count = len(ordered)
+            failed = self._errors.get(name, 0)
+            total += count
+            errors += failed
+            endpoints[name] = {
+                "count": count,
+                "errors": failed,
+                "rps": round(count / duration, 2),
+                "p50_ms": _percentile_ms(ordered, 50),
+                "p95_ms": _percentile_ms(ordered, 95),
+                "p99_ms": _percentile_ms(ordered, 99),
+                "max_ms": round(ordered[-1] * 1000, 3),
+            }
+        return {
+            "total_requests": total,
+            "total_errors": errors,
+            "rps": round(total / duration, 2),
+            "endpoints": endpoints,
+        }
+
+
+class Client:
+    """
+    1並列分の HTTP クライアント（接続を使い回す）
+    """
+
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.session = requests.Session()
+
+    def call(self, name, method, path, expect=(200, 201), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=30, **kwargs)
+            ok = response.status_code in expect
+        except requests.RequestException:
+            response, ok = None, False
+        self.recorder.record(name, time.perf_counter() - started, ok)
+        return response
+
+
+class World:
+    """
+    シナリオが参照するユーザ・コミュニティ・タグ
+    """
+
+    def __init__(self):
+        self.users = []          # dict(user_id, email, password)
+        self.communities = []    # dict(id, name, template_tags)
+        self.tags = []           # カレンダータグID
+        self.lock = threading.Lock()
+
+
+def setup_world(client, users, communities):
+    """
+    負荷を掛ける前にユーザ登録・コミュニティ作成・参加・テンプレートタグ作成を行う
+    """
+    world = World()
+    for i in range(users):
+        email = f"load{i}-{uuid.uuid4().hex[:8]}@example.com"
+        response = client.call("setup: POST /api/user/register", "POST", "/api/user/register",
+                               data={"email": email, "password": "password", "name": f"user{i}"})
+        world.users.append({"user_id": response.json()["user_id"], "email": email, "password": "password"})
+
+    for i in range(communities):
+        name = f"load{i}{uuid.uuid4().hex[:6]}"
+        response = client.call("setup: POST /api/community/create", "POST", "/api/community/create",
+                               data={"community_name": name})
+        community = {"id": response.json()["community_id"], "name": name, "template_tags": []}
+        for tag in TAG_NAMES[:3]:
+            response = client.call("setup: POST /api/community/template_tags", "POST", "/api/community/template_tags",
+                                   json={"community_id": community["id"], "tag": tag, "colorCode": "ff8800"})
+            community["template_tags"].append(response.json()["template_tag_id"])
+        world.communities.append(community)
+
+    for user in world.users:
+        for community in random.sample(world.communities, min(3, len(world.communities))):
+            client.call("setup: POST /api/community/join", "POST", "/api/community/join",
+                        json={"community_name": community["name"], "user_id": user["user_id"]})
+    return world
+
+
+# --- シナリオ（1回の呼び出しが1ユーザ操作に相当する） ---
+
+def scenario_login(c, w, rnd):
+    user = rnd.choice(w.users)
+    response = c.call("POST /api/auth/login", "POST", "/api/auth/login",
+                      json={"email": user["email"], "pw": user["password"]})
+    if response is not None and response.ok:
+        data = response.json()
+        sid = data.get("sid")
+        c.call("POST /api/sid/validate", "POST", "/api/sid/validate",
+               json={"user_id": user["user_id"], "sid": sid})
+        c.call("DELETE /api/auth/logout", "DELETE", "/api/auth/logout", json={"sid": sid})
+
+
+def scenario_user(c, w, rnd):
+    user = rnd.choice(w.users)
+    c.call("GET /api/user/get/<user_id>", "GET", f"/api/user/get/{user['user_id']}")
+    c.call("GET /api/users/search", "GET", "/api/users/search", params={"id": user["user_id"]})
+    c.call("GET /api/users/login", "GET", "/api/users/login", params={"email": user["email"]})
+    if rnd.random() < 0.1:
+        c.call("PUT /api/user/edit", "PUT", "/api/user/edit",
+               data={"user_id": user["user_id"], "name": f"renamed{rnd.randint(0, 999)}"})
+
+
+def scenario_calendar(c, w, rnd):
+    user = rnd.choice(w.users)
+    community = rnd.choice(w.communities)
+    date = rnd.choice(DATES)
+    tag_name = rnd.choice(TAG_NAMES)
+    response = c.call("POST /api/<community_id>/calendar/tag/add", "POST",
+                      f"/api/{community['id']}/calendar/tag/add",
+                      json={"tag_name": tag_name, "tag_color": "ff0000",
+                            "submitter_id": user["user_id"], "date": date})
+    c.call("GET /api/<community_id>/calendar/tag/get", "GET",
+           f"/api/{community['id']}/calendar/tag/get", params={"date": date})
+    c.call("GET /api/<community_id>/calendar/tag/get/<user_id>", "GET",
+           f"/api/{community['id']}/calendar/tag/get/{user['user_id']}", params={"date": date})
+    c.call("GET /api/calendar-manager/tags", "GET", "/api/calendar-manager/tags",
+           json={"community_id": community["id"], "date": date})
+    c.call("GET /api/calendar-manager/tags/user", "GET", "/api/calendar-manager/tags/user",
+           json={"community_id": community["id"], "date": date, "user_id": user["user_id"]})
+    c.call("GET /api/matching/", "GET", "/api/matching/",
+           json={"community_id": community["id"], "tag_name": tag_name, "date": date,
+                 "registered_user_id": user["user_id"]})
+    if response is not None and response.ok:
+        tag_id = (response.json().get("tag") or {}).get("id")
+        if tag_id and rnd.random() < 0.3:
+            c.call("DELETE /api/<community_id>/calendar/tag/delete", "DELETE",
+                   f"/api/{community['id']}/calendar/tag/delete", json={"tag_id": tag_id})
+
+
+def scenario_community(c, w, rnd):
+    user = rnd.choice(w.users)
+    community = rnd.choice(w.communities)
+    template_tag = rnd.choice(community["template_tags"])
+    c.call("GET /api/community/joined", "GET", "/api/community/joined", params={"user_id": user["user_id"]})
+    c.call("GET /api/community/members", "GET", "/api/community/members", params={"community_id": community["id"]})
+    c.call("GET /api/community/info_by_id", "GET", "/api/community/info_by_id", params={"community_id": community["id"]})
+    c.call("GET /api/community/template_tags", "GET", "/api/community/template_tags",
+           params={"community_id": community["id"]})
+    c.call("GET /api/community/template_tag_by_id", "GET", "/api/community/template_tag_by_id",
+           params={"tag_id": template_tag})
+    c.call("GET /api/community/search", "GET", "/api/community/search", params={"q": community["name"][:4]})
+    c.call("GET /community/manage/user/<user_id>/communities-tags", "GET",
+           f"/community/manage/user/{user['user_id']}/communities-tags")
+
+
+def scenario_chat(c, w, rnd):
+    user = rnd.choice(w.users)
+    community = rnd.choice(w.communities)
+    tag_id = rnd.choice(community["template_tags"])
+    date = rnd.choice(DATES)
+    if rnd.random() < 0.5:
+        c.call("POST /api/community/<community_id>/tag/<tag_id>/chat/post", "POST",
+               f"/api/community/{community['id']}/tag/{tag_id}/chat/post",
+               json={"date": date, "message": rnd.choice(CHAT_WORDS), "sender_id": user["user_id"],
+                     "sender_name": "load"})
+    else:
+        c.call("POST /community/manage/<community_id>/tag/<tag_id>/chat", "POST",
+               f"/community/manage/{community['id']}/tag/{tag_id}/chat",
+               json={"date": date, "message": rnd.choice(CHAT_WORDS), "sender_id": user["user_id"]})
+    c.call("GET /api/community/<community_id>/tag/<tag_id>/chat/history", "GET",
+           f"/api/community/{community['id']}/tag/{tag_id}/chat/history", params={"date": date})
+    c.call("GET /community/manage/<community_id>/tag/<tag_id>/chat", "GET",
+           f"/community/manage/{community['id']}/tag/{tag_id}/chat", params={"date": date})
+    if rnd.random() < 0.2:
+        c.call("GET /api/community/<community_id>/chat/search", "GET",
+               f"/api/community/{community['id']}/chat/search", params={"q": rnd.choice(CHAT_WORDS)})
+
+
+# (シナリオ, 重み)
+SCENARIOS = [
+    (scenario_login, 1),
+    (scenario_user, 2),
+    (scenario_calendar, 3),
+    (scenario_community, 2),
+    (scenario_chat, 4),
+]
+
+
+def start_server(db_path):
+    """
+    一時DBでアプリを起動し、ベースURLとサーバを返す
+    コンポーネント間の HTTP 呼び出し先（FLASK_URL, C8_BASE_URL）も起動したサーバへ向ける。
+    """
+    from werkzeug.serving import make_server
+
+    holder = {}
+    server = make_server("127.0.0.1", 0, lambda environ, start: holder["app"](environ, start), threaded=True)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    os.environ["FLASK_URL"] = base_url
+    os.environ["C8_BASE_URL"] = f"{base_url}/api"
+
+    from app import create_app
+    holder["app"] = create_app({"DATABASE_PATH": db_path})
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return base_url, server
+
+
+def compare(current, previous):
+    """
+    前回結果とのエンドポイントごとの比較（比率 = 今回 / 前回）
+    """
+    rows = {}
+    for name, now in current["endpoints"].items():
+        before = previous.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        rows[name] = {
+            key: round(now[key] / before[key], 3) if before[key] else None
+            for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+        }
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="全 Blueprint を対象にした負荷試験")
+    parser.add_argument("--concurrency", type=int, default=8, help="並列クライアント数")
+    parser.add_argument("--duration", type=float, default=30.0, help="負荷を掛ける秒数")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--communities", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--base-url", help="起動済みサーバの URL（省略時は一時DBでアプリを起動する）")
+    parser.add_argument("--output", help="結果 JSON の出力先（省略時は標準出力）")
+    parser.add_argument("--compare", help="比較する前回結果の JSON")
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        base_url, server = start_server(os.path.join(tempfile.mkdtemp(), "loadtest.db"))
+
+    random.seed(args.seed)
+    setup_recorder = Recorder()
+    world = setup_world(Client(base_url, setup_recorder), args.users, args.communities)
+
+    recorder = Recorder()
+    weighted = [s for s, w in SCENARIOS for _ in range(w)]
+    stop = threading.Event()
+
+    def worker(n):
+        rnd = random.Random(args.seed * 1000 + n)
+        client = Client(base_url, recorder)
+        while not stop.is_set():
+            rnd.choice(weighted)(client, world, rnd)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(args.concurrency)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    time.sleep(args.duration)
+    stop.set()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_sec": args.duration,
+            "users": args.users,
+            "communities": args.communities,
+            "seed": args.seed,
+            "base_url": args.base_url or "embedded",
+        },
+        **recorder.report(elapsed),
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            result["compare"] = compare(result, json.load(f))
+
+    if server is not None:
+        server.shutdown()
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# backend/common/idempotency.py
+"""
+Idempotency-Key による POST の重複防止
+モバイルクライアントはタイムアウトすると同じ POST を送り直す。タグ追加・チャット投稿は
+サーバ側で新しい ID を振るため、送り直すたびに同じ内容が二重に登録されてしまう。
+@idempotent を付けたエンドポイントは Idempotency-Key ヘッダを受け付け、
+同じキーの2回目以降には最初の応答をそのまま返す（タグ・チャットのテーブルには触れない）。
+
+- キーはエンドポイントごとに idempotency_keys テーブルに保存する（複数ワーカーで共有される）
+- 最初のリクエストは処理前に「処理中」の行を入れる。処理中に同じキーが来たら 409（Retry-After 付き）
+- 同じキーで内容（メソッド・パス・本文）が違うリクエストは 422
+- 成功（2xx・3xx）の応答だけを保存する。エラー・例外で終わったときは行を消し、送り直しで処理し直せるようにする
+  （タグ追加は C10 との通信エラーも 400 で返すため、エラーを保存すると一時的な失敗を返し続けてしまう）
+- 保存期間は IDEMPOTENCY_TTL_SECONDS（既定 24 時間）。期限切れの行は書き込みのついでに削除する
+- 処理中のまま IDEMPOTENCY_LOCK_SECONDS（既定 60 秒）過ぎた行（ワーカーが落ちたなど）は次のリクエストが引き継ぐ
+ヘッダが無いリクエストはこれまでどおり処理する。
+"""
+
+import functools
+import hashlib
+import os
+import time
+
+from flask import Response, current_app, jsonify, request
+
+from database.connection import get_db
+from monitoring.metrics import record_idempotency
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+DEFAULT_TTL = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+DEFAULT_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+# 何件の新しいキーごとに期限切れの行を削除するか
+PRUNE_EVERY = 256
+
+
+class IdempotencyStore:
+    """
+    idempotency_keys テーブルに (エンドポイント, キー) ごとの応答を保存する
+    リクエスト中の DB 接続（get_db）を使う。
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, lock_seconds=DEFAULT_LOCK_SECONDS):
+        """
+        Args:
+            ttl (float): 応答を保存しておく秒数
+            lock_seconds (float): 処理中の行を他のリクエストに引き継ぐまでの秒数
+        """
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self._inserted = 0
+
+    def begin(self, scope, key, fingerprint):
+        """
+        キーの処理を始める
+        Returns:
+            tuple[str, sqlite3.Row | None]: ("new" | "replayed" | "in_progress" | "mismatch", 保存済みの行)
+        """
+        db = get_db(readonly=False)
+        now = time.time()
+        cursor = db.execute(
+            "INSERT OR IGNORE INTO idempotency_keys (scope, key, fingerprint, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (scope, key, fingerprint, now, now + self.ttl)
+        )
+        if cursor.rowcount == 1:
+            db.commit()
+            self._inserted += 1
+            if self._inserted % PRUNE_EVERY == 0:
+                db.execute("DELETE FROM idempotency_keys WHERE expires_at < ?", (now,))
+                db.commit()
+            return "new", None
+
+        row = db.execute(
+            "SELECT fingerprint, status, body, created_at, expires_at FROM idempotency_keys WHERE scope = ? AND key = ?",
+            (scope, key)
+        ).fetchone()
+        if row is None:
+            # 直前に削除された
+            db.commit()
+            return self.begin(scope, key, fingerprint)
+
+        expired = row["expires_at"] < now
+        abandoned = row["status"] is None and now - row["created_at"] > self.lock_seconds
+        if expired or (abandoned and row["fingerprint"] == fingerprint):
+            # 期限切れ・放置された行は、同時に来た他のリクエストと取り合わないよう created_at を条件に引き継ぐ
+            cursor = db.execute(
+                "UPDATE idempotency_keys SET fingerprint = ?, status = NULL, body = NULL, created_at = ?, expires_at = ? "
+                "WHERE scope = ? AND key = ? AND created_at = ?",
+                (fingerprint, now, now + self.ttl, scope, key, row["created_at"])
+            )
+            db.commit()
+            return ("new", None) if cursor.rowcount == 1 else ("in_progress", None)
+        db.commit()
+        if row["fingerprint"] != fingerprint:
+            return "mismatch", row
+        if row["status"] is None:
+            return "in_progress", row
+        return "replayed", row
+
+    def complete(self, scope, key, status, body):
+        """
+        応答を保存する（以降の同じキーにはこの応答を返す）
+        """
+        db = get_db(readonly=False)
+        db.execute(
+            "UPDATE idempotency_keys SET status = ?, body = ? WHERE scope = ? AND key = ?",
+            (status, body, scope, key)
+        )
+        db.commit()
+
+    def release(self, scope, key):
+        """
+        処理中の行を消す（失敗したリクエストを送り直せるようにする）
+        """
+        db = get_db(readonly=False)
+        db.rollback()
+        db.execute("DELETE FROM idempotency_keys WHERE scope = ? AND key = ? AND status IS NULL", (scope, key))
+        db.commit()
+
+
+# アプリ全体で共有する保存先
+store = IdempotencyStore()
+
+
+def _fingerprint():
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.path.encode(), request.get_data()):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+def idempotent(view):
+    """
+    Idempotency-Key ヘッダ付きの POST を1回だけ処理するデコレータ（@bp.route の下に付ける）
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER, "").strip()
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{HEADER} は{MAX_KEY_LENGTH}文字以内にしてください"}), 400
+
+        scope = request.endpoint
+        state, row = store.begin(scope, key, _fingerprint())
+        record_idempotency(scope, state)
+        if state == "replayed":
+            response = Response(row["body"], status=row["status"], mimetype="application/json")
+            response.headers["Idempotent-Replayed"] = "true"
+            return response
+        if state == "in_progress":
+            response = jsonify({"error": f"同じ {HEADER} のリクエストを処理中です"})
+            response.headers["Retry-After"] = "1"
+            return response, 409
+        if state == "mismatch":
+            return jsonify({"error": f"{HEADER} が別の内容のリクエストで使われています"}), 422
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except Exception:
+            store.release(scope, key)
+            raise
+        if response.status_code >= 400:
+            store.release(scope, key)
+        else:
+            store.complete(scope, key, response.status_code, response.get_data())
+        return response
+
+    return wrapper
+
+
+def init_app(app):
+    """
+    app.config（未指定なら環境変数）の保存期間を反映する
+    """
+    store.ttl = float(app.config.setdefault("IDEMPOTENCY_TTL_SECONDS", DEFAULT_TTL))
+    store.lock_seconds = float(app.config.setdefault("IDEMPOTENCY_LOCK_SECONDS", DEFAULT_LOCK_SECONDS))
@@ -0,0 +1,273 @@
+# backend/common/service_client.py
+"""
+コンポーネント間 API 呼び出しの共通 HTTP クライアント
+C5→C10、C6→C10、C2/C3→C8 などの内部呼び出しはこのモジュールの service_client を通す。
+- requests.Session を共有し、呼び出し先ホストごとの keep-alive 接続プールで TCP 接続を使い回す
+- 接続・読み取りタイムアウトを必ず付け、応答しない呼び出し先でワーカーが止まらないようにする
+- 冪等なメソッド（GET / PUT / DELETE / HEAD / OPTIONS）だけ、接続エラー・タイムアウト・502/503/504 で
+  ジッタ付き指数バックオフにより再試行する（回数に上限あり。POST は再試行しない）
+- 呼び出し先コンポーネントごとのサーキットブレーカ: 連続して失敗すると開き、開いている間は送らずに
+  CircuitOpenError を返す。待機時間が過ぎたら1件だけ試し、成功すれば閉じる
+  （全コンポーネントが同じ FLASK_URL のホストにあるため、ホストと /api/ に続くパスの先頭
+  （calendar-manager・users など）で分け、1つのエンドポイントの障害で他の呼び出しまで止めない）
+- 再試行・ブレーカの状態は monitoring.metrics に記録する
+  （呼び出しそのものの件数・所要時間は Session.send の計測で outbound_http_* に入る）
+
+get / post / put / delete は requests と同じ引数で呼べるので、requests モジュールの代わりに渡せる。
+各コンポーネントを別サービスとして配置するときも、呼び出し先 URL（FLASK_URL・C8_BASE_URL）を変えるだけでよい。
+"""
+
+import http.cookiejar
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from monitoring.metrics import record_circuit_rejected, record_circuit_state, record_service_retry
+
+logger = logging.getLogger(__name__)
+
+# 既定のタイムアウト（秒）。呼び出しごとに timeout= を渡せば上書きできる
+CONNECT_TIMEOUT = float(os.getenv("SERVICE_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.getenv("SERVICE_READ_TIMEOUT", "10"))
+# 冪等な呼び出しの再試行回数（初回を除く）とバックオフの基準・上限（秒）
+RETRIES = int(os.getenv("SERVICE_RETRIES", "2"))
+BACKOFF_BASE = float(os.getenv("SERVICE_BACKOFF_BASE", "0.1"))
+BACKOFF_MAX = float(os.getenv("SERVICE_BACKOFF_MAX", "2"))
+# ホストあたりの keep-alive 接続数（スレッド数程度にする）
+POOL_MAXSIZE = int(os.getenv("SERVICE_POOL_MAXSIZE", "32"))
+# 連続何回の失敗でサーキットを開くか、開いてから何秒後に試行を許すか
+BREAKER_THRESHOLD = int(os.getenv("SERVICE_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("SERVICE_BREAKER_RESET_SECONDS", "30"))
+
+IDEMPOTENT_METHODS = frozenset(("GET", "PUT", "DELETE", "HEAD", "OPTIONS"))
+# 呼び出し先が一時的に使えないことを示すステータス（500 はアプリのエラーなので含めない）
+RETRY_STATUSES = frozenset((502, 503, 504))
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    サーキットが開いているため呼び出しを送らなかった
+    requests.exceptions.ConnectionError の派生なので、既存の RequestException の処理でそのまま扱える。
+    """
+
+
+def breaker_target(url):
+    """
+    URL からサーキットブレーカのキー（"<ホスト>/<コンポーネント>"）を返す
+    コンポーネントはパスの先頭（/api/ で始まる場合はその次）の部分
+    例: http://127.0.0.1:5001/api/calendar-manager/tags → "127.0.0.1:5001/calendar-manager"
+    """
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split("/") if segment]
+    if segments and segments[0] == "api":
+        segments = segments[1:]
+    return f"{parts.netloc}/{segments[0] if segments else ''}"
+
+
+class CircuitBreaker:
+    """
+    呼び出し先1コンポーネントのサーキットブレーカ（closed → open → half_open → closed）
+    """
+
+    def __init__(self, target, threshold=BREAKER_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.target = target
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        呼び出しを送ってよいか（half_open では同時に1件だけ試す）
+        """
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            if self.state == "open":
+                if now - self._opened_at < self.reset_seconds:
+                    return False
+                self._transition("half_open")
+            # 試行中の呼び出しが戻らないまま待機時間を過ぎたら、次の1件に試させる
+            if self._trial_started is not None and now - self._trial_started < self.reset_seconds:
+                return False
+            self._trial_started = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_started = None
+            if self.state != "closed":
+                self._transition("closed")
+                logger.info(f"✅ サーキットを閉じました: {self.target}")
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_started = None
+            if self.state == "half_open" or (self.state == "closed" and self._failures >= self.threshold):
+                self._opened_at = time.monotonic()
+                self._transition("open")
+                logger.warning(f"⚠️ サーキットを開きました: {self.target}（連続失敗 {self._failures} 回）")
+
+    def release(self):
+        """
+        呼び出し先の状態と関係ない理由（URL 不正など）で試行が終わったとき、試行枠だけ返す
+        """
+        with self._lock:
+            self._trial_started = None
+
+    def _transition(self, state):
+        self.state = state
+        record_circuit_state(self.target, state)
+
+
+class ServiceClient:
+    """
+    コンポーネント間 API 呼び出し用の HTTP クライアント（スレッド間で共有してよい）
+    """
+
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, retries=RETRIES,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, pool_maxsize=POOL_MAXSIZE,
+                 breaker_threshold=BREAKER_THRESHOLD, breaker_reset_seconds=BREAKER_RESET_SECONDS):
+        self.configure(connect_timeout, read_timeout, retries, backoff_base, backoff_max, pool_maxsize,
+                       breaker_threshold, breaker_reset_seconds)
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+        self._breakers = {}
+
+    def configure(self, connect_timeout, read_timeout, retries, backoff_base, backoff_max, pool_maxsize,
+                  breaker_threshold, breaker_reset_seconds):
+        self.timeout = (float(connect_timeout), float(read_timeout))
+        self.retries = int(retries)
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.pool_maxsize = int(pool_maxsize)
+        self.breaker_threshold = int(breaker_threshold)
+        self.breaker_reset_seconds = float(breaker_reset_seconds)
+        # 設定を変えたら次の呼び出しでセッションとブレーカを作り直す
+        self._pid = None
+        self._breakers = {}
+
+    def _get_session(self):
+        # fork 後の子プロセスでは親の接続を使わず、セッションを作り直す
+        if self._pid == os.getpid():
+            return self._session
+        with self._lock:
+            if self._pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=self.pool_maxsize)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                # 共有セッションなので、あるユーザの呼び出しで受け取った Cookie を他の呼び出しへ送らない
+                session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+                self._session = session
+                self._breakers = {}
+                self._pid = os.getpid()
+            return self._session
+
+    def breaker(self, target):
+        breaker = self._breakers.get(target)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    target, CircuitBreaker(target, self.breaker_threshold, self.breaker_reset_seconds)
+                )
+        return breaker
+
+    def _backoff(self, attempt, response=None):
+        # full jitter: 0 〜 base * 2^attempt（上限 backoff_max）から一様に選ぶ
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(self.backoff_max, float(retry_after)))
+        return delay
+
+    def request(self, method, url, **kwargs):
+        """
+        requests.request と同じ引数で呼び出す（timeout 省略時は既定のタイムアウトを使う）
+        Raises:
+            CircuitOpenError: 呼び出し先のサーキットが開いている
+            requests.exceptions.RequestException: 再試行しても接続できなかった
+        """
+        method = method.upper()
+        kwargs.setdefault("timeout", self.timeout)
+        session = self._get_session()
+        target = breaker_target(url)
+        breaker = self.breaker(target)
+        attempts = 1 + (self.retries if method in IDEMPOTENT_METHODS else 0)
+
+        for attempt in range(attempts):
+            if not breaker.allow():
+                record_circuit_rejected(target)
+                raise CircuitOpenError(f"{target} へのサーキットが開いているため呼び出しを中止しました")
+            last = attempt + 1 >= attempts
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                breaker.record_failure()
+                # この失敗でサーキットが開いたら、それ以上は再試行しない
+                if last or breaker.state == "open":
+                    raise
+                reason = "timeout" if isinstance(e, requests.exceptions.Timeout) else "connection"
+                delay = self._backoff(attempt)
+            except Exception:
+                breaker.release()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+                if last or breaker.state == "open":
+                    return response
+                reason = str(response.status_code)
+                delay = self._backoff(attempt, response)
+                response.close()
+
+            record_service_retry(target, method, reason)
+            logger.info(f"⚠️ {method} {url} を再試行します（{reason}, {attempt + 1}/{attempts - 1}回目, {delay:.2f}秒後）")
+            time.sleep(delay)
+
+    def get(self, url, params=None, **kwargs):
+        return self.request("GET", url, params=params, **kwargs)
+
+    def post(self, url, data=None, json=None, **kwargs):
+        return self.request("POST", url, data=data, json=json, **kwargs)
+
+    def put(self, url, data=None, **kwargs):
+        return self.request("PUT", url, data=data, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+
+# アプリ全体で共有するクライアント
+service_client = ServiceClient()
+
+
+def init_app(app):
+    """
+    app.config（未指定なら環境変数）のタイムアウト・再試行・ブレーカ設定を service_client に反映する
+    """
+    service_client.configure(
+        app.config.setdefault("SERVICE_CONNECT_TIMEOUT", CONNECT_TIMEOUT),
+        app.config.setdefault("SERVICE_READ_TIMEOUT", READ_TIMEOUT),
+        app.config.setdefault("SERVICE_RETRIES", RETRIES),
+        app.config.setdefault("SERVICE_BACKOFF_BASE", BACKOFF_BASE),
+        app.config.setdefault("SERVICE_BACKOFF_MAX", BACKOFF_MAX),
+        app.config.setdefault("SERVICE_POOL_MAXSIZE", POOL_MAXSIZE),
+        app.config.setdefault("SERVICE_BREAKER_THRESHOLD", BREAKER_THRESHOLD),
+        app.config.setdefault("SERVICE_BREAKER_RESET_SECONDS", BREAKER_RESET_SECONDS),
+    )
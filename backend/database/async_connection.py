@@ -0,0 +1,76 @@
+# backend/database/async_connection.py
+"""
+非同期（asyncio）用の読み取り専用DBアクセス層
+ASGI モード（asgi.py）のホットな読み取りエンドポイントが使う。
+- aiosqlite の接続を固定数だけ開いて使い回す（接続ごとに専用スレッドで sqlite3 を実行し、イベントループを塞がない）
+- 接続は aiosqlite.connect() で connection.connect_readonly() と同じ URI・接続クラス・PRAGMA で開くため、
+  PRAGMA・TimedConnection（遅いクエリの記録など）は同期側と同じ
+"""
+
+import asyncio
+import os
+import sqlite3
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+from database.connection import DB_PATH, readonly_pragma_statements, readonly_uri
+from monitoring.timing import TimedConnection
+
+# 非同期読み取りプールの接続数（環境変数 ASYNC_DATABASE_POOL_SIZE で上書き可能）
+ASYNC_POOL_SIZE = int(os.getenv("ASYNC_DATABASE_POOL_SIZE", "8"))
+
+# カーソルから一度に取り出す行数
+ITER_CHUNK_SIZE = 64
+
+
+class AsyncReadPool:
+    """
+    aiosqlite の読み取り専用接続プール
+    空き接続がなければ返却されるまで待つ（接続を増やさない）。
+    """
+
+    def __init__(self, db_path=None, size=ASYNC_POOL_SIZE):
+        self.db_path = db_path or DB_PATH
+        self.size = size
+        self._idle = None
+        self._connections = []
+
+    async def open(self):
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(
+                readonly_uri(self.db_path), iter_chunk_size=ITER_CHUNK_SIZE,
+                uri=True, check_same_thread=False, factory=TimedConnection,
+            )
+            for sql in readonly_pragma_statements():
+                await conn.execute(sql)
+            conn.row_factory = sqlite3.Row
+            self._connections.append(conn)
+            self._idle.put_nowait(conn)
+
+    async def close(self):
+        for conn in self._connections:
+            await conn.close()
+        self._connections.clear()
+        self._idle = None
+
+    @asynccontextmanager
+    async def acquire(self):
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+
+    async def fetchall(self, sql, parameters=()):
+        """
+        1文を実行して全行（sqlite3.Row のリスト）を返す
+        """
+        async with self.acquire() as conn:
+            return await conn.execute_fetchall(sql, parameters)
+
+    async def fetchone(self, sql, parameters=()):
+        async with self.acquire() as conn:
+            async with conn.execute(sql, parameters) as cursor:
+                return await cursor.fetchone()
@@ -0,0 +1,229 @@
+# backend/database/connection.py
+"""
+共通DBアクセス層
+instance/messages.db への接続をこのモジュールに集約する。
+- SQLAlchemy (CalendarManager の Tag モデル) と生の sqlite3 を使うモジュールが
+  同じエンジン（コネクションプール）を共有する
+- 接続時の PRAGMA 設定は connect() の一箇所で行う
+  （WAL・synchronous=NORMAL・busy_timeout・mmap・キャッシュサイズ。デプロイごとに上書き可能）
+- 生の sqlite3 接続はリクエスト中 flask.g に載せて使い回し、teardown でプールへ返す
+- GET リクエストは読み取り専用プール（mode=ro, query_only）を使い、書き込みと接続を奪い合わない
+- 接続は monitoring.timing.TimedConnection として作り、リクエスト計測時にクエリ時間を集計する
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from urllib.request import pathname2url
+
+from flask import g
+
+from extentions import db, READONLY_BIND, use_readonly_pool
+from monitoring.timing import TimedConnection
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# DBファイルの絶対パス（環境変数 DATABASE_PATH で上書き可能）
+DB_PATH = os.path.abspath(
+    os.getenv("DATABASE_PATH", os.path.join(BACKEND_DIR, "instance", "messages.db"))
+)
+
+# すべての接続に適用する PRAGMA の既定値（この順に適用する）
+# busy_timeout を最初に設定し、journal_mode の切り替えでもロック解放を待てるようにする
+DEFAULT_PRAGMAS = {
+    "busy_timeout": 5000,         # ロック解放を最大 5 秒待つ（"database is locked" を防ぐ）
+    "journal_mode": "WAL",        # 読み取りと書き込みを並行させる
+    "synchronous": "NORMAL",      # WAL では COMMIT ごとの fsync を省いても DB は壊れない（ただし電源断・OS クラッシュで直近の COMMIT は失われうる）
+    "cache_size": -65536,         # 負値は KiB 指定（接続あたり約 64MB）
+    "mmap_size": 268435456,       # 256MB までメモリマップで読む
+}
+
+_PRAGMA_NAME = re.compile(r"^[a-z_]+$")
+_PRAGMA_VALUE = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+
+def parse_pragmas(text):
+    """
+    "name=value;name=value" 形式の文字列を PRAGMA の dict に変換する
+    環境変数 SQLITE_PRAGMAS（例: "synchronous=FULL;mmap_size=0"）の読み込みに使う。
+    """
+    pragmas = {}
+    for item in (text or "").replace(",", ";").split(";"):
+        if not item.strip():
+            continue
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"PRAGMA の指定が不正です: {item!r}")
+        pragmas[name.strip().lower()] = value.strip()
+    return pragmas
+
+
+def _validate_pragmas(pragmas):
+    # PRAGMA はプレースホルダを使えないため、名前と値を文字種で制限する
+    for name, value in pragmas.items():
+        if not _PRAGMA_NAME.match(str(name)) or not _PRAGMA_VALUE.match(str(value)):
+            raise ValueError(f"PRAGMA の指定が不正です: {name}={value}")
+    return pragmas
+
+
+# 実際に適用する PRAGMA（既定値 + 環境変数 SQLITE_PRAGMAS + app.config["SQLITE_PRAGMAS"]）
+PRAGMAS = _validate_pragmas({**DEFAULT_PRAGMAS, **parse_pragmas(os.getenv("SQLITE_PRAGMAS"))})
+
+
+def configure_pragmas(overrides):
+    """
+    以降に開く接続の PRAGMA を上書きする
+    Args:
+        overrides (dict | str): 上書きする PRAGMA（dict または "name=value;..." 形式）
+    """
+    if isinstance(overrides, str):
+        overrides = parse_pragmas(overrides)
+    overrides = {str(k).lower(): v for k, v in (overrides or {}).items()}
+    PRAGMAS.update(_validate_pragmas(overrides))
+
+# コネクションプールの大きさ
+POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("DATABASE_POOL_MAX_OVERFLOW", "10"))
+
+# 読み取り専用コネクションプールの大きさ（GET リクエスト用）
+READ_POOL_SIZE = int(os.getenv("DATABASE_READ_POOL_SIZE", "10"))
+READ_POOL_MAX_OVERFLOW = int(os.getenv("DATABASE_READ_POOL_MAX_OVERFLOW", "20"))
+
+# DB ファイルへの書き込みが必要なため、読み取り専用接続には適用しない PRAGMA
+_WRITE_PRAGMAS = ("journal_mode", "synchronous")
+
+_stats_lock = threading.Lock()
+_connections_opened = 0
+
+
+def connect(db_path=None, pragmas=None):
+    """
+    PRAGMA 設定済みの新しい sqlite3 接続を作成する
+    SQLAlchemy エンジンのプールやチャット書き込みスレッドもこの関数で接続を作る。
+    Args:
+        db_path (str, optional): DBファイルのパス（省略時は DB_PATH）
+        pragmas (dict, optional): 適用する PRAGMA（省略時は PRAGMAS）
+    Returns:
+        sqlite3.Connection: DB接続
+    """
+    global _connections_opened
+    path = db_path or DB_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, factory=TimedConnection)
+    applied = PRAGMAS if pragmas is None else _validate_pragmas(dict(pragmas))
+    for name, value in applied.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    with _stats_lock:
+        _connections_opened += 1
+    return conn
+
+
+def readonly_uri(db_path=None):
+    """
+    DBファイルを読み取り専用（mode=ro）で開く URI を返す（sqlite3.connect(..., uri=True) に渡す）
+    """
+    return f"file:{pathname2url(db_path or DB_PATH)}?mode=ro"
+
+
+def readonly_pragma_statements():
+    """
+    読み取り専用接続を開いた直後に実行する PRAGMA 文（書き込みが必要なものを除き、query_only を有効にする）
+    """
+    statements = [f"PRAGMA {name} = {value}" for name, value in PRAGMAS.items() if name not in _WRITE_PRAGMAS]
+    statements.append("PRAGMA query_only = ON")
+    return statements
+
+
+def connect_readonly(db_path=None):
+    """
+    読み取り専用の sqlite3 接続を作成する（mode=ro の URI で開き、query_only を有効にする）
+    WAL モードでは書き込み中でも読み取りを並行して行える。
+    Args:
+        db_path (str, optional): DBファイルのパス（省略時は DB_PATH）
+    Returns:
+        sqlite3.Connection: 読み取り専用のDB接続
+    """
+    global _connections_opened
+    conn = sqlite3.connect(readonly_uri(db_path), uri=True, check_same_thread=False, factory=TimedConnection)
+    for sql in readonly_pragma_statements():
+        conn.execute(sql)
+    with _stats_lock:
+        _connections_opened += 1
+    return conn
+
+
+def connections_opened():
+    """
+    プロセス起動以降に connect() で開いた接続数を返す
+    """
+    return _connections_opened
+
+
+def init_app(app):
+    """
+    Flask アプリに共通DB設定を組み込む
+    app.config["SQLITE_PRAGMAS"] があれば PRAGMA の既定値を上書きする。
+    SQLAlchemy のエンジンを connect() で接続を作るプールとして構成し、
+    読み取り専用プールを別のバインド (READONLY_BIND) として追加する
+    （app.config["DATABASE_READONLY_POOL"] = False で GET も通常のプールを使う）。
+    リクエスト終了時に生 sqlite3 接続をプールへ返す teardown を登録する。
+    """
+    path = app.config.setdefault("DATABASE_PATH", DB_PATH)
+    configure_pragmas(app.config.get("SQLITE_PRAGMAS"))
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    app.config.setdefault("SQLALCHEMY_TRACK_MODIFICATIONS", False)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "creator": lambda: connect(path),
+        "pool_size": POOL_SIZE,
+        "max_overflow": POOL_MAX_OVERFLOW,
+    }
+    app.config.setdefault("DATABASE_READONLY_POOL", True)
+    app.config.setdefault("SQLALCHEMY_BINDS", {})[READONLY_BIND] = {
+        "url": f"sqlite:///{path}",
+        "creator": lambda: connect_readonly(path),
+        "pool_size": app.config.get("DATABASE_READ_POOL_SIZE", READ_POOL_SIZE),
+        "max_overflow": app.config.get("DATABASE_READ_POOL_MAX_OVERFLOW", READ_POOL_MAX_OVERFLOW),
+    }
+    db.init_app(app)
+    app.teardown_appcontext(close_db)
+
+
+def get_db(readonly=None):
+    """
+    リクエスト単位の sqlite3 接続を取得する
+    SQLAlchemy エンジンのプールから借りた接続を flask.g に保持し、
+    同じリクエスト内では同じ接続を返す。
+    GET などの読み取りリクエストでは読み取り専用プールの接続を返す。
+    Args:
+        readonly (bool, optional): True で読み取り専用、False で書き込み可能な接続を使う
+            （省略時はリクエストのメソッドで決める）
+    Returns:
+        sqlite3.Connection: DB接続（row_factory = sqlite3.Row）
+    """
+    if readonly is None:
+        readonly = use_readonly_pool()
+    key = "db_readonly" if readonly else "db"
+    if key not in g:
+        engine = db.engines[READONLY_BIND] if readonly else db.engine
+        pooled = engine.raw_connection()
+        conn = pooled.driver_connection
+        conn.row_factory = sqlite3.Row
+        g.setdefault("_db_pooled", []).append(pooled)
+        setattr(g, key, conn)
+    return g.get(key)
+
+
+def close_db(e=None):
+    """
+    リクエスト終了時に sqlite3 接続をプールへ返す
+    未コミットの変更はプール返却時にロールバックされる。
+    """
+    g.pop("db", None)
+    g.pop("db_readonly", None)
+    for pooled in g.pop("_db_pooled", []):
+        pooled.driver_connection.row_factory = None
+        pooled.close()
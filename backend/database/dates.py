@@ -0,0 +1,89 @@
+# backend/database/dates.py
+"""
+日付の保存形式（1970-01-01 からの通し日数）
+tags.date・chat_messages.date は 'YYYY-MM-DD' の文字列ではなく、INTEGER の通し日数（day number）で保存する。
+- 1〜3 バイトの整数になり、行・索引が小さくなる。月単位などの範囲検索は整数の比較だけで索引を使える
+- API との受け渡しはこれまでどおり 'YYYY-MM-DD'。入口（ルート）で normalize_date() で検証・正規化し、
+  DB に書く・条件に使うときに to_day()、読み出したときに from_day() で変換する
+- SQLite の中では date(day * 86400, 'unixepoch') で 'YYYY-MM-DD' に戻せる
+"""
+
+import datetime
+import re
+import unicodedata
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# 区切りは - / . を、月日は1桁も受け付ける（全角数字は NFKC で半角にする）
+_DATE = re.compile(r"^([0-9]{4})[-/.]([0-9]{1,2})[-/.]([0-9]{1,2})$")
+_MONTH = re.compile(r"^([0-9]{4})-([0-9]{2})$")
+
+
+def parse_date(value):
+    """
+    日付を datetime.date にする
+    Args:
+        value (str | datetime.date): 'YYYY-MM-DD'（'YYYY/M/D' なども可）または日付
+    Raises:
+        ValueError: 形式が違う・存在しない日付
+    """
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    match = _DATE.match(unicodedata.normalize("NFKC", value).strip()) if isinstance(value, str) else None
+    if not match:
+        raise ValueError(f"日付の形式が不正です: {value!r}")
+    return datetime.date(*(int(part) for part in match.groups()))
+
+
+def normalize_date(value):
+    """
+    'YYYY-MM-DD' に正規化した日付を返す（形式が違う・存在しない日付なら None）
+    """
+    try:
+        return parse_date(value).isoformat()
+    except ValueError:
+        return None
+
+
+def to_day(value):
+    """
+    日付を通し日数にする（DB に書く・条件に使う値）
+    Raises:
+        ValueError: 形式が違う・存在しない日付
+    """
+    return parse_date(value).toordinal() - _EPOCH_ORDINAL
+
+
+def from_day(day):
+    """
+    通し日数を 'YYYY-MM-DD' にする（None はそのまま）
+    """
+    if day is None:
+        return None
+    return datetime.date.fromordinal(day + _EPOCH_ORDINAL).isoformat()
+
+
+def month_of_day(day):
+    """
+    通し日数の月（'YYYY-MM'）を返す
+    """
+    return from_day(day)[:7]
+
+
+def month_range(month):
+    """
+    月（'YYYY-MM'）の範囲を通し日数の半開区間で返す
+    Returns:
+        tuple[int, int]: (月初の日, 翌月初の日)。条件は first <= date < next_first
+    Raises:
+        ValueError: 形式が違う
+    """
+    match = _MONTH.match(month or "")
+    if not match:
+        raise ValueError(f"月の形式が不正です: {month!r}")
+    year, mon = (int(part) for part in match.groups())
+    first = datetime.date(year, mon, 1)
+    next_first = datetime.date(year + mon // 12, mon % 12 + 1, 1)
+    return to_day(first), to_day(next_first)
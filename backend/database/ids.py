@@ -0,0 +1,44 @@
+# backend/database/ids.py
+"""
+時刻順の ID（UUIDv7）
+タグ・チャット・テンプレートタグの ID はこれまで uuid4（完全にランダム）だったため、
+ID の一意索引への挿入が B-tree のあちこちに散らばり、件数が増えるとページ分割とキャッシュミスで遅くなる。
+UUIDv7 は先頭 48 ビットがミリ秒の時刻なので、新しい ID は索引の末尾に追加される。
+文字列の形（uuid4 と同じ 32 桁の hex / ハイフン付き 36 文字）は変わらないため、クライアントからは区別できない。
+
+- 同じミリ秒の中では 12 ビットのカウンタ（rand_a）で単調増加にする（プロセス内）
+- 残りの 62 ビットは乱数
+"""
+
+import secrets
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7():
+    """
+    UUIDv7（RFC 9562）を返す
+    Returns:
+        uuid.UUID
+    """
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            # 同じミリ秒に続けて作れるよう、カウンタの初期値は上位ビットを空けておく
+            _counter = secrets.randbits(11)
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                # カウンタを使い切ったら次のミリ秒に進める
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+    value = (ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | secrets.randbits(62)
+    return uuid.UUID(int=value)
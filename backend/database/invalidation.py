@@ -0,0 +1,277 @@
+# backend/database/invalidation.py
+"""
+プロセス間のキャッシュ無効化（外部サービスを使わない変更ログ方式）
+gunicorn などで複数ワーカーを動かすと、プロセス内キャッシュは他のワーカーの書き込みを知らない。
+同じ SQLite ファイルの cache_changes テーブルを変更ログにして、各プロセスのキャッシュを揃える。
+
+- 書き込み側: COMMIT した後に bus.publish(トピック, キー) を呼ぶ。自プロセスのキャッシュはその場で消し、
+  cache_changes に1行追記する
+- 読み取り側: InvalidatedCache.get() のたびに bus.poll() を呼ぶ。前回の確認から
+  CACHE_INVALIDATION_INTERVAL_MS（既定 500ms）経っていれば PRAGMA data_version を見て、
+  他の接続が COMMIT していたら seq の続きから変更ログを読み、該当キーを消す
+  → 他プロセスの書き込みが見えるまでの遅れは最大で「確認間隔 + 変更ログ1回分の読み取り」
+- 変更ログは CACHE_CHANGES_RETENTION_SECONDS（既定 1 時間）より古い行を書き込み側が削除する。
+  削除された範囲まで読み遅れたプロセス（seq が飛んだ場合）や、変更ログを読めないときはキャッシュを全て消す
+
+設定（app.config、未指定なら環境変数）:
+- CACHE_ENABLED: プロセス内キャッシュを使うか（既定: 有効。無効なら毎回 DB を読む）
+- CACHE_INVALIDATION_INTERVAL_MS: 変更ログを確認する間隔（0 なら参照のたびに確認する）
+- CACHE_CHANGES_RETENTION_SECONDS: 変更ログを残す秒数
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from database.connection import DB_PATH, connect, connect_readonly
+from monitoring.metrics import record_cache, record_cache_invalidation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENABLED = os.getenv("CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+DEFAULT_INTERVAL_MS = float(os.getenv("CACHE_INVALIDATION_INTERVAL_MS", "500"))
+DEFAULT_RETENTION = float(os.getenv("CACHE_CHANGES_RETENTION_SECONDS", "3600"))
+# 何回の publish ごとに古い変更ログを削除するか
+PRUNE_EVERY = 256
+DEFAULT_MAXSIZE = 1024
+
+
+class InvalidationBus:
+    """
+    変更ログ（cache_changes）を介してプロセス内キャッシュの無効化を配る
+    接続はプロセスごとに開く（fork 後のワーカーでは最初の呼び出しで開き直す）。
+    """
+
+    def __init__(self, db_path=None, interval_ms=DEFAULT_INTERVAL_MS, retention=DEFAULT_RETENTION,
+                 enabled=DEFAULT_ENABLED):
+        """
+        Args:
+            db_path (str, optional): 変更ログを置く DB ファイル（省略時は DB_PATH）
+            interval_ms (float): 変更ログを確認する間隔（ミリ秒）
+            retention (float): 変更ログを残す秒数
+            enabled (bool): キャッシュを使うか
+        """
+        self.db_path = db_path or DB_PATH
+        self.interval = interval_ms / 1000
+        self.retention = retention
+        self.enabled = enabled
+        # 変更ログを読めているか（読めない間はキャッシュを使わない）
+        self.available = True
+        self._caches = []
+        self._lock = threading.Lock()
+        self._pid = None
+        self._reader = None
+        self._writer = None
+        self._last_seq = None
+        self._data_version = None
+        self._next_poll = 0.0
+        self._own_seqs = set()
+        self._published = 0
+
+    def register(self, cache):
+        self._caches.append(cache)
+
+    def reset(self, db_path=None):
+        """
+        DB を切り替える（init_app・計測用）。開いている接続を閉じ、すべてのキャッシュを消す
+        """
+        with self._lock:
+            self._close()
+            if db_path:
+                self.db_path = db_path
+            self._last_seq = None
+            self._next_poll = 0.0
+            self.available = True
+        self._flush("flush")
+
+    def _close(self):
+        if self._pid == os.getpid():
+            for conn in (self._reader, self._writer):
+                if conn is not None:
+                    conn.close()
+        self._reader = self._writer = None
+        self._pid = None
+
+    def _ensure_connections(self):
+        # self._lock を持った状態で呼ぶ
+        if self._pid == os.getpid():
+            return
+        self._reader = self._writer = None
+        self._own_seqs = set()
+        self._reader = connect_readonly(self.db_path)
+        self._writer = connect(self.db_path)
+        self._data_version = self._reader.execute("PRAGMA data_version").fetchone()[0]
+        if self._last_seq is None:
+            # 起動時点のキャッシュは空なので、それまでの変更ログは読まなくてよい
+            self._last_seq = self._reader.execute("SELECT COALESCE(MAX(seq), 0) FROM cache_changes").fetchone()[0]
+        self._pid = os.getpid()
+
+    def publish(self, topic, key=None):
+        """
+        書き込みを COMMIT した後に呼ぶ。自プロセスのキャッシュを消し、他プロセスへ変更ログで伝える
+        Args:
+            topic (str): 変更されたデータの種類（"community" など）
+            key (str, optional): 変更されたキー（省略時はトピック全体）
+        """
+        if not self.enabled:
+            return
+        self._dispatch(topic, key, "local")
+        now = time.time()
+        with self._lock:
+            try:
+                self._ensure_connections()
+                cursor = self._writer.execute(
+                    "INSERT INTO cache_changes (topic, key, created_at) VALUES (?, ?, ?)",
+                    (topic, None if key is None else str(key), now)
+                )
+                self._writer.commit()
+                self._own_seqs.add(cursor.lastrowid)
+                self._published += 1
+                if self._published % PRUNE_EVERY == 0:
+                    self._writer.execute("DELETE FROM cache_changes WHERE created_at < ?", (now - self.retention,))
+                    self._writer.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ キャッシュ無効化の変更ログを書き込めませんでした: {topic}={key}, {e}")
+                if self._writer is not None:
+                    self._writer.rollback()
+
+    def poll(self):
+        """
+        前回から確認間隔が過ぎていれば、他プロセスの変更ログを読んでキャッシュを消す
+        """
+        if time.monotonic() < self._next_poll:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_poll:
+                return
+            self._next_poll = now + self.interval
+            try:
+                self._ensure_connections()
+                version = self._reader.execute("PRAGMA data_version").fetchone()[0]
+                if version == self._data_version and self.available:
+                    return
+                self._data_version = version
+                rows = self._reader.execute(
+                    "SELECT seq, topic, key FROM cache_changes WHERE seq > ? ORDER BY seq", (self._last_seq,)
+                ).fetchall()
+            except sqlite3.Error as e:
+                if self.available:
+                    logger.warning(f"⚠️ キャッシュ無効化の変更ログを読めないため、キャッシュを使わずに処理します: {e}")
+                self.available = False
+                self._close()
+                rows = None
+            else:
+                self.available = True
+                # 読み遅れて削除済みの範囲を飛ばしたら、どのキーが変わったか分からない
+                gap = bool(rows) and rows[0][0] != self._last_seq + 1
+                if rows:
+                    self._last_seq = rows[-1][0]
+        if rows is None or gap:
+            self._flush("flush")
+            return
+        for seq, topic, key in rows:
+            if seq in self._own_seqs:
+                self._own_seqs.discard(seq)
+                continue
+            self._dispatch(topic, key, "remote")
+
+    def _dispatch(self, topic, key, source):
+        for cache in self._caches:
+            if topic in cache.topics:
+                cache.invalidate(key, source)
+            elif topic in cache.clear_on:
+                cache.invalidate(None, source)
+
+    def _flush(self, source):
+        for cache in self._caches:
+            cache.invalidate(None, source)
+
+
+# アプリ全体で共有するバス
+bus = InvalidationBus()
+
+
+class InvalidatedCache:
+    """
+    バスの無効化に従うプロセス内キャッシュ（件数上限付き、最も古く使われたものから捨てる）
+    topics のトピックはキー単位で、clear_on のトピックはキャッシュ全体を消す。
+    """
+
+    def __init__(self, name, topics=(), clear_on=(), maxsize=DEFAULT_MAXSIZE, bus=bus):
+        """
+        Args:
+            name (str): キャッシュ名（メトリクスのラベル）
+            topics (tuple[str]): キー単位で無効化するトピック
+            clear_on (tuple[str]): 全体を消すトピック
+            maxsize (int): 保持する件数の上限
+            bus (InvalidationBus): 購読するバス
+        """
+        self.name = name
+        self.topics = frozenset(topics)
+        self.clear_on = frozenset(clear_on)
+        self.maxsize = maxsize
+        self.bus = bus
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # 無効化のたびに進める。読み込み中に無効化されたら、読み込んだ値は古い可能性があるので保存しない
+        self._generation = 0
+        bus.register(self)
+
+    def get(self, key, loader):
+        """
+        key の値を返す。無いときは loader() で読み込んで保存する（None も保存する）
+        Args:
+            key (str): キー（無効化の通知と同じ文字列）
+            loader (callable): DB から読み込む関数
+        """
+        if not self.bus.enabled:
+            return loader()
+        self.bus.poll()
+        if not self.bus.available:
+            return loader()
+        key = str(key)
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                value = self._data[key]
+                hit = True
+            else:
+                generation = self._generation
+                hit = False
+        record_cache(self.name, hit)
+        if hit:
+            return value
+
+        value = loader()
+        with self._lock:
+            if generation == self._generation:
+                self._data[key] = value
+                if len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return value
+
+    def invalidate(self, key=None, source="local"):
+        """
+        key（省略時は全体）を消す
+        """
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(str(key), None)
+        record_cache_invalidation(self.name, source)
+
+
+def init_app(app):
+    """
+    app.config（未指定なら環境変数）の設定をバスに反映し、app の DB に向け直す
+    """
+    bus.enabled = app.config.setdefault("CACHE_ENABLED", DEFAULT_ENABLED)
+    bus.interval = float(app.config.setdefault("CACHE_INVALIDATION_INTERVAL_MS", DEFAULT_INTERVAL_MS)) / 1000
+    bus.retention = float(app.config.setdefault("CACHE_CHANGES_RETENTION_SECONDS", DEFAULT_RETENTION))
+    bus.reset(app.config["DATABASE_PATH"])
@@ -0,0 +1,173 @@
+"""
+スキーマのバージョン管理（マイグレーション）
+database/migrations/ の vNNNN_<名前>.py を番号順に適用し、
+適用済みの番号を schema_version テーブルに記録する。
+各マイグレーションは upgrade(db) を持ち、1本ずつ BEGIN IMMEDIATE の
+トランザクションで適用される（途中で失敗した場合はその1本だけロールバックされる）。
+マイグレーションはアプリのモジュールを import せず、書いた時点の SQL・変換関数を自身の中に持つ
+（後からモジュールを変えても、新しい DB に適用される内容が変わらないようにする）。
+
+テーブル作成はリクエスト処理や import 時には行わず、次のどちらかで一度だけ実行する。
+    python -m database.migrate            # 未適用のマイグレーションを適用
+    python -m database.migrate --status   # 適用状況を表示
+    flask --app app migrate               # Flask CLI から適用
+起動時の自動適用は app.config["AUTO_MIGRATE"]（環境変数 DATABASE_AUTO_MIGRATE）で切り替える。
+
+大きな既存DBへの索引追加は、WAL モードのため実行中も読み取りは止まらない
+（書き込みは CREATE INDEX の間だけ待たされる）。
+"""
+
+import argparse
+import datetime
+import importlib
+import json
+import logging
+import os
+import pkgutil
+import re
+import sys
+
+from database.connection import DB_PATH, connect
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_PACKAGE = "database.migrations"
+
+_MIGRATION_NAME = re.compile(r"^v(\d{4})_(\w+)$")
+
+CREATE_SCHEMA_VERSION_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT NOT NULL
+    )
+"""
+
+
+def discover_migrations():
+    """
+    マイグレーションを番号順に列挙する
+    Returns:
+        list[tuple[int, str, module]]: (番号, 名前, モジュール)
+    """
+    package = importlib.import_module(MIGRATIONS_PACKAGE)
+    migrations = []
+    for info in pkgutil.iter_modules(package.__path__):
+        match = _MIGRATION_NAME.match(info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{MIGRATIONS_PACKAGE}.{info.name}")
+        migrations.append((int(match.group(1)), match.group(2), module))
+    migrations.sort(key=lambda m: m[0])
+    versions = [m[0] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"マイグレーション番号が重複しています: {versions}")
+    return migrations
+
+
+def applied_versions(db):
+    """
+    適用済みのマイグレーション番号を返す
+    """
+    db.execute(CREATE_SCHEMA_VERSION_SQL)
+    return {row[0] for row in db.execute("SELECT version FROM schema_version")}
+
+
+def migrate(db_path=None, target=None):
+    """
+    未適用のマイグレーションを番号順に適用する
+    複数ワーカーが同時に起動しても、書き込みロックを取ってから適用済みかを確認するため
+    同じマイグレーションが二重に適用されることはない。
+    Args:
+        db_path (str, optional): DBファイルのパス（省略時は DB_PATH）
+        target (int, optional): ここまでの番号を適用する（省略時は最新まで）
+    Returns:
+        list[int]: 今回適用したマイグレーション番号
+    """
+    db = connect(db_path or DB_PATH)
+    # BEGIN / COMMIT を自前で発行する
+    db.isolation_level = None
+    applied = []
+    try:
+        done = applied_versions(db)
+        for version, name, module in discover_migrations():
+            if target is not None and version > target:
+                break
+            if version in done:
+                continue
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                if db.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone():
+                    db.execute("ROLLBACK")
+                    continue
+                module.upgrade(db)
+                db.execute(
+                    "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                    (version, name, datetime.datetime.now().isoformat(timespec="seconds"))
+                )
+                db.execute("COMMIT")
+            except Exception as e:
+                if db.in_transaction:
+                    db.execute("ROLLBACK")
+                logger.error(f"❌ マイグレーション v{version:04d}_{name} の適用に失敗: {e}")
+                raise
+            logger.info(f"✅ マイグレーション v{version:04d}_{name} を適用しました")
+            applied.append(version)
+    finally:
+        db.close()
+    return applied
+
+
+def status(db_path=None):
+    """
+    マイグレーションの適用状況を返す
+    Returns:
+        list[dict]: version, name, applied を持つ一覧
+    """
+    db = connect(db_path or DB_PATH)
+    try:
+        done = applied_versions(db)
+        db.commit()
+    finally:
+        db.close()
+    return [
+        {"version": version, "name": name, "applied": version in done}
+        for version, name, _ in discover_migrations()
+    ]
+
+
+def init_app(app):
+    """
+    Flask アプリに migrate コマンドを登録し、AUTO_MIGRATE が有効なら起動時に適用する
+    """
+    auto = app.config.setdefault(
+        "AUTO_MIGRATE", os.getenv("DATABASE_AUTO_MIGRATE", "1").lower() in ("1", "true", "yes")
+    )
+
+    @app.cli.command("migrate")
+    def migrate_command():
+        """未適用のスキーママイグレーションを適用する"""
+        applied = migrate(app.config["DATABASE_PATH"])
+        print(f"applied: {applied}" if applied else "up to date")
+
+    if auto:
+        migrate(app.config["DATABASE_PATH"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="スキーママイグレーションを適用する")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--target", type=int, default=None, help="ここまでの番号を適用する")
+    parser.add_argument("--status", action="store_true", help="適用状況だけを表示する")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.status:
+        json.dump(status(args.db), sys.stdout, indent=2)
+    else:
+        json.dump({"applied": migrate(args.db, args.target)}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# backend/database/migrations/__init__.py
+# スキーママイグレーション（vNNNN_<名前>.py を番号順に適用する。実行は database/migrate.py）
@@ -0,0 +1,102 @@
+"""
+初期スキーマ
+これまで app.py の db.create_all()、C9 の init_db()、C8 の UserDataManagement が
+それぞれ作っていたテーブルをまとめて作成する。
+既存DBではテーブルがすでにあるため何も変わらない。
+"""
+
+STATEMENTS = [
+    # app.py の Message モデル
+    """
+    CREATE TABLE IF NOT EXISTS message (
+        id INTEGER NOT NULL,
+        text VARCHAR(120) NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    # C7 カレンダー情報管理部の Tag モデル
+    """
+    CREATE TABLE IF NOT EXISTS tags (
+        id VARCHAR(50) NOT NULL,
+        name VARCHAR(100) NOT NULL,
+        color VARCHAR(6) NOT NULL,
+        submitter_id VARCHAR(100) NOT NULL,
+        community_id VARCHAR(100) NOT NULL,
+        date VARCHAR(100) NOT NULL,
+        notified BOOLEAN NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE (id)
+    )
+    """,
+    # C8 ユーザ情報管理部 F1 ユーザ情報 / F2 ユーザ認証情報
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id TEXT PRIMARY KEY,
+        user_name TEXT NOT NULL,
+        email TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL,
+        profile_image TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_auth (
+        user_id TEXT NOT NULL,
+        sid TEXT PRIMARY KEY,
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+    )
+    """,
+    # C9 コミュニティ情報管理部
+    """
+    CREATE TABLE IF NOT EXISTS communities (
+        id TEXT PRIMARY KEY,
+        name TEXT UNIQUE NOT NULL,
+        image_path TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS template_tags (
+        id TEXT PRIMARY KEY,
+        community_id TEXT NOT NULL,
+        tag TEXT NOT NULL,
+        color_code TEXT NOT NULL,
+        FOREIGN KEY (community_id) REFERENCES communities(id),
+        UNIQUE (community_id, tag)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS members (
+        id TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        community_id TEXT NOT NULL,
+        FOREIGN KEY (community_id) REFERENCES communities(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS chat_messages (
+        id TEXT PRIMARY KEY,
+        community_id TEXT NOT NULL,
+        tag_id TEXT NOT NULL,
+        date TEXT NOT NULL,
+        sender_id TEXT NOT NULL,
+        sender_name TEXT NOT NULL,
+        message_content TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        FOREIGN KEY (community_id) REFERENCES communities(id),
+        FOREIGN KEY (tag_id) REFERENCES template_tags(id)
+    )
+    """,
+    # app.py が初回リクエスト時に入れていたサンプルメッセージ
+    """
+    INSERT INTO message (text)
+    SELECT text FROM (
+        SELECT 'Hello from Flask!' AS text
+        UNION ALL SELECT 'SQLite と React のサンプルです！'
+    )
+    WHERE NOT EXISTS (SELECT 1 FROM message)
+    """,
+]
+
+
+def upgrade(db):
+    for sql in STATEMENTS:
+        db.execute(sql)
@@ -0,0 +1,19 @@
+"""
+C9 チャット履歴アーカイブ用テーブル（コミュニティ・月単位の圧縮 BLOB）
+"""
+
+CREATE_ARCHIVE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS chat_archives (
+        community_id TEXT NOT NULL,
+        month TEXT NOT NULL,
+        codec TEXT NOT NULL,
+        message_count INTEGER NOT NULL,
+        raw_bytes INTEGER NOT NULL,
+        data BLOB NOT NULL,
+        PRIMARY KEY (community_id, month)
+    )
+"""
+
+
+def upgrade(db):
+    db.execute(CREATE_ARCHIVE_TABLE_SQL)
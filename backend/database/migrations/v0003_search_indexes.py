@@ -0,0 +1,88 @@
+"""
+C9 コミュニティ名・チャット本文の全文検索インデックス（FTS5 trigram）
+同期用トリガを作成し、既存データで索引を構築する。
+FTS5 / trigram が使えない SQLite では警告のみ出して作成しない
+（コミュニティ検索は LIKE にフォールバックする）。
+"""
+
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+CREATE_SEARCH_INDEX_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS communities_fts USING fts5(
+        name,
+        content='communities',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS communities_fts_ai AFTER INSERT ON communities BEGIN
+        INSERT INTO communities_fts (rowid, name) VALUES (new.rowid, new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS communities_fts_ad AFTER DELETE ON communities BEGIN
+        INSERT INTO communities_fts (communities_fts, rowid, name) VALUES ('delete', old.rowid, old.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS communities_fts_au AFTER UPDATE OF name ON communities BEGIN
+        INSERT INTO communities_fts (communities_fts, rowid, name) VALUES ('delete', old.rowid, old.name);
+        INSERT INTO communities_fts (rowid, name) VALUES (new.rowid, new.name);
+    END
+    """,
+]
+
+# community_id も索引対象の列にし、MATCH の中でコミュニティを絞り込む。
+# UNINDEXED 列で後から絞り込むと全コミュニティの一致行を読むことになるため。
+CREATE_CHAT_SEARCH_INDEX_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5(
+        message_content,
+        community_id,
+        content='chat_messages',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ai AFTER INSERT ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (rowid, message_content, community_id)
+        VALUES (new.rowid, new.message_content, new.community_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ad AFTER DELETE ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (chat_messages_fts, rowid, message_content, community_id)
+        VALUES ('delete', old.rowid, old.message_content, old.community_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_au AFTER UPDATE OF message_content, community_id ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (chat_messages_fts, rowid, message_content, community_id)
+        VALUES ('delete', old.rowid, old.message_content, old.community_id);
+        INSERT INTO chat_messages_fts (rowid, message_content, community_id)
+        VALUES (new.rowid, new.message_content, new.community_id);
+    END
+    """,
+]
+
+INDEXES = [
+    ("communities_fts", CREATE_SEARCH_INDEX_SQL),
+    ("chat_messages_fts", CREATE_CHAT_SEARCH_INDEX_SQL),
+]
+
+
+def upgrade(db):
+    for table, statements in INDEXES:
+        db.execute(f"SAVEPOINT {table}")
+        try:
+            for sql in statements:
+                db.execute(sql)
+            db.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+        except sqlite3.OperationalError as e:
+            db.execute(f"ROLLBACK TO {table}")
+            logger.warning(f"⚠️ 検索インデックス {table} を作成できません: {e}")
+        db.execute(f"RELEASE {table}")
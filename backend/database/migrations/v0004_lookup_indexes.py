@@ -0,0 +1,18 @@
+"""
+よく使う検索条件の索引
+- chat_messages: スレッド（コミュニティ・タグ・日付）単位の履歴取得、タイムスタンプ順
+- tags: コミュニティ・日付単位のタグ一覧、マッチング
+- members: ユーザの所属コミュニティ一覧、コミュニティのメンバー一覧
+"""
+
+STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS idx_chat_messages_thread ON chat_messages (community_id, tag_id, date, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_tags_community_date ON tags (community_id, date)",
+    "CREATE INDEX IF NOT EXISTS idx_members_user ON members (user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_members_community ON members (community_id, user_id)",
+]
+
+
+def upgrade(db):
+    for sql in STATEMENTS:
+        db.execute(sql)
@@ -0,0 +1,22 @@
+"""
+キャッシュ無効化の変更ログ（database/invalidation.py）
+- cache_changes: 書き込んだプロセスが（トピック, キー）を追記し、他のプロセスが seq 順に読んで
+  自分のプロセス内キャッシュから該当キーを消す。古い行は書き込み側が定期的に削除する
+"""
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS cache_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        topic TEXT NOT NULL,
+        key TEXT,
+        created_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_cache_changes_created_at ON cache_changes (created_at)",
+]
+
+
+def upgrade(db):
+    for sql in STATEMENTS:
+        db.execute(sql)
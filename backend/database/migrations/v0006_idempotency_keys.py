@@ -0,0 +1,26 @@
+"""
+Idempotency-Key の保存先（common/idempotency.py）
+- idempotency_keys: (エンドポイント, キー) ごとに、最初のリクエストの内容の指紋と応答（ステータス・本文）を持つ。
+  status が NULL の行は処理中。expires_at を過ぎた行は使わず、書き込み側が定期的に削除する
+"""
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        scope TEXT NOT NULL,
+        key TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        status INTEGER,
+        body BLOB,
+        created_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (scope, key)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys (expires_at)",
+]
+
+
+def upgrade(db):
+    for sql in STATEMENTS:
+        db.execute(sql)
@@ -0,0 +1,89 @@
+"""
+タグ名の辞書（database/tag_names.py）
+- tag_names: (コミュニティID, 正規化した名前) → 整数ID。既存のテンプレートタグ、カレンダーのタグの順に登録する
+  （テンプレートタグの色を辞書の色にする）
+- template_tags.name_id: 辞書の ID
+- tags: name を name_id に置き換え、color は辞書の色と違う場合だけ残す（同じなら NULL）
+  テーブルを作り直し、マッチング用に (name_id, date) の索引を追加する
+"""
+
+import re
+import unicodedata
+
+_HEX_COLOR = re.compile(r"^#?([0-9a-fA-F]{6})$")
+
+
+def normalize_tag_name(name):
+    """
+    辞書のキーにする正規化した名前を返す（NFKC、空白を1つに、大文字小文字を区別しない）
+    """
+    return " ".join(unicodedata.normalize("NFKC", name or "").split()).casefold()
+
+
+def normalize_color(color):
+    """
+    "#RRGGBB" / "RRGGBB" を "rrggbb" にする（形式が違えば None）
+    """
+    match = _HEX_COLOR.match((color or "").strip())
+    return match.group(1).lower() if match else None
+
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS tag_names (
+        id INTEGER PRIMARY KEY,
+        community_id TEXT NOT NULL,
+        normalized TEXT NOT NULL,
+        name TEXT NOT NULL,
+        color TEXT,
+        UNIQUE (community_id, normalized)
+    )
+    """,
+    """
+    INSERT OR IGNORE INTO tag_names (community_id, normalized, name, color)
+    SELECT community_id, normalize_tag_name(tag), trim(tag), normalize_color(color_code)
+    FROM template_tags ORDER BY rowid
+    """,
+    """
+    INSERT OR IGNORE INTO tag_names (community_id, normalized, name, color)
+    SELECT community_id, normalize_tag_name(name), trim(name), normalize_color(color)
+    FROM tags ORDER BY rowid
+    """,
+    "ALTER TABLE template_tags ADD COLUMN name_id INTEGER REFERENCES tag_names(id)",
+    """
+    UPDATE template_tags SET name_id = (
+        SELECT n.id FROM tag_names n
+        WHERE n.community_id = template_tags.community_id AND n.normalized = normalize_tag_name(template_tags.tag)
+    )
+    """,
+    """
+    CREATE TABLE tags_new (
+        id VARCHAR(50) NOT NULL PRIMARY KEY,
+        name_id INTEGER NOT NULL REFERENCES tag_names(id),
+        color VARCHAR(6),
+        submitter_id VARCHAR(100) NOT NULL,
+        community_id VARCHAR(100) NOT NULL,
+        date VARCHAR(100) NOT NULL,
+        notified BOOLEAN NOT NULL
+    )
+    """,
+    """
+    INSERT INTO tags_new (id, name_id, color, submitter_id, community_id, date, notified)
+    SELECT t.id, n.id, CASE WHEN normalize_color(t.color) IS n.color THEN NULL ELSE t.color END,
+           t.submitter_id, t.community_id, t.date, t.notified
+    FROM tags t
+    JOIN tag_names n ON n.community_id = t.community_id AND n.normalized = normalize_tag_name(t.name)
+    """,
+    "DROP TABLE tags",
+    "ALTER TABLE tags_new RENAME TO tags",
+    "CREATE INDEX IF NOT EXISTS idx_tags_community_date ON tags (community_id, date)",
+    "CREATE INDEX IF NOT EXISTS idx_tags_name_date ON tags (name_id, date)",
+    "CREATE INDEX IF NOT EXISTS idx_template_tags_name ON template_tags (name_id)",
+]
+
+
+def upgrade(db):
+    db.create_function("normalize_tag_name", 1, normalize_tag_name, deterministic=True)
+    db.create_function("normalize_color", 1, normalize_color, deterministic=True)
+    for sql in STATEMENTS:
+        db.execute(sql)
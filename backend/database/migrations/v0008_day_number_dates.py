@@ -0,0 +1,121 @@
+"""
+tags.date・chat_messages.date を 'YYYY-MM-DD' の文字列から通し日数（INTEGER、database/dates.py）にする
+- 既存の値は database.dates.to_day と同じ規則で変換する（'2025/6/1' など表記が揃っていない値も同じ日にまとまる）
+- 日付として読めない行は tags_invalid_dates / chat_messages_invalid_dates にそのまま移して残す
+  （どの日のカレンダー・スレッドにも出ない行だったため、アプリからは見えなくなるだけ）
+- 列には CHECK (typeof(date) = 'integer') を付け、文字列の日付が書き込まれないようにする
+- テーブルを作り直すため、索引と全文検索（chat_messages_fts）の同期トリガを作り直す。
+  chat_messages は rowid を引き継ぐので、全文検索の索引は作り直さなくてよい
+"""
+
+import datetime
+import re
+import unicodedata
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# 区切りは - / . を、月日は1桁も受け付ける（全角数字は NFKC で半角にする）
+_DATE = re.compile(r"^([0-9]{4})[-/.]([0-9]{1,2})[-/.]([0-9]{1,2})$")
+
+# 全文検索（chat_messages_fts、v0003）の同期トリガ
+CHAT_SEARCH_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ai AFTER INSERT ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (rowid, message_content, community_id)
+        VALUES (new.rowid, new.message_content, new.community_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ad AFTER DELETE ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (chat_messages_fts, rowid, message_content, community_id)
+        VALUES ('delete', old.rowid, old.message_content, old.community_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_au AFTER UPDATE OF message_content, community_id ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (chat_messages_fts, rowid, message_content, community_id)
+        VALUES ('delete', old.rowid, old.message_content, old.community_id);
+        INSERT INTO chat_messages_fts (rowid, message_content, community_id)
+        VALUES (new.rowid, new.message_content, new.community_id);
+    END
+    """,
+]
+
+# (テーブル, 新しいテーブルの CREATE 文, 列の並び, 作り直す索引)
+TABLES = [
+    (
+        "tags",
+        """
+        CREATE TABLE tags_new (
+            id VARCHAR(50) NOT NULL PRIMARY KEY,
+            name_id INTEGER NOT NULL REFERENCES tag_names(id),
+            color VARCHAR(6),
+            submitter_id VARCHAR(100) NOT NULL,
+            community_id VARCHAR(100) NOT NULL,
+            date INTEGER NOT NULL CHECK (typeof(date) = 'integer'),
+            notified BOOLEAN NOT NULL
+        )
+        """,
+        "id, name_id, color, submitter_id, community_id, date, notified",
+        [
+            "CREATE INDEX IF NOT EXISTS idx_tags_community_date ON tags (community_id, date)",
+            "CREATE INDEX IF NOT EXISTS idx_tags_name_date ON tags (name_id, date)",
+        ],
+    ),
+    (
+        "chat_messages",
+        """
+        CREATE TABLE chat_messages_new (
+            id TEXT PRIMARY KEY,
+            community_id TEXT NOT NULL,
+            tag_id TEXT NOT NULL,
+            date INTEGER NOT NULL CHECK (typeof(date) = 'integer'),
+            sender_id TEXT NOT NULL,
+            sender_name TEXT NOT NULL,
+            message_content TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            FOREIGN KEY (community_id) REFERENCES communities(id),
+            FOREIGN KEY (tag_id) REFERENCES template_tags(id)
+        )
+        """,
+        "id, community_id, tag_id, date, sender_id, sender_name, message_content, timestamp",
+        [
+            "CREATE INDEX IF NOT EXISTS idx_chat_messages_thread ON chat_messages (community_id, tag_id, date, timestamp)",
+        ],
+    ),
+]
+
+
+def _day_or_null(value):
+    """
+    日付の文字列を通し日数にする（日付として読めなければ None）
+    """
+    match = _DATE.match(unicodedata.normalize("NFKC", value).strip()) if isinstance(value, str) else None
+    if not match:
+        return None
+    try:
+        return datetime.date(*(int(part) for part in match.groups())).toordinal() - _EPOCH_ORDINAL
+    except ValueError:
+        return None
+
+
+def upgrade(db):
+    db.create_function("to_day", 1, _day_or_null, deterministic=True)
+    for table, create_sql, columns, indexes in TABLES:
+        db.execute(f"CREATE TABLE {table}_invalid_dates AS SELECT * FROM {table} WHERE to_day(date) IS NULL")
+        # 削除トリガで全文検索の索引からも外れる
+        db.execute(f"DELETE FROM {table} WHERE to_day(date) IS NULL")
+        db.execute(create_sql)
+        db.execute(
+            f"INSERT INTO {table}_new (rowid, {columns}) "
+            f"SELECT rowid, {columns.replace('date', 'to_day(date)')} FROM {table} ORDER BY rowid"
+        )
+        db.execute(f"DROP TABLE {table}")
+        db.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        for sql in indexes:
+            db.execute(sql)
+
+    # v0003 で全文検索の索引を作れた DB だけ、同期トリガを作り直す
+    if db.execute("SELECT 1 FROM sqlite_master WHERE name = 'chat_messages_fts'").fetchone():
+        for sql in CHAT_SEARCH_TRIGGERS_SQL:
+            db.execute(sql)
@@ -0,0 +1,96 @@
+"""
+tags・chat_messages の主キーを INTEGER PRIMARY KEY（seq、rowid の別名）にする
+- API でやり取りする文字列の ID は id 列（UNIQUE）にそのまま残す（外部から見える ID は変わらない）
+- seq には今の rowid を入れる。chat_messages の全文検索索引（chat_messages_fts）は rowid で行を指すので作り直さなくてよい
+- rowid を明示的な列にしておくと VACUUM で rowid が振り直されない
+  （暗黙の rowid のままだと、VACUUM 後に全文検索索引の rowid と行がずれることがある）
+- 新しい ID は時刻順（UUIDv7、database/ids.py）で作るため、id の一意索引へは末尾に追加される
+テーブルを作り直すため、索引と全文検索の同期トリガを作り直す。
+"""
+
+# 全文検索（chat_messages_fts、v0003）の同期トリガ
+CHAT_SEARCH_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ai AFTER INSERT ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (rowid, message_content, community_id)
+        VALUES (new.rowid, new.message_content, new.community_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ad AFTER DELETE ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (chat_messages_fts, rowid, message_content, community_id)
+        VALUES ('delete', old.rowid, old.message_content, old.community_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_au AFTER UPDATE OF message_content, community_id ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts (chat_messages_fts, rowid, message_content, community_id)
+        VALUES ('delete', old.rowid, old.message_content, old.community_id);
+        INSERT INTO chat_messages_fts (rowid, message_content, community_id)
+        VALUES (new.rowid, new.message_content, new.community_id);
+    END
+    """,
+]
+
+# (テーブル, 新しいテーブルの CREATE 文, seq 以外の列, 作り直す索引)
+TABLES = [
+    (
+        "tags",
+        """
+        CREATE TABLE tags_new (
+            seq INTEGER PRIMARY KEY,
+            id VARCHAR(50) NOT NULL UNIQUE,
+            name_id INTEGER NOT NULL REFERENCES tag_names(id),
+            color VARCHAR(6),
+            submitter_id VARCHAR(100) NOT NULL,
+            community_id VARCHAR(100) NOT NULL,
+            date INTEGER NOT NULL CHECK (typeof(date) = 'integer'),
+            notified BOOLEAN NOT NULL
+        )
+        """,
+        "id, name_id, color, submitter_id, community_id, date, notified",
+        [
+            "CREATE INDEX IF NOT EXISTS idx_tags_community_date ON tags (community_id, date)",
+            "CREATE INDEX IF NOT EXISTS idx_tags_name_date ON tags (name_id, date)",
+        ],
+    ),
+    (
+        "chat_messages",
+        """
+        CREATE TABLE chat_messages_new (
+            seq INTEGER PRIMARY KEY,
+            id TEXT NOT NULL UNIQUE,
+            community_id TEXT NOT NULL,
+            tag_id TEXT NOT NULL,
+            date INTEGER NOT NULL CHECK (typeof(date) = 'integer'),
+            sender_id TEXT NOT NULL,
+            sender_name TEXT NOT NULL,
+            message_content TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            FOREIGN KEY (community_id) REFERENCES communities(id),
+            FOREIGN KEY (tag_id) REFERENCES template_tags(id)
+        )
+        """,
+        "id, community_id, tag_id, date, sender_id, sender_name, message_content, timestamp",
+        [
+            "CREATE INDEX IF NOT EXISTS idx_chat_messages_thread ON chat_messages (community_id, tag_id, date, timestamp)",
+        ],
+    ),
+]
+
+
+def upgrade(db):
+    for table, create_sql, columns, indexes in TABLES:
+        db.execute(create_sql)
+        db.execute(
+            f"INSERT INTO {table}_new (seq, {columns}) SELECT rowid, {columns} FROM {table} ORDER BY rowid"
+        )
+        db.execute(f"DROP TABLE {table}")
+        db.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        for sql in indexes:
+            db.execute(sql)
+
+    # v0003 で全文検索の索引を作れた DB だけ、同期トリガを作り直す
+    if db.execute("SELECT 1 FROM sqlite_master WHERE name = 'chat_messages_fts'").fetchone():
+        for sql in CHAT_SEARCH_TRIGGERS_SQL:
+            db.execute(sql)
@@ -0,0 +1,72 @@
+# backend/database/tag_names.py
+"""
+タグ名の辞書（tag_names）
+カレンダーのタグ・テンプレートタグの名前を (コミュニティID, 正規化した名前) ごとに1行にまとめ、
+整数の ID（name_id）で参照する。マッチングは文字列ではなく name_id の一致で判定する。
+- 正規化: NFKC（全角英数・半角カナなどを揃える）、前後の空白を除き連続する空白を1つに、大文字小文字を区別しない
+- name: 表示名（最初に登録された表記）
+- color: 既定の色（6桁の16進、# なし小文字）。テンプレートタグの色が変わるとこちらも変わる。
+  カレンダーのタグは、この色と違う色のときだけ自分の行に色を持つ
+
+SQL は sqlite3（名前付きパラメータ）と SQLAlchemy の text() のどちらでもそのまま使える。
+"""
+
+import re
+import unicodedata
+
+DEFAULT_COLOR = "000000"
+
+INSERT_SQL = (
+    "INSERT OR IGNORE INTO tag_names (community_id, normalized, name, color) "
+    "VALUES (:community_id, :normalized, :name, :color)"
+)
+SELECT_SQL = "SELECT id, color FROM tag_names WHERE community_id = :community_id AND normalized = :normalized"
+UPDATE_COLOR_SQL = (
+    "UPDATE tag_names SET color = :color WHERE community_id = :community_id AND normalized = :normalized"
+)
+
+_HEX_COLOR = re.compile(r"^#?([0-9a-fA-F]{6})$")
+
+
+def normalize_tag_name(name):
+    """
+    辞書のキーにする正規化した名前を返す
+    """
+    return " ".join(unicodedata.normalize("NFKC", name or "").split()).casefold()
+
+
+def normalize_color(color):
+    """
+    "#RRGGBB" / "RRGGBB" を "rrggbb" にする（形式が違えば None）
+    """
+    match = _HEX_COLOR.match((color or "").strip())
+    return match.group(1).lower() if match else None
+
+
+def tag_name_params(community_id, name, color=None):
+    return {
+        "community_id": community_id,
+        "normalized": normalize_tag_name(name),
+        "name": name.strip(),
+        "color": normalize_color(color),
+    }
+
+
+def intern_tag_name(db, community_id, name, color=None, update_color=False):
+    """
+    sqlite3 接続で辞書の行を取得する（無ければ作る）
+    呼び出し側のトランザクションの中で実行し、COMMIT は呼び出し側で行う。
+    Args:
+        db (sqlite3.Connection): DB接続
+        community_id (str): コミュニティID
+        name (str): タグ名
+        color (str, optional): 新しく作るときの色
+        update_color (bool): 既にある行の色も color に変える（テンプレートタグの登録・更新）
+    Returns:
+        int: name_id
+    """
+    params = tag_name_params(community_id, name, color)
+    db.execute(INSERT_SQL, params)
+    if update_color and params["color"]:
+        db.execute(UPDATE_COLOR_SQL, params)
+    return db.execute(SELECT_SQL, params).fetchone()[0]
@@ -1,4 +1,36 @@
 # backend/extensions.py
+from flask import current_app, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 
-db = SQLAlchemy()
+# 読み取り専用プールのバインド名と、読み取り専用プールを使う HTTP メソッド
+READONLY_BIND = "readonly"
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def use_readonly_pool():
+    """
+    現在のリクエストが読み取り専用プールを使うべきかを返す
+    """
+    return (
+        has_request_context()
+        and request.method in READ_METHODS
+        and current_app.config.get("DATABASE_READONLY_POOL", True)
+    )
+
+
+class RoutingSession(Session):
+    """
+    GET リクエスト中の読み取りを読み取り専用プールへ振り分けるセッション
+    flush（書き込み）は常に通常のプールを使う。
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and use_readonly_pool():
+            engine = self._db.engines.get(READONLY_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
@@ -9,6 +9,8 @@ import json
 import os
 import logging
 
+from common.service_client import service_client
+
 # ログ設定（開発用としてINFOレベルで設定）
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -66,11 +68,12 @@ class UserAuth:
     def __init__(
         self,
         password_hasher: PasswordHasher,
-        http_client: Any = requests
+        http_client: Any = service_client
     ):
         """
         UserAuth のコンストラクタ。
         パスワードハッシャー、HTTPクライアントのインスタンスを受け取る。
+        HTTPクライアントの既定は共通クライアント（タイムアウト・再試行・サーキットブレーカ付き）。
         """
         self.password_hasher = password_hasher
         self.http_client = http_client
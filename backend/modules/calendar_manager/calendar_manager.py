@@ -1,22 +1,89 @@
 # C10 カレンダー情報管理部 CalendarManagerクラス  担当: 角田一颯, 浅野勇翔
+from blinker import Namespace
+from sqlalchemy import Integer, select, text, update
+from sqlalchemy.types import TypeDecorator
+
+from database.dates import from_day, normalize_date, to_day
+from database.invalidation import InvalidatedCache, bus
+from database.tag_names import (
+    DEFAULT_COLOR, INSERT_SQL, SELECT_SQL, normalize_color, normalize_tag_name, tag_name_params,
+)
 from extentions import db
 import traceback
 
+_signals = Namespace()
+
+# タグが新しく保存されたときのイベント（受け取る側: C6 のバックグラウンドマッチング）
+# 受信関数は tag_added.connect(func) で登録し、func(sender, tag=<Tag.to_dict()>) で呼ばれる
+tag_added = _signals.signal("tag-added")
+
+# コミュニティ・日付ごとのタグ一覧のキャッシュ。キーは calendar_cache_key(community_id, date)
+# タグの色はテンプレートタグの色（辞書の色）に従うため、テンプレートタグが変わったら全体を消す
+calendar_tags_cache = InvalidatedCache("calendar_tags", topics=("calendar_tags",), clear_on=("template_tags",))
+
+
+def calendar_cache_key(community_id, date):
+    return f"{community_id}|{date}"
+
+
+class DayNumber(TypeDecorator):
+    """
+    日付の列（database/dates.py）
+    Python 側は 'YYYY-MM-DD'、DB には 1970-01-01 からの通し日数（INTEGER）で保存する
+    """
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_day(value)
+
+    def process_result_value(self, value, dialect):
+        return from_day(value)
+
+
+class TagName(db.Model):
+    """
+    タグ名の辞書（database/tag_names.py）
+    (コミュニティID, 正規化した名前) ごとに1行。タグはこの id（name_id）で名前を参照する
+    """
+    __tablename__ = 'tag_names'
+
+    id           = db.Column(db.Integer, primary_key=True)
+    community_id = db.Column(db.String(100), nullable=False)
+    normalized   = db.Column(db.String(100), nullable=False)
+    name         = db.Column(db.String(100), nullable=False)
+    color        = db.Column(db.String(6))
+
+
 class Tag(db.Model):
     """
     タグ情報を保持するデータベースモデル
     messages.db に保存されます
+    名前と既定の色はタグ名の辞書（TagName）から JOIN で読み込む
     """
     __tablename__ = 'tags'
 
-    id           = db.Column(db.String(50),  unique=True, primary_key=True)
-    name         = db.Column(db.String(100), nullable=False)
-    color        = db.Column(db.String(6),   nullable=False)
+    # 内部の主キー（rowid）。API でやり取りする ID は id（文字列）のまま
+    seq          = db.Column(db.Integer, primary_key=True)
+    id           = db.Column(db.String(50), unique=True, nullable=False)
+    name_id      = db.Column(db.Integer, db.ForeignKey('tag_names.id'), nullable=False)
+    # 辞書の色と違う色で登録されたときだけ入れる（NULL なら辞書の色）
+    custom_color = db.Column('color', db.String(6))
     submitter_id = db.Column(db.String(100), nullable=False)
     community_id = db.Column(db.String(100), nullable=False)
-    date         = db.Column(db.String(100), nullable=False)
+    date         = db.Column(DayNumber, nullable=False)
     notified     = db.Column(db.Boolean, nullable=False, default=False)  # ← ここ！
 
+    tag_name     = db.relationship(TagName, lazy='joined', innerjoin=True)
+
+    @property
+    def name(self):
+        return self.tag_name.name
+
+    @property
+    def color(self):
+        return self.custom_color or self.tag_name.color or DEFAULT_COLOR
+
     def __repr__(self):
         return f"<Tag(id='{self.id}', name='{self.name}')>"
 
@@ -60,10 +127,18 @@ class CalendarManager:
         """
         if not community_id or not date:
             return {"result": False, "message": "コミュニティIDと日付は必須です"}
+        # キャッシュのキーを揃えるため、表記ゆれ（'2025/6/1' など）を 'YYYY-MM-DD' にする
+        date = normalize_date(date)
+        if not date:
+            return {"result": False, "message": "日付の形式が不正です（YYYY-MM-DD）"}
 
         try:
-            tags = Tag.query.filter_by(community_id=community_id).filter_by(date=date).all()
-            serialized_tag = [tag.to_dict() for tag in tags]
+            def load():
+                tags = Tag.query.filter_by(community_id=community_id).filter_by(date=date).all()
+                return [tag.to_dict() for tag in tags]
+
+            # キャッシュの中身を呼び出し元に書き換えられないよう、コピーを返す
+            serialized_tag = [dict(tag) for tag in calendar_tags_cache.get(calendar_cache_key(community_id, date), load)]
             return {"data": serialized_tag, "result": True, "message": "タグの検索に成功しました"}
         except Exception as e:
             self.db.session.rollback()
@@ -85,8 +160,10 @@ class CalendarManager:
             if not tag_to_delete:
                 return {"result": False, "message": f"タグID '{tag_id}' に一致するタグが見つかりません。"}
 
+            cache_key = calendar_cache_key(tag_to_delete.community_id, tag_to_delete.date)
             self.db.session.delete(tag_to_delete)
             self.db.session.commit()
+            bus.publish("calendar_tags", cache_key)
             return {"result": True, "message": f"タグ 'ID: {tag_id} が削除されました。"}
         except Exception as e:
             self.db.session.rollback()
@@ -117,16 +194,26 @@ class CalendarManager:
             return {"result": False, "message": "community_id が未指定です"}
         if not date:
             return {"result": False, "message": "date が未指定です"}
+        date = normalize_date(date)
+        if not date:
+            return {"result": False, "message": "日付の形式が不正です（YYYY-MM-DD）"}
+
+        try:
+            name_id, name_color = self._intern_tag_name(community_id, tag_name, tag_color)
+        except Exception as e:
+            self.db.session.rollback()
+            return {"result": False, "message": f"タグの追加に失敗しました: {str(e)}"}
 
         # 重複チェック (nameだけでなくidもチェックする方が安全)
-        if self.db.session.query(Tag).filter((Tag.date == date) & (Tag.submitter_id == submitter_id) & (Tag.name == tag_name)).first():
+        if self.db.session.query(Tag.id).filter((Tag.date == date) & (Tag.submitter_id == submitter_id) & (Tag.name_id == name_id)).first():
+            self.db.session.commit()
             return {"result": True, "message": "指定された日付、登録者のタグは既に登録されています"}
 
         try:
             new_tag = Tag(
                 id=tag_id,
-                name=tag_name,
-                color=tag_color,
+                name_id=name_id,
+                custom_color=None if normalize_color(tag_color) == name_color else tag_color,
                 submitter_id=submitter_id,
                 community_id=community_id,
                 date=date,
@@ -134,14 +221,18 @@ class CalendarManager:
             )
             self.db.session.add(new_tag)
             self.db.session.commit()
-            return {
-                "result": True,
-                "message": f"タグ '{tag_name}' (ID: {tag_id}) が追加されました。",
-                "tag": {"id": new_tag.id, "name": new_tag.name}
-            }
         except Exception as e:
             self.db.session.rollback()
             return {"result": False, "message": f"タグの追加に失敗しました: {str(e)}"}
+
+        bus.publish("calendar_tags", calendar_cache_key(community_id, date))
+        # 保存が確定してからイベントを出す（受信側はキューに積むだけで、応答を待たせない）
+        tag_added.send(self, tag=new_tag.to_dict())
+        return {
+            "result": True,
+            "message": f"タグ '{tag_name}' (ID: {tag_id}) が追加されました。",
+            "tag": {"id": new_tag.id, "name": new_tag.name}
+        }
         
     def find_matching_tag(self, community_id: str, tag_name: str, date: str, registered_user_id: str) -> dict:
         """
@@ -168,12 +259,17 @@ class CalendarManager:
         for key, val in [("community_id", community_id), ("tag_name", tag_name), ("date", date), ("registered_user_id", registered_user_id)]:
             if not val:
                 return {"result": False, "message": f"{key} が未指定です。"}
+        if not normalize_date(date):
+            return {"result": False, "message": "日付の形式が不正です（YYYY-MM-DD）"}
 
         try:
-            # submitter_id が操作ユーザーと異なるものを検索
+            # 同じ名前（辞書の name_id が一致）で、submitter_id が操作ユーザーと異なるものを検索
+            name_id = select(TagName.id).filter_by(
+                community_id=community_id, normalized=normalize_tag_name(tag_name)
+            ).scalar_subquery()
             query = Tag.query\
-                       .filter_by(community_id=community_id, name=tag_name, date=date)\
-                       .filter(Tag.submitter_id != registered_user_id)
+                       .filter_by(community_id=community_id, date=date)\
+                       .filter(Tag.name_id == name_id, Tag.submitter_id != registered_user_id)
             tags = query.all()
             serialized = [t.to_dict() for t in tags]
 
@@ -190,6 +286,8 @@ class CalendarManager:
         for key, val in [("community_id", community_id), ("date", date), ("user_id", user_id)]:
             if not val:
                 return {"result": False, "message": f"{key} が未指定です。"}
+        if not normalize_date(date):
+            return {"result": False, "message": "日付の形式が不正です（YYYY-MM-DD）"}
             
         try:
             query = Tag.query\
@@ -204,4 +302,46 @@ class CalendarManager:
         except Exception as e:
             self.db.session.rollback()
             print(traceback.format_exc())
-            return {"result": False, "message": f"タグ検索に失敗しました: {str(e)}"}
\ No newline at end of file
+            return {"result": False, "message": f"タグ検索に失敗しました: {str(e)}"}
+
+    def mark_notified(self, tag_ids, community_id, date):
+        """
+        マッチングの通知を送るタグに notified=True を付ける（1回の UPDATE）
+        まだ通知していないタグだけを書き換え、書き換えたタグの登録者を返す。
+        同じタグを複数のワーカーが同時に処理しても、通知を受け取るのはどちらか一方だけになる。
+        Args:
+            tag_ids (list[str]): 対象のタグID（マッチしたタグと追加されたタグ）
+            community_id (str): コミュニティID（キャッシュの無効化に使う）
+            date (str): 日付（'YYYY-MM-DD'）
+        Returns:
+            dict: 処理結果 (data: List[str] 通知先の submitter_id, result: bool, message: str)
+        """
+        if not tag_ids:
+            return {"data": [], "result": True, "message": "対象のタグがありません"}
+        try:
+            rows = self.db.session.execute(
+                update(Tag)
+                .where(Tag.id.in_(tag_ids), Tag.notified.is_(False))
+                .values(notified=True)
+                .returning(Tag.submitter_id)
+            ).all()
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            return {"result": False, "message": f"通知済みの記録に失敗しました: {str(e)}"}
+
+        if rows:
+            bus.publish("calendar_tags", calendar_cache_key(community_id, date))
+        return {"data": [row.submitter_id for row in rows], "result": True, "message": "通知済みにしました"}
+
+    def _intern_tag_name(self, community_id, tag_name, tag_color):
+        """
+        タグ名の辞書の行を取得する（無ければ tag_color を既定の色として作る）
+        セッションのトランザクションの中で実行し、タグの保存と一緒に COMMIT される。
+        Returns:
+            tuple[int, str | None]: (name_id, 辞書の色)
+        """
+        params = tag_name_params(community_id, tag_name, tag_color)
+        self.db.session.execute(text(INSERT_SQL), params)
+        row = self.db.session.execute(text(SELECT_SQL), params).one()
+        return row.id, row.color
@@ -0,0 +1,107 @@
+# C10 カレンダー情報管理部 AsyncCalendarManagerクラス（ASGI モード用の読み取り処理）
+"""
+CalendarManager の読み取り処理（M2 カレンダー情報要求・M5 マッチングタグ取得・ユーザー別タグ取得）を
+aiosqlite の読み取りプールで行う非同期版。返す dict は CalendarManager と同じ形にする。
+"""
+
+import logging
+
+from database.dates import from_day, normalize_date, to_day
+from database.tag_names import DEFAULT_COLOR, normalize_tag_name
+
+logger = logging.getLogger(__name__)
+
+# 名前と既定の色はタグ名の辞書から JOIN で読む（Tag.name / Tag.color と同じ値）
+_TAG_SELECT = (
+    "SELECT t.id, n.name, COALESCE(t.color, n.color, ?) AS color, t.submitter_id, t.community_id, t.date, t.notified "
+    "FROM tags t JOIN tag_names n ON n.id = t.name_id "
+)
+
+
+def _tag_to_dict(row):
+    """
+    tags の1行を Tag.to_dict() と同じ dict にする
+    """
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "color": row["color"],
+        "submitter_id": row["submitter_id"],
+        "community_id": row["community_id"],
+        "date": from_day(row["date"]),
+        "notified": bool(row["notified"])
+    }
+
+
+class AsyncCalendarManager:
+    """
+    C10 カレンダー情報管理部（非同期の読み取り処理）
+    """
+
+    def __init__(self, pool):
+        """
+        Args:
+            pool (database.async_connection.AsyncReadPool): 読み取り専用の接続プール
+        """
+        self.pool = pool
+
+    async def request_calendar_data(self, community_id, date):
+        """
+        M2 カレンダー情報要求（CalendarManager.request_calendar_data と同じ結果を返す）
+        """
+        if not community_id or not date:
+            return {"result": False, "message": "コミュニティIDと日付は必須です"}
+        if not normalize_date(date):
+            return {"result": False, "message": "日付の形式が不正です（YYYY-MM-DD）"}
+        try:
+            rows = await self.pool.fetchall(
+                _TAG_SELECT + "WHERE t.community_id = ? AND t.date = ?",
+                (DEFAULT_COLOR, community_id, to_day(date))
+            )
+            return {"data": [_tag_to_dict(r) for r in rows], "result": True, "message": "タグの検索に成功しました"}
+        except Exception as e:
+            logger.warning(f"❌ タグ検索失敗: {e}")
+            return {"result": False, "message": f"タグの検索に失敗しました: {str(e)}"}
+
+    async def find_matching_tag(self, community_id, tag_name, date, registered_user_id):
+        """
+        M5 マッチングタグ取得（CalendarManager.find_matching_tag と同じ結果を返す）
+        """
+        for key, val in [("community_id", community_id), ("tag_name", tag_name), ("date", date), ("registered_user_id", registered_user_id)]:
+            if not val:
+                return {"result": False, "message": f"{key} が未指定です。"}
+        if not normalize_date(date):
+            return {"result": False, "message": "日付の形式が不正です（YYYY-MM-DD）"}
+        try:
+            rows = await self.pool.fetchall(
+                _TAG_SELECT + "WHERE t.community_id = ? AND t.date = ? AND t.submitter_id != ? "
+                "AND t.name_id = (SELECT id FROM tag_names WHERE community_id = ? AND normalized = ?)",
+                (DEFAULT_COLOR, community_id, to_day(date), registered_user_id, community_id, normalize_tag_name(tag_name))
+            )
+        except Exception as e:
+            logger.warning(f"❌ タグマッチング検索失敗: {e}")
+            return {"result": False, "message": f"タグマッチングの検索に失敗しました: {str(e)}"}
+        if rows:
+            return {"data": [_tag_to_dict(r) for r in rows], "result": True, "message": "マッチするタグが見つかりました。"}
+        return {"data": [], "result": True, "message": "タグが見つかりませんでした。"}
+
+    async def find_user_date_community(self, community_id, date, user_id):
+        """
+        ユーザー別タグ取得（CalendarManager.find_user_date_community と同じ結果を返す）
+        """
+        for key, val in [("community_id", community_id), ("date", date), ("user_id", user_id)]:
+            if not val:
+                return {"result": False, "message": f"{key} が未指定です。"}
+        if not normalize_date(date):
+            return {"result": False, "message": "日付の形式が不正です（YYYY-MM-DD）"}
+        try:
+            rows = await self.pool.fetchall(
+                _TAG_SELECT + "WHERE t.community_id = ? AND t.date = ? AND t.submitter_id = ?",
+                (DEFAULT_COLOR, community_id, to_day(date), user_id)
+            )
+        except Exception as e:
+            logger.warning(f"❌ タグ検索失敗: {e}")
+            return {"result": False, "message": f"タグ検索に失敗しました: {str(e)}"}
+        if rows:
+            return {"data": [_tag_to_dict(r) for r in rows], "result": True, "message": "タグ取得成功"}
+        return {"data": [], "result": True, "message": "タグが見つかりませんでした"}
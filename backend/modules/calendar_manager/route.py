@@ -6,8 +6,16 @@ from extentions import db # app.pyからdbインスタンスをインポート
 from .calendar_manager import CalendarManager # CalendarManagerとTagモデルをインポート
 
 calendar_manager_bp = Blueprint('calendar_manager', __name__, url_prefix='/api/calendar-manager')
-# CalendarManagerインスタンスを初期化する際に、app.pyで初期化されたdbインスタンスを渡す
-manager = CalendarManager(db)
+# CalendarManagerのインスタンスはアプリケーション起動時（ワーカーごとに1回）に初期化される
+manager: CalendarManager = None
+
+def init_app(app_instance):
+    """
+    Flaskアプリケーションインスタンスの初期化時にCalendarManagerをセットアップします。
+    app.pyで初期化されたdbインスタンスを渡す。
+    """
+    global manager
+    manager = CalendarManager(db)
 
 
 @calendar_manager_bp.route('/tags', methods=['GET'])
@@ -1,10 +1,9 @@
 # C5 カレンダー情報処理部 CalenderProcessクラス 担当: 角田一颯
 
-import requests
-import uuid
 import os
 
-from dotenv import load_dotenv
+from common.service_client import service_client
+from database.ids import uuid7
 
 class CalenderProcess:
     """
@@ -19,6 +18,8 @@ class CalenderProcess:
             base_url (str): 管理部APIのベースURL
         """
         
+        # dotenv はインスタンス生成時（ワーカーごとに1回）にだけ読み込む
+        from dotenv import load_dotenv
         load_dotenv()
         url_base = os.getenv('FLASK_URL')
         self.base_url = url_base + base_url
@@ -38,11 +39,11 @@ class CalenderProcess:
             tuple[bool, dict]: (成功可否, 管理部からの応答内容)
         """
         
-        #新規タグのIDをランダムに生成
-        tag_id = uuid.uuid4()
+        #新規タグのIDを時刻順に生成（UUIDv7、database/ids.py）
+        tag_id = uuid7()
         
         try:
-            response = requests.post(
+            response = service_client.post(
                 f"{self.base_url}/tag/add",
                 json={
                     "tag_id": str(tag_id),
@@ -71,7 +72,7 @@ class CalenderProcess:
             tuple[bool, dict]: (成功可否, 管理部からの応答内容)
         """
         try:
-            response = requests.delete(
+            response = service_client.delete(
                 f"{self.base_url}/tag/delete",
                 json={
                       "tag_id": tag_id
@@ -95,7 +96,7 @@ class CalenderProcess:
             tuple[bool, dict]: (成功可否, 管理部からの応答内容)
         """
         try:
-            response = requests.get(
+            response = service_client.get(
                 f"{self.base_url}/tags",
                 json={
                     "community_id": community_id,
@@ -111,7 +112,7 @@ class CalenderProcess:
         
     def tag_get_from_community_date_user(self, community_id, date, user_id):
         try:
-            response = requests.get(
+            response = service_client.get(
                 f"{self.base_url}/tags/user",
                 json={
                     "community_id": community_id,
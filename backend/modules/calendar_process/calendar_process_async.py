@@ -0,0 +1,36 @@
+# C5 カレンダー情報処理部 AsyncCalenderProcessクラス（ASGI モード用の読み取り処理）
+
+import os
+
+
+class AsyncCalenderProcess:
+    """
+    カレンダー情報処理部（非同期版）
+    タグ取得の要求を aiohttp で C10 カレンダー情報管理部に送信する。
+    戻り値は CalenderProcess と同じ (成功可否, 管理部からの応答内容)。
+    """
+
+    def __init__(self, session, base_url="/api/calendar-manager"):
+        """
+        Args:
+            session (aiohttp.ClientSession): 共有する HTTP セッション（接続を使い回す）
+            base_url (str): 管理部APIのベースURL（FLASK_URL からの相対パス）
+        """
+        self.session = session
+        self.base_url = os.getenv("FLASK_URL", "http://localhost:5001").rstrip("/") + base_url
+
+    async def _get(self, path, payload):
+        try:
+            async with self.session.get(f"{self.base_url}{path}", json=payload) as response:
+                return response.status == 200, await response.json(content_type=None)
+        except Exception as e:
+            return False, {"error": "通信エラー", "details": str(e)}
+
+    async def tag_get_from_community_and_date(self, community_id, date):
+        """
+        M4 タグコミュニティ検索処理
+        """
+        return await self._get("/tags", {"community_id": community_id, "date": date})
+
+    async def tag_get_from_community_date_user(self, community_id, date, user_id):
+        return await self._get("/tags/user", {"community_id": community_id, "date": date, "user_id": user_id})
@@ -1,12 +1,25 @@
 # C5 カレンダー情報処理部 CalenderProcessクラス 担当: 角田一颯
 
 from flask import Blueprint, request, jsonify
+
+from common.idempotency import idempotent
+from database.dates import normalize_date
 from .calendar_process import CalenderProcess
 
 calendar_bp = Blueprint('calendar', __name__, url_prefix='/api/<string:community_id>/calendar')
-processor = CalenderProcess()
+
+# CalenderProcessのインスタンスはアプリケーション起動時（ワーカーごとに1回）に初期化される
+processor: CalenderProcess = None
+
+def init_app(app_instance):
+    """
+    Flaskアプリケーションインスタンスの初期化時にCalenderProcessをセットアップします。
+    """
+    global processor
+    processor = CalenderProcess()
 
 @calendar_bp.route('/tag/add', methods=['POST'])
+@idempotent
 def add_tag(community_id):
     data = request.get_json() or {}
 
@@ -23,6 +36,10 @@ def add_tag(community_id):
         return jsonify({"error": "submitter_idが未指定です"}), 400
     if not date:
         return jsonify({"error": "dateが未指定です"}), 400
+    # '2025/6/1' などの表記ゆれは 'YYYY-MM-DD' に揃え、日付として読めないものは受け付けない
+    date = normalize_date(date)
+    if not date:
+        return jsonify({"error": "dateの形式が不正です（YYYY-MM-DD）"}), 400
 
     if not tag_name or not tag_color:
         return jsonify({"error": "tag_nameもしくはtag_colorが未指定"}), 400
@@ -47,6 +64,9 @@ def get_community_date_tag(community_id):
     
     if not date:
         return jsonify({"error": "date未指定"}), 400
+    date = normalize_date(date)
+    if not date:
+        return jsonify({"error": "dateの形式が不正です（YYYY-MM-DD）"}), 400
     
     success, result = processor.tag_get_from_community_and_date(community_id, date)
     return (jsonify(result), 200) if success else (jsonify(result), 500)
@@ -58,6 +78,9 @@ def get_community_date_user_id(community_id, user_id):
     
     if not date:
         return jsonify({"error": "date未指定"}), 400
+    date = normalize_date(date)
+    if not date:
+        return jsonify({"error": "dateの形式が不正です（YYYY-MM-DD）"}), 400
     
     success, result = processor.tag_get_from_community_date_user(community_id, date, user_id)
     
@@ -0,0 +1,235 @@
+"""
+C9 チャット履歴アーカイブ
+一定日数より古いチャットスレッドを chat_messages から取り出し、
+コミュニティ・月単位の圧縮 BLOB (chat_archives) に移動する。
+アーカイブ済みスレッドは read_archived_thread() で透過的に読み出せる。
+
+実行例 (backend ディレクトリで):
+    python -m modules.community_management.chat_archive --older-than-days 90 --vacuum
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import sys
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from database.dates import from_day, month_range, to_day
+
+logger = logging.getLogger(__name__)
+
+# 何日より前のスレッドをアーカイブするか
+ARCHIVE_AFTER_DAYS = int(os.getenv("CHAT_ARCHIVE_AFTER_DAYS", "90"))
+
+def _compress(raw):
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(raw)
+    return "zlib", zlib.compress(raw, 9)
+
+
+def _decompress(codec, data):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd で圧縮されたアーカイブの展開には zstandard が必要です")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def _thread_key(tag_id, date):
+    return f"{tag_id}|{date}"
+
+
+def _load_month(db, community_id, month):
+    """
+    アーカイブ BLOB を展開して {"<tag_id>|<date>": [message, ...]} を返す
+    """
+    row = db.execute(
+        "SELECT codec, data FROM chat_archives WHERE community_id = ? AND month = ?",
+        (community_id, month)
+    ).fetchone()
+    if row is None:
+        return None
+    return json.loads(_decompress(row[0], row[1]))
+
+
+def read_archived_thread(db, community_id, tag_id, date):
+    """
+    アーカイブ済みのチャットスレッドを取得する
+    Args:
+        db (sqlite3.Connection): DB接続
+        community_id (str): コミュニティID
+        tag_id (str): テンプレートタグID
+        date (str): 日付（'YYYY-MM-DD'形式）
+    Returns:
+        list[dict]: sender_id, sender_name, message_content, timestamp を持つメッセージ
+    """
+    threads = _load_month(db, community_id, date[:7])
+    if not threads:
+        return []
+    return threads.get(_thread_key(tag_id, date), [])
+
+
+async def read_archived_thread_async(pool, community_id, tag_id, date):
+    """
+    read_archived_thread の非同期版（ASGI モード用）
+    BLOB の読み出しは aiosqlite の読み取りプールで、展開はスレッドで行い、イベントループを塞がない。
+    Args:
+        pool (database.async_connection.AsyncReadPool): 読み取り専用の接続プール
+    Returns:
+        list[dict]: sender_id, sender_name, message_content, timestamp を持つメッセージ
+    """
+    row = await pool.fetchone(
+        "SELECT codec, data FROM chat_archives WHERE community_id = ? AND month = ?",
+        (community_id, date[:7])
+    )
+    if row is None:
+        return []
+    threads = await asyncio.to_thread(lambda: json.loads(_decompress(row[0], row[1])))
+    return threads.get(_thread_key(tag_id, date), [])
+
+
+def archive_chat_threads(db, older_than_days=ARCHIVE_AFTER_DAYS, today=None):
+    """
+    older_than_days より前の日付のチャットスレッドをアーカイブへ移動する
+    コミュニティ・月ごとに1トランザクションで、既存 BLOB へのマージと元行の削除を行う。
+    Args:
+        db (sqlite3.Connection): DB接続
+        older_than_days (int): この日数より前のスレッドを対象にする
+        today (datetime.date, optional): 基準日（省略時は今日）
+    Returns:
+        dict: 移動件数と圧縮前後のバイト数
+    """
+    today = today or datetime.date.today()
+    cutoff_date = today - datetime.timedelta(days=older_than_days)
+    cutoff = to_day(cutoff_date)
+
+    # date は通し日数（database/dates.py）。月は SQLite の日付関数で 'YYYY-MM' にする
+    targets = db.execute(
+        """
+        SELECT DISTINCT community_id, strftime('%Y-%m', date * 86400, 'unixepoch') AS month
+        FROM chat_messages
+        WHERE date < ?
+        """,
+        (cutoff,)
+    ).fetchall()
+
+    stats = {"cutoff": cutoff_date.isoformat(), "months": 0, "threads": 0, "messages": 0,
+             "raw_bytes": 0, "compressed_bytes": 0}
+    for community_id, month in targets:
+        # 月の範囲のうち cutoff より前の日（first <= date < end）
+        first, next_first = month_range(month)
+        end = min(next_first, cutoff)
+        # 読み出しから削除までの間に同じ月へ書き込まれないよう書き込みロックを先に取る
+        db.execute("BEGIN IMMEDIATE")
+        rows = db.execute(
+            """
+            SELECT tag_id, date, sender_id, sender_name, message_content, timestamp
+            FROM chat_messages
+            WHERE community_id = ? AND date >= ? AND date < ?
+            ORDER BY timestamp ASC
+            """,
+            (community_id, first, end)
+        ).fetchall()
+        if not rows:
+            db.rollback()
+            continue
+
+        threads = _load_month(db, community_id, month) or {}
+        new_keys = set()
+        for tag_id, day, sender_id, sender_name, message_content, timestamp in rows:
+            # アーカイブのスレッドのキーは 'YYYY-MM-DD' のまま
+            key = _thread_key(tag_id, from_day(day))
+            if key not in threads:
+                new_keys.add(key)
+            threads.setdefault(key, []).append({
+                "sender_id": sender_id,
+                "sender_name": sender_name,
+                "message_content": message_content,
+                "timestamp": timestamp
+            })
+        for messages in threads.values():
+            messages.sort(key=lambda m: m["timestamp"])
+
+        raw = json.dumps(threads, ensure_ascii=False, separators=(",", ":")).encode()
+        codec, data = _compress(raw)
+        message_count = sum(len(m) for m in threads.values())
+
+        db.execute(
+            """
+            INSERT INTO chat_archives (community_id, month, codec, message_count, raw_bytes, data)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (community_id, month) DO UPDATE SET
+                codec = excluded.codec,
+                message_count = excluded.message_count,
+                raw_bytes = excluded.raw_bytes,
+                data = excluded.data
+            """,
+            (community_id, month, codec, message_count, len(raw), data)
+        )
+        db.execute(
+            "DELETE FROM chat_messages WHERE community_id = ? AND date >= ? AND date < ?",
+            (community_id, first, end)
+        )
+        db.commit()
+
+        stats["months"] += 1
+        stats["threads"] += len(new_keys)
+        stats["messages"] += len(rows)
+        stats["raw_bytes"] += len(raw)
+        stats["compressed_bytes"] += len(data)
+        logger.info(f"✅ チャットアーカイブ: community={community_id}, month={month}, {len(rows)}件")
+
+    return stats
+
+
+def database_bytes(db):
+    """
+    DBファイルの使用中サイズ（空きページを除く）を返す
+    """
+    page_size = db.execute("PRAGMA page_size").fetchone()[0]
+    page_count = db.execute("PRAGMA page_count").fetchone()[0]
+    freelist = db.execute("PRAGMA freelist_count").fetchone()[0]
+    return page_size * (page_count - freelist)
+
+
+def main(argv=None):
+    from database.connection import DB_PATH, connect
+    from database.migrate import migrate
+
+    parser = argparse.ArgumentParser(description="古いチャットスレッドを圧縮アーカイブへ移動する")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--vacuum", action="store_true", help="移動後に VACUUM してファイルを縮める")
+    args = parser.parse_args(argv)
+
+    migrate(args.db)
+    db = connect(args.db)
+    file_before = os.path.getsize(args.db)
+    used_before = database_bytes(db)
+    started = time.perf_counter()
+    stats = archive_chat_threads(db, args.older_than_days)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["used_bytes_before"] = used_before
+    stats["used_bytes_after"] = database_bytes(db)
+    if args.vacuum:
+        db.execute("VACUUM")
+    stats["file_bytes_before"] = file_before
+    stats["file_bytes_after"] = os.path.getsize(args.db)
+    stats["saved_bytes"] = used_before - stats["used_bytes_after"]
+    db.close()
+
+    json.dump(stats, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
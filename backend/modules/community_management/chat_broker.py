@@ -0,0 +1,292 @@
+"""
+C9 チャット配信ブローカー
+チャットスレッド (コミュニティID, タグID, 日付) ごとに、保存済みメッセージを
+購読中のクライアントへプロセス内で配信する。
+購読者は DB 接続を保持せず、メモリ上のキューで待機するだけなので
+1ワーカーで数千件の待機中SSE接続を扱える。
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import deque
+
+# 1スレッドあたりに保持する再送用の直近イベント数
+DEFAULT_BACKLOG_SIZE = 200
+# 購読者がいないスレッドのバックログを Last-Event-ID からの再開用に残しておく秒数
+# これを過ぎたスレッドはブローカーから削除する（再開時は gap になり、履歴の再取得を促す）
+DEFAULT_RESUME_WINDOW = 300.0
+
+
+class ChatEvent:
+    """
+    配信される1件のチャットイベント
+    """
+    __slots__ = ("event_id", "seq", "data")
+
+    def __init__(self, event_id, seq, data):
+        self.event_id = event_id
+        self.seq = seq
+        self.data = data
+
+
+class Subscription:
+    """
+    1クライアント分の購読。ブローカーから届いたイベントを溜めておき、
+    get() で取り出す。
+    """
+
+    def __init__(self, broker, key):
+        self._broker = broker
+        self.key = key
+        self._cond = threading.Condition(threading.Lock())
+        self._events = deque()
+        self.closed = False
+        # Last-Event-ID からの再開ができなかった（取りこぼしがある）場合 True
+        self.gap = False
+
+    def _push(self, event):
+        with self._cond:
+            self._events.append(event)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        新着イベントを取り出す
+        Args:
+            timeout (float, optional): 待機秒数。None の場合は無期限に待つ
+        Returns:
+            list[ChatEvent]: 新着イベント（タイムアウト時は空リスト）
+        """
+        with self._cond:
+            if not self._events and not self.closed:
+                self._cond.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+    def close(self):
+        """
+        購読を解除する
+        """
+        with self._cond:
+            if self.closed:
+                return
+            self.closed = True
+            self._cond.notify_all()
+        self._broker._unsubscribe(self)
+
+
+class _ChatThread:
+    """
+    1チャットスレッド分の状態（採番・再送用バックログ・購読者）
+    """
+    __slots__ = ("next_seq", "backlog", "subscribers", "touched")
+
+    def __init__(self, first_seq, backlog_size, now):
+        # 次に振る連番。削除後に作り直したスレッドでも、以前の連番より大きい値から振る
+        self.next_seq = first_seq
+        self.backlog = deque(maxlen=backlog_size)
+        self.subscribers = set()
+        # 最後に配信・購読解除された時刻（削除の判定に使う）
+        self.touched = now
+
+
+class ChatBroker:
+    """
+    プロセス内 Pub/Sub ブローカー
+    post_chat で保存されたメッセージを publish() で受け取り、
+    同じスレッドを購読している全 Subscription に配信する。
+
+    イベントIDは "<エポック>:<連番>" 形式。エポックはブローカー生成時に決まるため、
+    再起動や別ワーカーへの再接続で Last-Event-ID が解釈できない場合は
+    Subscription.gap が True になり、クライアントに履歴の再取得を促す。
+
+    購読者がいなくなったスレッドは、バックログが空ならすぐに、
+    そうでなければ最後の配信から resume_window 秒後に削除する
+    （投稿・購読されたスレッドの数だけメモリが増え続けないようにする）。
+    """
+
+    def __init__(self, backlog_size=DEFAULT_BACKLOG_SIZE, resume_window=DEFAULT_RESUME_WINDOW,
+                 clock=time.monotonic):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._backlog_size = backlog_size
+        self._resume_window = resume_window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._threads = {}
+        # これまでに振った最大の連番（スレッドを作り直しても連番が戻らないようにする）
+        self._last_seq = 0
+        self._next_sweep = clock() + resume_window
+
+    def _thread(self, key, now):
+        """
+        スレッドの状態を取り出す（無ければ作る）。self._lock を取得した状態で呼ぶ
+        """
+        thread = self._threads.get(key)
+        if thread is None:
+            thread = self._threads[key] = _ChatThread(self._last_seq + 1, self._backlog_size, now)
+        return thread
+
+    def _sweep(self, now):
+        """
+        購読者がいなくなってから resume_window 秒を過ぎたスレッドを削除する。self._lock を取得した状態で呼ぶ
+        """
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self._resume_window
+        expired = [
+            key for key, thread in self._threads.items()
+            if not thread.subscribers and now - thread.touched >= self._resume_window
+        ]
+        for key in expired:
+            del self._threads[key]
+
+    def publish(self, key, data):
+        """
+        チャットスレッドにイベントを配信する
+        Args:
+            key (tuple): (community_id, tag_id, date)
+            data (dict): 配信するメッセージ
+        Returns:
+            ChatEvent: 採番済みイベント
+        """
+        with self._lock:
+            now = self._clock()
+            self._sweep(now)
+            thread = self._thread(key, now)
+            seq = thread.next_seq
+            thread.next_seq += 1
+            self._last_seq = max(self._last_seq, seq)
+            event = ChatEvent(f"{self.epoch}:{seq}", seq, data)
+            thread.backlog.append(event)
+            thread.touched = now
+            subscribers = list(thread.subscribers)
+
+        for sub in subscribers:
+            sub._push(event)
+        return event
+
+    def subscribe(self, key, last_event_id=None):
+        """
+        チャットスレッドを購読する
+        Args:
+            key (tuple): (community_id, tag_id, date)
+            last_event_id (str, optional): クライアントが最後に受信したイベントID
+        Returns:
+            Subscription: 購読オブジェクト（再送分のイベントが積まれた状態）
+        """
+        sub = Subscription(self, key)
+        with self._lock:
+            now = self._clock()
+            self._sweep(now)
+            thread = self._thread(key, now)
+            if last_event_id:
+                replay = self._replay(thread, last_event_id)
+                if replay is None:
+                    sub.gap = True
+                else:
+                    sub._events.extend(replay)
+            thread.subscribers.add(sub)
+        return sub
+
+    def _replay(self, thread, last_event_id):
+        """
+        Last-Event-ID 以降のイベントをバックログから取り出す
+        Returns:
+            list[ChatEvent] | None: 再送イベント。再開できない場合は None
+        """
+        epoch, _, seq = last_event_id.partition(":")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        last_seq = int(seq)
+        first_seq = thread.backlog[0].seq if thread.backlog else thread.next_seq
+        if first_seq > last_seq + 1:
+            # バックログから溢れた分、またはスレッドが削除される前の分を取りこぼしている
+            return None
+        return [event for event in thread.backlog if event.seq > last_seq]
+
+    def _unsubscribe(self, sub):
+        with self._lock:
+            thread = self._threads.get(sub.key)
+            if thread is None:
+                return
+            thread.subscribers.discard(sub)
+            if thread.subscribers:
+                return
+            if not thread.backlog:
+                # 配信の無いスレッドは再開用に残すものが無いので、すぐに削除する
+                del self._threads[sub.key]
+            else:
+                thread.touched = self._clock()
+
+    def subscriber_count(self):
+        """
+        現在の購読者数の合計を返す
+        """
+        with self._lock:
+            return sum(len(t.subscribers) for t in self._threads.values())
+
+    def thread_count(self):
+        """
+        ブローカーが状態を保持しているチャットスレッドの数を返す
+        """
+        with self._lock:
+            return len(self._threads)
+
+
+def format_sse(event_id=None, event=None, data=None, comment=None, retry=None):
+    """
+    Server-Sent Events 形式の1レコードを組み立てる
+    """
+    lines = []
+    if comment is not None:
+        lines.append(f": {comment}")
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    if data is not None:
+        lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_events(sub, heartbeat_interval=15.0, clock=time.monotonic):
+    """
+    購読からSSEレコードを生成するジェネレータ
+    一定時間イベントが無い場合はハートビートのコメント行を送る。
+    Args:
+        sub (Subscription): 購読
+        heartbeat_interval (float): ハートビート間隔（秒）
+    Yields:
+        str: SSE レコード
+    """
+    try:
+        yield format_sse(retry=3000)
+        if sub.gap:
+            # 取りこぼしがあるため、履歴APIからの再取得を促す
+            yield format_sse(event="reset", data="{}")
+        last_sent = clock()
+        while not sub.closed:
+            events = sub.get(timeout=heartbeat_interval)
+            for ev in events:
+                yield format_sse(
+                    event_id=ev.event_id,
+                    event="message",
+                    data=json.dumps(ev.data, ensure_ascii=False),
+                )
+            now = clock()
+            if events:
+                last_sent = now
+            elif now - last_sent >= heartbeat_interval:
+                yield format_sse(comment="heartbeat")
+                last_sent = now
+    finally:
+        sub.close()
+
+
+# ワーカー内で共有するブローカー
+chat_broker = ChatBroker()
@@ -0,0 +1,92 @@
+"""
+C9 チャット全文検索インデックス
+chat_messages.message_content を FTS5 (trigram トークナイザ) のシャドウ索引で管理し、
+コミュニティ単位でスコアリング・ハイライト付きの検索を提供する。
+索引はトリガで chat_messages と常に同期される
+（アーカイブへ移動したメッセージは索引からも外れる）。
+テーブル・トリガの作成はマイグレーション (database/migrations) で行う。
+"""
+
+import html
+import sqlite3
+
+from database.dates import from_day
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+# trigram トークナイザは3文字未満の語を検索できない
+MIN_QUERY_LENGTH = 3
+
+# スニペット生成時の一時的な区切り文字（HTML エスケープ後に <mark> へ置き換える）
+_HIGHLIGHT_OPEN = "\x02"
+_HIGHLIGHT_CLOSE = "\x03"
+
+def _phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def build_match_expression(community_id, query):
+    """
+    コミュニティで絞り込んだ FTS5 の MATCH 式を組み立てる
+    空白区切りの語はすべて含むもの（AND）を探す。
+    """
+    terms = [t for t in query.split() if t]
+    expr = " AND ".join(f"message_content : {_phrase(t)}" for t in terms)
+    return f"community_id : {_phrase(community_id)} AND {expr}"
+
+
+def _highlight(snippet):
+    """
+    メッセージ本文を HTML エスケープし、一致箇所だけを <mark> で囲む
+    """
+    return (
+        html.escape(snippet)
+        .replace(_HIGHLIGHT_OPEN, "<mark>")
+        .replace(_HIGHLIGHT_CLOSE, "</mark>")
+    )
+
+
+def search_chat_messages(db, community_id, query, limit=DEFAULT_LIMIT, offset=0):
+    """
+    コミュニティ内のチャットメッセージを全文検索する
+    bm25 の関連度順に並べ、一致箇所を <mark> で囲んだスニペットを付ける。
+    Args:
+        db (sqlite3.Connection): DB接続
+        community_id (str): コミュニティID
+        query (str): 検索文字列（空白区切りで AND 検索、各語3文字以上）
+        limit (int): 取得件数
+        offset (int): 取得開始位置
+    Returns:
+        tuple[list[dict], bool]: (検索結果, 次ページの有無)
+    """
+    rows = db.execute(
+        """
+        SELECT m.id, m.tag_id, m.date, m.sender_id, m.sender_name, m.timestamp,
+               snippet(chat_messages_fts, 0, ?, ?, '…', 16) AS snippet,
+               bm25(chat_messages_fts, 1.0, 0.0) AS score
+        FROM chat_messages_fts
+        JOIN chat_messages m ON m.rowid = chat_messages_fts.rowid
+        WHERE chat_messages_fts MATCH ?
+        ORDER BY score
+        LIMIT ? OFFSET ?
+        """,
+        (_HIGHLIGHT_OPEN, _HIGHLIGHT_CLOSE,
+         build_match_expression(community_id, query), limit + 1, offset)
+    ).fetchall()
+
+    has_more = len(rows) > limit
+    results = [
+        {
+            "id": r[0],
+            "tag_id": r[1],
+            "date": from_day(r[2]),
+            "sender_id": r[3],
+            "sender_name": r[4],
+            "timestamp": r[5],
+            "snippet": _highlight(r[6]),
+            "score": round(-r[7], 4),
+        }
+        for r in rows[:limit]
+    ]
+    return results, has_more
@@ -0,0 +1,251 @@
+"""
+C9 チャット書き込み部（グループコミット）
+post_chat から受け取ったチャットメッセージを専用スレッドでまとめて INSERT し、
+数ミリ秒ごと、または一定件数ごとに1回だけ COMMIT する。
+呼び出し元は自分のメッセージを含むグループが COMMIT された時点で応答を受け取る。
+COMMIT 済みを返した後に電源断・OS クラッシュで消えないよう、書き込み接続だけは synchronous=FULL で開く
+（WAL の NORMAL では直近の COMMIT が fsync されない。グループごとに1回の fsync なのでコストは小さい）。
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from database.connection import PRAGMAS, connect
+
+logger = logging.getLogger(__name__)
+
+INSERT_CHAT_SQL = (
+    "INSERT INTO chat_messages "
+    "(id, community_id, tag_id, date, sender_id, sender_name, message_content, timestamp) "
+    "VALUES (:id, :community_id, :tag_id, :date, :sender_id, :sender_name, :message_content, :timestamp)"
+)
+
+# グループの最大件数と、最初のメッセージを受け取ってから COMMIT するまでの最大待ち時間（秒）
+DEFAULT_MAX_BATCH = int(os.getenv("CHAT_WRITER_MAX_BATCH", "64"))
+DEFAULT_MAX_DELAY = float(os.getenv("CHAT_WRITER_MAX_DELAY_MS", "5")) / 1000
+
+# メトリクス計算用に保持する直近のサンプル数
+METRICS_WINDOW = 1000
+
+
+class ChatWriterMetrics:
+    """
+    グループコミットのバッチサイズと COMMIT 所要時間を集計する
+    """
+
+    def __init__(self, window=METRICS_WINDOW):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.messages = 0
+        self.failed_messages = 0
+        self.commit_seconds_total = 0.0
+        self._batch_sizes = deque(maxlen=window)
+        self._commit_seconds = deque(maxlen=window)
+
+    def record(self, batch_size, failed, commit_seconds):
+        with self._lock:
+            self.batches += 1
+            self.messages += batch_size
+            self.failed_messages += failed
+            self.commit_seconds_total += commit_seconds
+            self._batch_sizes.append(batch_size)
+            self._commit_seconds.append(commit_seconds)
+
+    def snapshot(self):
+        """
+        集計値を dict で返す
+        """
+        with self._lock:
+            sizes = sorted(self._batch_sizes)
+            latencies = sorted(self._commit_seconds)
+            return {
+                "batches": self.batches,
+                "messages": self.messages,
+                "failed_messages": self.failed_messages,
+                "commit_seconds_total": round(self.commit_seconds_total, 6),
+                "batch_size_avg": round(sum(sizes) / len(sizes), 2) if sizes else 0,
+                "batch_size_max": sizes[-1] if sizes else 0,
+                "commit_ms_p50": _percentile_ms(latencies, 50),
+                "commit_ms_p95": _percentile_ms(latencies, 95),
+                "commit_ms_p99": _percentile_ms(latencies, 99),
+            }
+
+
+def _percentile_ms(ordered, pct):
+    if not ordered:
+        return 0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 3)
+
+
+class ChatWriter:
+    """
+    チャットメッセージ専用の書き込みスレッド
+    write() はメッセージをキューに積み、所属グループの COMMIT 完了まで待つ。
+    スレッドは最初の write() で起動する（fork 後のワーカーでも各プロセスで起動し直す）。
+    スレッドが異常終了したときは、受け取り済みのメッセージをすべて失敗にしてから終了し、次の write() で起動し直す。
+    """
+
+    def __init__(self, db_path, max_batch=DEFAULT_MAX_BATCH, max_delay=DEFAULT_MAX_DELAY):
+        """
+        Args:
+            db_path (str): SQLite データベースファイルのパス
+            max_batch (int): 1回の COMMIT にまとめる最大件数
+            max_delay (float): グループを締め切るまでの最大待ち時間（秒）
+        """
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.metrics = ChatWriterMetrics()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        """
+        書き込みスレッドが動いていなければ起動する（self._lock を取得した状態で呼ぶ）
+        同じプロセスでの再起動ではキューを引き継ぎ、fork 後の子プロセスでだけ新しいキューにする
+        （親プロセスのキューに残ったメッセージの待ち手は子プロセスにはいない）。
+        """
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        if self._pid != os.getpid():
+            self._queue = queue.Queue()
+            self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="chat-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        """
+        メッセージを書き込みキューに積む
+        Args:
+            row (dict): chat_messages の1行分（INSERT_CHAT_SQL の名前付きパラメータ）
+        Returns:
+            concurrent.futures.Future: COMMIT 完了で True、失敗時は例外が設定される
+        """
+        future = Future()
+        # 終了処理中のスレッドがキューを空にした後に積まれたまま残らないよう、起動確認と put をまとめて行う
+        with self._lock:
+            self._ensure_started()
+            self._queue.put((row, future))
+        return future
+
+    def write(self, row, timeout=10.0):
+        """
+        メッセージを書き込み、COMMIT されるまで待つ
+        timeout 秒以内に書き込みが始まらなければキューから取り消して TimeoutError を送出する
+        （取り消したメッセージは保存されないので、送り直しても重複しない）。
+        書き込みが始まっていた場合は、そのグループの結果が出るまで待つ。
+        Raises:
+            concurrent.futures.TimeoutError: 書き込みが始まる前に timeout を過ぎた場合
+            Exception: INSERT / COMMIT に失敗した場合はその例外
+        """
+        future = self.submit(row)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise
+            return future.result()
+
+    def _run(self):
+        batch = []
+        try:
+            conn = connect(self.db_path, pragmas={**PRAGMAS, "synchronous": "FULL"})
+            try:
+                # BEGIN / COMMIT を自前で発行する
+                conn.isolation_level = None
+                while True:
+                    batch = [self._queue.get()]
+                    deadline = time.monotonic() + self.max_delay
+                    while len(batch) < self.max_batch:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        try:
+                            batch.append(self._queue.get(timeout=remaining))
+                        except queue.Empty:
+                            break
+                    self._commit_batch(conn, batch)
+                    batch = []
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.exception(f"❌ チャット書き込みスレッドが異常終了しました: {e}")
+            self._abort(batch, e)
+
+    def _abort(self, batch, error):
+        """
+        書き込みスレッドの終了時に、処理中のグループとキューに残ったメッセージをすべて失敗にする
+        """
+        with self._lock:
+            if self._thread is threading.current_thread():
+                self._thread = None
+            pending = list(batch)
+            while True:
+                try:
+                    pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+        for _, future in pending:
+            _fail(future, error)
+
+    def _commit_batch(self, conn, batch):
+        """
+        1グループ分を1トランザクションで書き込む
+        1件の失敗でグループ全体が失敗しないよう、各 INSERT をセーブポイントで囲む。
+        """
+        # write() がタイムアウトで取り消したメッセージは書き込まない（以降は取り消せない）
+        batch = [(row, future) for row, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        started = time.perf_counter()
+        errors = {}
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for index, (row, _) in enumerate(batch):
+                conn.execute("SAVEPOINT chat_row")
+                try:
+                    conn.execute(INSERT_CHAT_SQL, row)
+                except sqlite3.Error as e:
+                    conn.execute("ROLLBACK TO chat_row")
+                    errors[index] = e
+                conn.execute("RELEASE chat_row")
+            conn.execute("COMMIT")
+        except Exception as e:
+            logger.warning(f"❌ チャット一括保存失敗: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            self.metrics.record(len(batch), len(batch), time.perf_counter() - started)
+            # ROLLBACK に失敗した接続は使い続けられないため、例外はスレッドの終了処理に任せる
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            return
+
+        self.metrics.record(len(batch), len(errors), time.perf_counter() - started)
+        for index, (_, future) in enumerate(batch):
+            if index in errors:
+                future.set_exception(errors[index])
+            else:
+                future.set_result(True)
+
+
+def _fail(future, error):
+    """
+    Future を失敗にする（write() 側で取り消し済み・結果設定済みなら何もしない）
+    """
+    if future.done():
+        return
+    try:
+        future.set_exception(error)
+    except InvalidStateError:
+        # 直前に write() がタイムアウトで取り消した
+        pass
@@ -6,85 +6,33 @@ C9 コミュニティ情報管理部
 """
 
 import logging
-from flask import request, jsonify, g
+from flask import request, jsonify
 import sqlite3
 import os
 import re
 import datetime
 import uuid
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from .chat_broker import chat_broker
+from .chat_writer import ChatWriter
+from .chat_archive import read_archived_thread
+# DB接続は共通DBアクセス層から取得する（get_db はリクエスト単位で接続を再利用）
+from database.connection import DB_PATH, get_db, close_db
+from database.dates import to_day
+from database.ids import uuid7
+from database.invalidation import InvalidatedCache, bus
+from database.tag_names import intern_tag_name
 
 logger = logging.getLogger(__name__)
 
-# DBパスを定義（相対パス指定）
-DB_PATH = os.path.join(os.path.dirname(__file__), "../../instance/messages.db")
+# チャットメッセージのグループコミット用ライタ（ワーカー内で共有）
+chat_writer = ChatWriter(DB_PATH)
 
-def get_db():
-    """
-    SQLiteデータベース接続取得
-    Returns:
-        sqlite3.Connection: DB接続オブジェクト
-    """
-    if 'db' not in g:
-        g.db = sqlite3.connect(DB_PATH)
-        g.db.row_factory = sqlite3.Row
-    return g.db
-
-def close_db(e=None):
-    """
-    Flaskアプリケーション終了時のDBクローズ処理
-    """
-    db = g.pop('db', None)
-    if db is not None:
-        db.close()
-
-def init_db():
-    """
-    DB初期化関数: テーブルが存在しない場合は作成
-    """
-    db = sqlite3.connect(DB_PATH)
-    db.execute("""
-        CREATE TABLE IF NOT EXISTS communities (
-            id TEXT PRIMARY KEY,
-            name TEXT UNIQUE NOT NULL,
-            image_path TEXT
-        )
-    """)
-    db.execute("""
-        CREATE TABLE IF NOT EXISTS template_tags (
-            id TEXT PRIMARY KEY,
-            community_id TEXT NOT NULL,
-            tag TEXT NOT NULL,
-            color_code TEXT NOT NULL,
-            FOREIGN KEY (community_id) REFERENCES communities(id),
-            UNIQUE (community_id, tag)
-        )
-    """)
-    db.execute("""
-        CREATE TABLE IF NOT EXISTS members (
-            id TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            community_id TEXT NOT NULL,
-            FOREIGN KEY (community_id) REFERENCES communities(id)
-        )
-    """)
-    db.execute("""
-        CREATE TABLE IF NOT EXISTS chat_messages (
-            id TEXT PRIMARY KEY,
-            community_id TEXT NOT NULL,
-            tag_id TEXT NOT NULL,
-            date TEXT NOT NULL,
-            sender_id TEXT NOT NULL,
-            sender_name TEXT NOT NULL,
-            message_content TEXT NOT NULL,
-            timestamp TEXT NOT NULL,
-            FOREIGN KEY (community_id) REFERENCES communities(id),
-            FOREIGN KEY (tag_id) REFERENCES template_tags(id)
-        )
-    """)
-    db.commit()
-    db.close()
-
-init_db()
+# コミュニティ情報（名前・画像・テンプレートタグ）のキャッシュ。キーはコミュニティID
+community_info_cache = InvalidatedCache("community_info", topics=("community", "template_tags"))
+# テンプレートタグのキャッシュ。キーはタグIDだが、変更の通知はコミュニティ単位なので全体を消す
+template_tag_cache = InvalidatedCache("template_tag", clear_on=("template_tags",))
 
 class CommunityManagement:
     """
@@ -153,6 +101,8 @@ class CommunityManagement:
             db.commit()
         except sqlite3.IntegrityError:
             return jsonify({"error": "既に存在します"}), 409
+        # 「存在しない」としてキャッシュしているプロセスがあれば消す
+        bus.publish("community", community_id)
 
         logger.info(f"✅ コミュニティ登録: {name}")
         return jsonify({
@@ -169,6 +119,14 @@ class CommunityManagement:
         if not community_id:
             return jsonify({"error": "コミュニティIDが未指定または不正です"}), 400
 
+        info = community_info_cache.get(community_id, lambda: self._load_community_info(community_id))
+        if info is None:
+            return jsonify({"error": f"ID {community_id} のコミュニティは存在しません"}), 404
+
+        return jsonify({"result": True, **info}), 200
+
+    def _load_community_info(self, community_id):
+        # get_community_info のキャッシュに載せる値（コミュニティが無ければ None）
         db = get_db()
         row = db.execute(
             "SELECT name, image_path FROM communities WHERE id = ?",
@@ -176,7 +134,7 @@ class CommunityManagement:
         ).fetchone()
 
         if not row:
-            return jsonify({"error": f"ID {community_id} のコミュニティは存在しません"}), 404
+            return None
 
         tag_rows = db.execute(
             "SELECT tag, color_code FROM template_tags WHERE community_id = ?",
@@ -184,12 +142,11 @@ class CommunityManagement:
         ).fetchall()
         tag_list = [{"tag": r["tag"], "colorCode": r["color_code"]} for r in tag_rows]
 
-        return jsonify({
-            "result": True,
+        return {
             "community_name": row["name"],
             "image_path": row["image_path"],
             "tags": tag_list
-        }), 200
+        }
 
     def updatecommunityInfo(self):
         """
@@ -234,18 +191,20 @@ class CommunityManagement:
 
             if tag_id and tag_id in current_tags:
                 if current_tags[tag_id] != tag_name:
+                    name_id = intern_tag_name(db, community_id, tag_name, color_code, update_color=True)
                     db.execute(
-                        "UPDATE template_tags SET tag = ?, color_code = ? WHERE id = ? AND community_id = ?",
-                        (tag_name, color_code, tag_id, community_id)
+                        "UPDATE template_tags SET tag = ?, color_code = ?, name_id = ? WHERE id = ? AND community_id = ?",
+                        (tag_name, color_code, name_id, tag_id, community_id)
                     )
                     logger.info(f"✅ タグ更新: ID={tag_id}, Name='{tag_name}'")
                 updated_tags_list.append({"id": tag_id, "tag": tag_name, "colorCode": color_code})
                 del current_tags[tag_id]
             else:
-                new_id = uuid.uuid4().hex
+                new_id = uuid7().hex
+                name_id = intern_tag_name(db, community_id, tag_name, color_code, update_color=True)
                 db.execute(
-                    "INSERT INTO template_tags (id, community_id, tag, color_code) VALUES (?, ?, ?, ?)",
-                    (new_id, community_id, tag_name, color_code)
+                    "INSERT INTO template_tags (id, community_id, tag, color_code, name_id) VALUES (?, ?, ?, ?, ?)",
+                    (new_id, community_id, tag_name, color_code, name_id)
                 )
                 logger.info(f"✅ 新規タグ追加: ID={new_id}, Name='{tag_name}'")
                 updated_tags_list.append({"id": new_id, "tag": tag_name, "colorCode": color_code})
@@ -258,6 +217,7 @@ class CommunityManagement:
             logger.info(f"✅ タグ削除: ID={tag_id_to_delete}")
 
         db.commit()
+        bus.publish("template_tags", community_id)
 
         return jsonify({
             "result": True,
@@ -271,29 +231,33 @@ class CommunityManagement:
         Args:
             community_id (str): コミュニティID
             tag_id (str): テンプレートタグID
-            data (dict): {date, message, sender_id}
+            data (dict): {date, message, sender_id}（date はルートで 'YYYY-MM-DD' に正規化済み）
         Returns:
             JSONレスポンス
         """
-        date = data.get("date", "").strip()
+        date = data.get("date") or ""
         message = data.get("message", "").strip()
         sender_id = data.get("sender_id", "").strip()
 
         if not all([community_id, tag_id, date, message, sender_id]):
             return jsonify({"post_status": False, "error": "必要な項目が不足しています。"}), 400
 
-        db = get_db()
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         try:
-            new_id = uuid.uuid4().hex
-            db.execute("""
-                INSERT INTO chat_messages
-                  (id, community_id, tag_id, date, sender_id, message_content, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-                (new_id, community_id, tag_id, date, sender_id, message, timestamp)
-            )
-            db.commit()
+            chat_writer.write({
+                "id": uuid7().hex,
+                "community_id": community_id,
+                "tag_id": tag_id,
+                "date": to_day(date),
+                "sender_id": sender_id,
+                "sender_name": sender_id,
+                "message_content": message,
+                "timestamp": timestamp
+            })
+        except FutureTimeoutError:
+            # 書き込み前にキューから取り消されているので、送り直しても重複しない
+            logger.warning("⚠️ チャット保存待ちがタイムアウトしました")
+            return jsonify({"post_status": False, "error": "混み合っています。時間をおいて再度送信してください。"}), 503
         except Exception as e:
             logger.warning(f"❌ チャット保存失敗: {e}")
             return jsonify({"post_status": False, "error": "メッセージ保存中にエラーが発生しました。"}), 500
@@ -304,6 +268,7 @@ class CommunityManagement:
             "message_content": message,
             "timestamp": timestamp
         }
+        chat_broker.publish((community_id, tag_id, date), new_message)
         return jsonify({"post_status": True, "new_message": new_message}), 201
 
     def get_chat_history(self, community_id, tag_id, date):
@@ -323,13 +288,22 @@ class CommunityManagement:
                 WHERE community_id = ? AND tag_id = ? AND date = ?
                 ORDER BY timestamp ASC
             """,
-                (community_id, tag_id, date)
+                (community_id, tag_id, to_day(date))
             ).fetchall()
+            # 古いスレッドは圧縮アーカイブに移動されているため併せて読む
+            archived = read_archived_thread(db, community_id, tag_id, date)
         except Exception as e:
             logger.warning(f"❌ チャット履歴取得失敗: {e}")
             return jsonify({"error": "チャット履歴の取得に失敗しました。"}), 500
 
         chat_history = [
+            {
+                "sender_id": m["sender_id"],
+                "sender_name": m["sender_id"],
+                "message_content": m["message_content"],
+                "timestamp": m["timestamp"]
+            } for m in archived
+        ] + [
             {
                 "sender_id": row["sender_id"],
                 "sender_name": row["sender_id"],
@@ -375,6 +349,14 @@ class CommunityManagement:
         if not template_tag_id:
             return jsonify({"error": "テンプレートタグIDが未入力です"})
 
+        template_tag = template_tag_cache.get(template_tag_id, lambda: self._load_template_tag(template_tag_id))
+        if not template_tag:
+            return jsonify({"error": f"ID {template_tag_id} のテンプレートタグは存在しません"}), 404
+
+        return jsonify({"result": True, "template_tag": template_tag})
+
+    def _load_template_tag(self, template_tag_id):
+        # get_template_tag_info_by_id のキャッシュに載せる値（タグが無ければ None）
         db = get_db()
         template_tag = db.execute(
             "SELECT id, tag, color_code, community_id FROM template_tags WHERE id = ?",
@@ -382,13 +364,11 @@ class CommunityManagement:
         ).fetchone()
 
         if not template_tag:
-            return jsonify({"error": f"ID {template_tag_id} のテンプレートタグは存在しません"}), 404
+            return None
 
-        template_tag = {
+        return {
             "id": template_tag["id"],
             "tag": template_tag["tag"],
             "color_code": template_tag["color_code"],
             "community_id": template_tag["community_id"]
         }
-
-        return jsonify({"result": True, "template_tag": template_tag})
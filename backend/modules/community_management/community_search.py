@@ -0,0 +1,82 @@
+"""
+C9 コミュニティ名検索インデックス
+communities.name を FTS5 (trigram トークナイザ) で索引付けし、
+前方一致・部分一致のコミュニティ検索を提供する。
+索引はトリガで communities と常に同期される。
+テーブル・トリガの作成はマイグレーション (database/migrations) で行う。
+"""
+
+import sqlite3
+
+# 1ページあたりの既定件数と上限
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+# trigram トークナイザは3文字未満の語を検索できない
+TRIGRAM_MIN_LENGTH = 3
+
+def _fts_phrase(query):
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _like_pattern(query):
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def search_communities(db, query, limit=DEFAULT_LIMIT, offset=0):
+    """
+    コミュニティ名で検索する
+    3文字以上は trigram 索引による部分一致、それ未満は name の索引による前方一致で探す。
+    前方一致するもの、名前の短いものを先に並べる。
+    Args:
+        db (sqlite3.Connection): DB接続
+        query (str): 検索文字列
+        limit (int): 取得件数
+        offset (int): 取得開始位置
+    Returns:
+        tuple[list[dict], bool]: (id, name, image_path を持つ検索結果, 次ページの有無)
+    """
+    params_tail = (query, limit + 1, offset)
+    order_by = "ORDER BY (substr(c.name, 1, length(?)) = ?) DESC, length(c.name), c.name LIMIT ? OFFSET ?"
+
+    if len(query) >= TRIGRAM_MIN_LENGTH:
+        try:
+            rows = db.execute(
+                f"""
+                SELECT c.id, c.name, c.image_path
+                FROM communities_fts f
+                JOIN communities c ON c.rowid = f.rowid
+                WHERE communities_fts MATCH ?
+                {order_by}
+                """,
+                (_fts_phrase(query), query) + params_tail
+            ).fetchall()
+        except sqlite3.OperationalError:
+            rows = db.execute(
+                f"""
+                SELECT c.id, c.name, c.image_path
+                FROM communities c
+                WHERE c.name LIKE ? ESCAPE '\\'
+                {order_by}
+                """,
+                (_like_pattern(query), query) + params_tail
+            ).fetchall()
+    else:
+        # UNIQUE 制約の索引を使った範囲検索で前方一致を取る
+        rows = db.execute(
+            f"""
+            SELECT c.id, c.name, c.image_path
+            FROM communities c
+            WHERE c.name >= ? AND c.name < ?
+            {order_by}
+            """,
+            (query, query + "\U0010ffff", query) + params_tail
+        ).fetchall()
+
+    has_more = len(rows) > limit
+    results = [
+        {"id": r[0], "name": r[1], "image_path": r[2]}
+        for r in rows[:limit]
+    ]
+    return results, has_more
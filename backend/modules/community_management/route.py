@@ -5,14 +5,25 @@ C9 コミュニティ情報管理部のルーティング
 作成者: 遠藤信輝
 """
 
-from flask import Blueprint, request
-from .community_management import CommunityManagement
+from flask import Blueprint, request, jsonify
+from database.dates import normalize_date
+from .community_management import CommunityManagement, chat_writer
 
 # Blueprint の定義（URLプレフィックス付き）
 management_bp = Blueprint("community_management", __name__, url_prefix="/community/manage")
 
-# サービスクラスのインスタンス化
-service = CommunityManagement()
+# サービスクラスのインスタンスはアプリケーション起動時（ワーカーごとに1回）に初期化される
+service: CommunityManagement = None
+
+
+def init_app(app_instance):
+    """
+    Flask アプリケーションの初期化時に CommunityManagement をセットアップする
+    チャット書き込みスレッドの書き込み先もアプリの DB に合わせる。
+    """
+    global service
+    service = CommunityManagement()
+    chat_writer.db_path = app_instance.config["DATABASE_PATH"]
 
 
 @management_bp.route("/info", methods=["GET"])
@@ -45,7 +56,12 @@ def post_chat(community_id, tag_id):
     Returns:
         Response: 送信成功201, 入力不正400, 保存失敗500
     """
-    return service.post_chat(community_id, tag_id, request.get_json())
+    data = request.get_json() or {}
+    if data.get("date"):
+        data["date"] = normalize_date(data["date"])
+        if not data["date"]:
+            return jsonify({"post_status": False, "error": "dateの形式が不正です（YYYY-MM-DD）"}), 400
+    return service.post_chat(community_id, tag_id, data)
 
 
 @management_bp.route("/<community_id>/tag/<tag_id>/chat", methods=["GET"])
@@ -60,9 +76,24 @@ def get_chat(community_id, tag_id):
         Response: 履歴取得成功200, エラー400/500
     """
     date = request.args.get("date", "").strip()
+    if date:
+        date = normalize_date(date)
+        if not date:
+            return jsonify({"error": "dateの形式が不正です（YYYY-MM-DD）"}), 400
     return service.get_chat_history(community_id, tag_id, date)
 
 
+@management_bp.route("/chat/writer/metrics", methods=["GET"])
+def get_chat_writer_metrics():
+    """
+    チャット書き込み部のグループコミット集計（バッチサイズ・COMMIT 所要時間）
+
+    Returns:
+        Response: 200 OK
+    """
+    return jsonify({"result": True, "metrics": chat_writer.metrics.snapshot()}), 200
+
+
 @management_bp.route("/user/<user_id>/communities-tags", methods=["GET"])
 def get_communities_tags_by_user(user_id):
     """
@@ -10,13 +10,24 @@ import datetime
 import os
 import re
 import uuid
-from flask import request, jsonify
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import request, jsonify, Response, stream_with_context
 from werkzeug.utils import secure_filename
 
-from modules.community_management.community_management import get_db, CommunityManagement
+from database.dates import to_day
+from database.ids import uuid7
+from database.invalidation import bus
+from database.tag_names import intern_tag_name
+from modules.community_management.community_management import get_db, chat_writer, CommunityManagement
+from modules.community_management.chat_broker import chat_broker, stream_events
+from modules.community_management.chat_archive import read_archived_thread
+from modules.community_management.community_search import search_communities, DEFAULT_LIMIT, MAX_LIMIT
+from modules.community_management.chat_search import search_chat_messages, MIN_QUERY_LENGTH
 
 logger = logging.getLogger(__name__)
 UPLOAD_ROOT = "uploads"
+# SSE のハートビート間隔（秒）
+CHAT_STREAM_HEARTBEAT = 15.0
 
 class CommunityService:
     """
@@ -62,6 +73,7 @@ class CommunityService:
                 (image_path, new_id)
             )
             db.commit()
+        bus.publish("community", new_id)
 
         return jsonify({
             "result": True,
@@ -124,6 +136,39 @@ class CommunityService:
             "community_id": community_id
         }), 200
 
+    def search(self):
+        """
+        M14 コミュニティ名の前方一致・部分一致検索（オートコンプリート用）
+        クエリ: ?q=<検索文字列>&limit=<件数>&offset=<開始位置>
+        """
+        query = request.args.get("q", "").strip()
+        if not query:
+            return jsonify({"error": "検索文字列が未指定です"}), 400
+        if len(query) > 16:
+            return jsonify({"error": "16文字以内で指定してください"}), 400
+        try:
+            limit = min(max(int(request.args.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+            offset = max(int(request.args.get("offset", 0)), 0)
+        except ValueError:
+            return jsonify({"error": "limit と offset は整数で指定してください"}), 400
+
+        db = get_db()
+        results, has_more = search_communities(db, query, limit, offset)
+        communities = [
+            {
+                "id": c["id"],
+                "name": c["name"],
+                "iconUrl": f"/{c['image_path']}" if c["image_path"] else "/icons/default.png"
+            }
+            for c in results
+        ]
+        return jsonify({
+            "communities": communities,
+            "offset": offset,
+            "limit": limit,
+            "has_more": has_more
+        }), 200
+
     def get_joined_communities(self):
         """
         M9 指定されたユーザが所属している全てのコミュニティ情報を取得する。
@@ -205,12 +250,14 @@ class CommunityService:
                 return jsonify({"error": "タグ内容が未指定です"}), 400
             if not re.fullmatch(r"^[0-9a-fA-F]{6}$", color_code):
                 color_code = "000000"
-            new_id = uuid.uuid4().hex
+            new_id = uuid7().hex
+            name_id = intern_tag_name(db, community_id, tag_value, color_code, update_color=True)
             db.execute(
-                "INSERT INTO template_tags (id, community_id, tag, color_code) VALUES (?, ?, ?, ?)",
-                (new_id, community_id, tag_value, color_code)
+                "INSERT INTO template_tags (id, community_id, tag, color_code, name_id) VALUES (?, ?, ?, ?, ?)",
+                (new_id, community_id, tag_value, color_code, name_id)
             )
             db.commit()
+            bus.publish("template_tags", community_id)
             return jsonify({
                 "message": "タグを追加しました",
                 "template_tag_id": new_id,
@@ -229,11 +276,13 @@ class CommunityService:
                 return jsonify({"error": "タグ内容が未指定です"}), 400
             if not re.fullmatch(r"^[0-9a-fA-F]{6}$", color_code):
                 color_code = "000000"
+            name_id = intern_tag_name(db, community_id, tag_value, color_code, update_color=True)
             db.execute(
-                "UPDATE template_tags SET tag = ?, color_code = ? WHERE id = ? AND community_id = ?",
-                (tag_value, color_code, tag_id, community_id)
+                "UPDATE template_tags SET tag = ?, color_code = ?, name_id = ? WHERE id = ? AND community_id = ?",
+                (tag_value, color_code, name_id, tag_id, community_id)
             )
             db.commit()
+            bus.publish("template_tags", community_id)
             return jsonify({
                 "message": "タグを更新しました",
                 "template_tag_id": tag_id,
@@ -247,6 +296,7 @@ class CommunityService:
                 (tag_id, community_id)
             )
             db.commit()
+            bus.publish("template_tags", community_id)
             return jsonify({
                 "message": "タグを削除しました",
                 "template_tag_id": tag_id,
@@ -273,12 +323,13 @@ class CommunityService:
         ]
         return jsonify({"tags": tag_list}), 200
 
-    def post_chat(self, community_id, tag_id):
+    def post_chat(self, community_id, tag_id, data):
         """
         M8 チャットメッセージをデータベースに登録する。
+        Args:
+            data (dict): リクエストの本文（date はルートで 'YYYY-MM-DD' に正規化済み）
         """
-        data = request.get_json() or {}
-        date = data.get("date", "").strip()
+        date = data.get("date", "")
         message = data.get("message", "").strip()
         sender_id = data.get("sender_id", "").strip()
         sender_name = data.get("sender_name", "").strip()
@@ -288,25 +339,36 @@ class CommunityService:
         if len(message) > 200:
             return jsonify({"post_status": False, "error": "半角英数字200文字以内で入力してください。"}), 400
         
-        db = get_db()
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_id = uuid.uuid4().hex
+        new_id = uuid7().hex
         
         try:
-            db.execute(
-                "INSERT INTO chat_messages (id, community_id, tag_id, date, sender_id, sender_name, message_content, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                (new_id, community_id, tag_id, date, sender_id, sender_name, message, timestamp)
-            )
-            db.commit()
+            # グループコミットで永続化されるまで待ってから応答する
+            chat_writer.write({
+                "id": new_id,
+                "community_id": community_id,
+                "tag_id": tag_id,
+                "date": to_day(date),
+                "sender_id": sender_id,
+                "sender_name": sender_name,
+                "message_content": message,
+                "timestamp": timestamp
+            })
+        except FutureTimeoutError:
+            # 書き込み前にキューから取り消されているので、送り直しても重複しない
+            logger.warning("⚠️ チャット保存待ちがタイムアウトしました")
+            return jsonify({"post_status": False, "error": "混み合っています。時間をおいて再度送信してください。"}), 503
         except Exception as e:
             logger.warning(f"❌ チャット保存失敗: {e}")
             return jsonify({"post_status": False, "error": "メッセージ保存中にエラーが発生しました。"}), 500
         new_message = {"sender_id": sender_id, "sender_name": sender_name, "message_content": message, "timestamp": timestamp}
+        chat_broker.publish((community_id, tag_id, date), new_message)
         return jsonify({"post_status": True, "new_message": new_message}), 201
 
     def get_chat_history(self, community_id, tag_id, date):
         """
         M9 指定されたコミュニティ・タグ・日付に紐づくチャット履歴を取得する。
+        date はルートで 'YYYY-MM-DD' に正規化済み。
         """
         if not all([community_id, tag_id, date]):
             return jsonify({"error": "不正な入力です"}), 400
@@ -314,14 +376,65 @@ class CommunityService:
         try:
             rows = db.execute(
                 "SELECT sender_id, sender_name, message_content, timestamp FROM chat_messages WHERE community_id = ? AND tag_id = ? AND date = ? ORDER BY timestamp ASC",
-                (community_id, tag_id, date)
+                (community_id, tag_id, to_day(date))
             ).fetchall()
+            # 古いスレッドは圧縮アーカイブに移動されているため併せて読む
+            archived = read_archived_thread(db, community_id, tag_id, date)
         except Exception as e:
             logger.warning(f"❌ チャット履歴取得失敗: {e}")
             return jsonify({"error": "チャット履歴の取得に失敗しました。"}), 500
-        chat_history = [{"sender_id": r["sender_id"], "sender_name": r["sender_name"], "message_content": r["message_content"], "timestamp": r["timestamp"]} for r in rows]
+        chat_history = archived + [{"sender_id": r["sender_id"], "sender_name": r["sender_name"], "message_content": r["message_content"], "timestamp": r["timestamp"]} for r in rows]
         return jsonify({"chat_history": chat_history}), 200
 
+    def search_chat(self, community_id):
+        """
+        M15 コミュニティ内のチャットメッセージを全文検索する。
+        クエリ: ?q=<検索文字列>&limit=<件数>&offset=<開始位置>
+        空白区切りの各語は3文字以上で指定する。
+        """
+        query = request.args.get("q", "").strip()
+        if not community_id.strip() or not query:
+            return jsonify({"error": "コミュニティIDと検索文字列は必須です"}), 400
+        if len(query) > 200:
+            return jsonify({"error": "検索文字列は200文字以内で指定してください"}), 400
+        if any(len(term) < MIN_QUERY_LENGTH for term in query.split()):
+            return jsonify({"error": f"検索語は{MIN_QUERY_LENGTH}文字以上で指定してください"}), 400
+        try:
+            limit = min(max(int(request.args.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+            offset = max(int(request.args.get("offset", 0)), 0)
+        except ValueError:
+            return jsonify({"error": "limit と offset は整数で指定してください"}), 400
+
+        db = get_db()
+        try:
+            results, has_more = search_chat_messages(db, community_id, query, limit, offset)
+        except Exception as e:
+            logger.warning(f"❌ チャット検索失敗: {e}")
+            return jsonify({"error": "チャットの検索に失敗しました。"}), 500
+        return jsonify({
+            "messages": results,
+            "offset": offset,
+            "limit": limit,
+            "has_more": has_more
+        }), 200
+
+    def stream_chat(self, community_id, tag_id, date):
+        """
+        M13 指定されたコミュニティ・タグ・日付のチャットを Server-Sent Events で配信する。
+        接続時点以降の新着メッセージのみを送るため、過去分は M9 で取得すること。
+        Last-Event-ID ヘッダ（または last_event_id クエリ）があれば、その続きから再送する。
+        """
+        if not all([community_id, tag_id, date]):
+            return jsonify({"error": "不正な入力です"}), 400
+
+        last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+        sub = chat_broker.subscribe((community_id, tag_id, date), last_event_id)
+        return Response(
+            stream_with_context(stream_events(sub, heartbeat_interval=CHAT_STREAM_HEARTBEAT)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
     def get_community_members(self):
         """
         M7: 指定されたコミュニティIDに所属するユーザ一覧を取得する。
@@ -5,14 +5,40 @@ C4 コミュニティ処理部のルーティング
 担当者: 遠藤信輝
 """
 
-from flask import Blueprint, request
+from flask import Blueprint, jsonify, request
+
+from common.idempotency import idempotent
+from database.dates import normalize_date
 from .community_service import CommunityService
 
 # Blueprintオブジェクトの生成（プレフィックス付き）
 community_bp = Blueprint("community_service", __name__, url_prefix="/api/community")
 
-# サービスクラスのインスタンス化
-service = CommunityService()
+# サービスクラスのインスタンスはアプリケーション起動時（ワーカーごとに1回）に初期化される
+service: CommunityService = None
+
+
+def init_app(app_instance):
+    """
+    Flask アプリケーションの初期化時に CommunityService をセットアップする
+    """
+    global service
+    service = CommunityService()
+
+def _date_arg(date):
+    """
+    date を 'YYYY-MM-DD' に正規化する（未指定なら ""、日付として読めなければ None）
+    """
+    if isinstance(date, str):
+        date = date.strip()
+    if not date:
+        return ""
+    return normalize_date(date)
+
+
+def _invalid_date():
+    return jsonify({"error": "dateの形式が不正です（YYYY-MM-DD）"}), 400
+
 
 @community_bp.route("/create", methods=["POST"])
 def create():
@@ -50,20 +76,51 @@ def get_tags():
     return service.get_tags()
 
 @community_bp.route("/<string:community_id>/tag/<string:tag_id>/chat/post", methods=["POST"])
+@idempotent
 def post_chat(community_id, tag_id):
     """
     M8: チャット投稿処理
     """
-    return service.post_chat(community_id, tag_id)
+    data = request.get_json() or {}
+    data["date"] = _date_arg(data.get("date"))
+    if data["date"] is None:
+        return jsonify({"post_status": False, "error": "dateの形式が不正です（YYYY-MM-DD）"}), 400
+    return service.post_chat(community_id, tag_id, data)
 
 @community_bp.route("/<string:community_id>/tag/<string:tag_id>/chat/history", methods=["GET"])
 def get_chat_history(community_id, tag_id):
     """
     M9: チャット履歴取得処理
     """
-    date = request.args.get("date", "").strip()
+    date = _date_arg(request.args.get("date"))
+    if date is None:
+        return _invalid_date()
     return service.get_chat_history(community_id, tag_id, date)
 
+@community_bp.route("/<string:community_id>/chat/search", methods=["GET"])
+def search_chat(community_id):
+    """
+    M15: チャット全文検索処理
+    """
+    return service.search_chat(community_id)
+
+@community_bp.route("/<string:community_id>/tag/<string:tag_id>/chat/stream", methods=["GET"])
+def stream_chat(community_id, tag_id):
+    """
+    M13: チャット新着配信処理（Server-Sent Events）
+    """
+    date = _date_arg(request.args.get("date"))
+    if date is None:
+        return _invalid_date()
+    return service.stream_chat(community_id, tag_id, date)
+
+@community_bp.route("/search", methods=["GET"])
+def search():
+    """
+    M14: コミュニティ名検索処理
+    """
+    return service.search()
+
 @community_bp.route("/joined", methods=["GET"])
 def get_joined_communities():
     """
@@ -0,0 +1,191 @@
+# C6 マッチング処理部 バックグラウンドマッチング（タグ追加イベントの処理）
+"""
+C10 の tag_added イベントを受け取り、ワーカースレッドで新しいタグのマッチング相手を探して
+C7 通知処理部に LINE 通知を渡す（宛先ごとに一定時間ためて1通にまとめてから送られる）。
+タグ追加の応答はイベントをキューに積んだ時点で返し、マッチング・通知の完了を待たせない。
+通知するのはまだ通知していない（notified=False の）タグの登録者だけで、通知を渡すタグは
+C10 で notified=True にする（同じ名前・日付のタグが増えるたびに、前からいる人へ通知し直さない）。
+キューが一杯のときはイベントを保留リストに入れ、キューが空き次第ワーカーが積み直す
+（保留リストも一杯のときだけ捨てて警告を出す。タグの保存自体は成功している）。
+
+設定（app.config、未指定なら環境変数）:
+- AUTO_MATCHING (AUTO_MATCHING_ENABLED): 有効/無効（既定: 有効）
+- MATCH_WORKERS: ワーカースレッド数（既定: 2）
+- MATCH_QUEUE_SIZE: キューに積めるイベント数の上限（既定: 1000。保留リストも同じ件数まで）
+件数・キュー待ち時間・処理時間・キューの残り件数は monitoring.metrics の background_* に
+queue="tag_matching" で記録する。
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from monitoring.metrics import record_event, record_event_duration, track_queue_depth
+
+logger = logging.getLogger(__name__)
+
+QUEUE_NAME = "tag_matching"
+
+DEFAULT_WORKERS = int(os.getenv("MATCH_WORKERS", "2"))
+DEFAULT_QUEUE_SIZE = int(os.getenv("MATCH_QUEUE_SIZE", "1000"))
+
+
+class MatchWorkerPool:
+    """
+    タグ追加イベントを処理するワーカースレッドのプール
+    スレッドは最初のイベントで起動する（fork 後のワーカーでも各プロセスで起動し直す）。
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            workers (int): ワーカースレッド数
+            queue_size (int): キューに積めるイベント数の上限
+        """
+        self.app = None
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue = queue.Queue(queue_size)
+        self._lock = threading.Lock()
+        # キューが一杯のときに積めなかったイベント（上限は queue_size 件）
+        self._overflow = deque()
+        self._overflow_lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+        track_queue_depth(QUEUE_NAME, lambda: self._queue.qsize())
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(self.queue_size)
+            self._overflow = deque()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"match-worker-{n}", daemon=True)
+                for n in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    def on_tag_added(self, sender, tag, **kwargs):
+        """
+        tag_added の受信関数。イベントをキューに積むだけで、すぐに戻る
+        Args:
+            tag (dict): 追加されたタグ（Tag.to_dict()）
+        """
+        self._ensure_started()
+        event = (tag, time.monotonic())
+        with self._overflow_lock:
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                if len(self._overflow) >= self.queue_size:
+                    record_event(QUEUE_NAME, "dropped")
+                    logger.warning(f"⚠️ マッチングキューと保留リストが一杯のためイベントを破棄しました: tag={tag.get('id')}")
+                    return
+                # キューが一杯の間は、処理を終えたワーカーがキューへ積み直す
+                self._overflow.append(event)
+                record_event(QUEUE_NAME, "deferred")
+                return
+        record_event(QUEUE_NAME, "enqueued")
+
+    def _requeue_overflow(self):
+        """
+        保留リストのイベントを、キューに空きがある分だけ積み直す
+        """
+        with self._overflow_lock:
+            while self._overflow:
+                try:
+                    self._queue.put_nowait(self._overflow[0])
+                except queue.Full:
+                    return
+                self._overflow.popleft()
+
+    def wait_idle(self, timeout=None):
+        """
+        キューに積まれたイベントをすべて処理し終えるまで待つ（スクリプト・計測用）
+        Returns:
+            bool: timeout までに処理し終えたか
+        """
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def _run(self):
+        while True:
+            tag, enqueued_at = self._queue.get()
+            started = time.monotonic()
+            record_event_duration(QUEUE_NAME, "wait", started - enqueued_at)
+            try:
+                result = self.process(tag)
+            except Exception as e:
+                logger.warning(f"❌ バックグラウンドマッチング失敗: tag={tag.get('id')}, {e}")
+                result = "error"
+            record_event(QUEUE_NAME, result)
+            record_event_duration(QUEUE_NAME, "process", time.monotonic() - started)
+            # task_done の前に積み直し、wait_idle が保留中のイベントを残したまま戻らないようにする
+            self._requeue_overflow()
+            self._queue.task_done()
+
+    def process(self, tag):
+        """
+        追加されたタグ1件のマッチング相手を探し、相手と登録者への通知を C7 に渡す
+        通知するのは、マッチしたタグと追加されたタグのうち、まだ通知していないものの登録者だけ。
+        それらのタグは C10 で notified=True にしてから（1回の UPDATE）通知を渡す。
+        Args:
+            tag (dict): 追加されたタグ（Tag.to_dict()）
+        Returns:
+            str: "matched"（通知を渡した）/ "unmatched"（相手なし）/ "notified"（相手はいるが全員通知済み）
+        """
+        from extentions import db
+        from modules.calendar_manager.calendar_manager import CalendarManager
+        from modules.notification.coalescer import coalescer
+
+        with self.app.app_context():
+            manager = CalendarManager(db)
+            found = manager.find_matching_tag(
+                tag["community_id"], tag["name"], tag["date"], tag["submitter_id"]
+            )
+            if not found.get("result"):
+                raise RuntimeError(found.get("message"))
+            matched = found.get("data", [])
+            if not matched:
+                return "unmatched"
+            # 通知済みのタグは UPDATE の条件で除かれ、通知先に入らない
+            claimed = manager.mark_notified(
+                [t["id"] for t in matched] + [tag["id"]], tag["community_id"], tag["date"]
+            )
+        if not claimed.get("result"):
+            raise RuntimeError(claimed.get("message"))
+
+        user_ids = list(dict.fromkeys(claimed.get("data", [])))
+        if not user_ids:
+            return "notified"
+        for user_id in user_ids:
+            coalescer.add(user_id, tag["name"], tag["date"])
+        return "matched"
+
+
+match_workers = MatchWorkerPool()
+
+
+def init_app(app):
+    """
+    AUTO_MATCHING が有効なら、タグ追加イベントをバックグラウンドマッチングに流す
+    """
+    from modules.calendar_manager.calendar_manager import tag_added
+
+    enabled = app.config.setdefault(
+        "AUTO_MATCHING", os.getenv("AUTO_MATCHING_ENABLED", "1").lower() in ("1", "true", "yes")
+    )
+    if not enabled:
+        return
+    match_workers.app = app
+    match_workers.workers = int(app.config.setdefault("MATCH_WORKERS", DEFAULT_WORKERS))
+    match_workers.queue_size = int(app.config.setdefault("MATCH_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+    tag_added.connect(match_workers.on_tag_added)
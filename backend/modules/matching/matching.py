@@ -1,19 +1,37 @@
 # C6マッチング処理部の機能が実装されたMatchingクラスを定義するプログラム 作成者: 浅野勇翔
 
-import requests
+import os
 from typing import List
 
+from common.service_client import service_client
+
+
+def matching_user_ids(tags) -> List[str]:
+    """
+    マッチしたタグのうち、通知未送信(notified=False) のものの submitter_id の一覧
+
+    Args:
+        tags (list[dict]): C10 M5 マッチングタグ取得の data（Tag.to_dict() のリスト）
+    """
+    return [
+        tag["submitter_id"]
+        for tag in tags
+        if not tag.get("notified", False)
+    ]
+
 
 class Matching:
     """
     C6 マッチング処理部
     """
     
-    def __init__(self, base_url: str = "http://localhost:5001"):
+    def __init__(self, base_url: str = None):
         """
         Args:
             base_url (str): API サーバーのベース URL
+                            （省略時は環境変数 FLASK_URL、未設定なら http://localhost:5001）
         """
+        base_url = base_url or os.getenv("FLASK_URL", "http://localhost:5001")
         self.base_url = base_url.rstrip("/")
 
         
@@ -51,7 +69,7 @@ class Matching:
         }
 
         try:
-            resp = requests.get(endpoint, json=payload)
+            resp = service_client.get(endpoint, json=payload)
             resp.raise_for_status()
             data = resp.json()
         except Exception:
@@ -62,9 +80,4 @@ class Matching:
             # API が失敗を返したときも空リスト
             return []
 
-        submitter_ids = [
-            tag["submitter_id"]
-            for tag in data.get("data", [])
-            if not tag.get("notified", False)
-        ]
-        return submitter_ids
\ No newline at end of file
+        return matching_user_ids(data.get("data", []))
\ No newline at end of file
@@ -0,0 +1,56 @@
+# C6マッチング処理部の非同期版 AsyncMatchingクラス（ASGI モード用）
+
+import os
+from typing import List
+
+from .matching import matching_user_ids
+
+
+class AsyncMatching:
+    """
+    C6 マッチング処理部（非同期版）
+    Matching.find_matching_user と同じ結果を、aiohttp で C10 に問い合わせて返す。
+    """
+
+    def __init__(self, session, base_url: str = None):
+        """
+        Args:
+            session (aiohttp.ClientSession): 共有する HTTP セッション（接続を使い回す）
+            base_url (str): API サーバーのベース URL
+                            （省略時は環境変数 FLASK_URL、未設定なら http://localhost:5001）
+        """
+        self.session = session
+        base_url = base_url or os.getenv("FLASK_URL", "http://localhost:5001")
+        self.base_url = base_url.rstrip("/")
+
+    async def find_matching_user(
+        self,
+        community_id: str,
+        tag_name: str,
+        date: str,
+        registered_user_id: str
+    ) -> List[str]:
+        """
+        M6 マッチングユーザー取得処理（通知未送信のタグを投稿したユーザーIDのリスト）
+        エラーや該当なしの場合は空リストを返す。
+        """
+        endpoint = f"{self.base_url}/api/calendar-manager/find/matching_tags"
+        payload = {
+            "community_id":        community_id,
+            "tag_name":            tag_name,
+            "date":                date,
+            "registered_user_id":  registered_user_id
+        }
+
+        try:
+            async with self.session.get(endpoint, json=payload) as resp:
+                resp.raise_for_status()
+                data = await resp.json(content_type=None)
+        except Exception:
+            # 通信エラーやHTTPエラー時は空リスト
+            return []
+
+        if not data.get("result", False):
+            return []
+
+        return matching_user_ids(data.get("data", []))
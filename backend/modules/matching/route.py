@@ -2,9 +2,21 @@
 
 from flask import Blueprint, request, jsonify
 from .matching import Matching
+from . import match_worker
 
 matching_bp = Blueprint('matching', __name__, url_prefix='/api/matching')
-matching = Matching()
+
+# Matchingのインスタンスはアプリケーション起動時（ワーカーごとに1回）に初期化される
+matching: Matching = None
+
+def init_app(app_instance):
+    """
+    Flaskアプリケーションインスタンスの初期化時にMatchingをセットアップします。
+    """
+    global matching
+    matching = Matching()
+    # タグ追加時のバックグラウンドマッチング・通知（AUTO_MATCHING_ENABLED=0 で無効）
+    match_worker.init_app(app_instance)
 
 @matching_bp.route('/', methods=['GET'])
 def request_matching():
@@ -0,0 +1,175 @@
+# C7 通知処理部 マッチング通知のまとめ送信
+"""
+マッチング通知を宛先ごとに一定時間（NOTIFY_COALESCE_SECONDS、既定 30 秒）ためて、1通にまとめて送る
+1週間分のタグをまとめて登録したときなど、同じ相手への通知が続けて発生しても
+ウィンドウ内のマッチ（タグ名, 日付）を一覧にした1通だけを送り、LINE の送信枠を節約する。
+ウィンドウは宛先ごとに最初の通知から数える（後から来た通知で送信が延びることはない）。
+同じ（タグ名, 日付）は1回だけ載せる。NOTIFY_COALESCE_SECONDS=0 ならためずにすぐ送る。
+
+受け付けた通知数・送ったメッセージ数は monitoring.metrics の background_events_total
+（queue="match_notify"）に記録し、節約率は snapshot() と GET /api/notification/coalescing/metrics で返す。
+"""
+
+import logging
+import os
+import threading
+import time
+
+from monitoring.metrics import record_event, record_event_duration, track_queue_depth
+
+logger = logging.getLogger(__name__)
+
+QUEUE_NAME = "match_notify"
+
+DEFAULT_WINDOW = float(os.getenv("NOTIFY_COALESCE_SECONDS", "30"))
+
+
+def format_match_message(pairs):
+    """
+    マッチした（タグ名, 日付）の一覧から通知文を作る
+    Args:
+        pairs (list[tuple[str, str]]): （タグ名, 日付）のリスト
+    Returns:
+        str: 通知文
+    """
+    if len(pairs) == 1:
+        tag_name, date = pairs[0]
+        return f"{date} の「{tag_name}」でマッチしました！"
+    lines = [f"{len(pairs)}件の予定でマッチしました！"]
+    lines += [f"・{date} {tag_name}" for tag_name, date in sorted(pairs, key=lambda p: (p[1], p[0]))]
+    return "\n".join(lines)
+
+
+class NotificationCoalescer:
+    """
+    宛先ごとにマッチング通知をためて、ウィンドウが閉じたら1通にまとめて送る
+    送信スレッドは最初の通知で起動する（fork 後のワーカーでも各プロセスで起動し直す）。
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        """
+        Args:
+            window (float): 宛先ごとに通知をためる秒数（0 ならためない）
+        """
+        self.window = window
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._pid = None
+        self._notification = None
+        self._stats = {"received": 0, "messages": 0, "failed_messages": 0}
+        track_queue_depth(QUEUE_NAME, lambda: len(self._pending))
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._pending = {}
+            threading.Thread(target=self._run, name="notify-coalescer", daemon=True).start()
+            self._pid = os.getpid()
+
+    def add(self, user_id, tag_name, date):
+        """
+        user_id 宛てのマッチング通知を1件受け付ける（すぐに戻る）
+        Args:
+            user_id (str): 通知先ユーザのLINE ID
+            tag_name (str): マッチしたタグ名
+            date (str): マッチした日付
+        """
+        record_event(QUEUE_NAME, "received")
+        if self.window <= 0:
+            with self._cond:
+                self._stats["received"] += 1
+            self._send(user_id, [(tag_name, date)], time.monotonic())
+            return
+
+        self._ensure_started()
+        with self._cond:
+            self._stats["received"] += 1
+            entry = self._pending.get(user_id)
+            if entry is None:
+                now = time.monotonic()
+                # [到着時刻, 送信時刻, 一覧（dict で重複を除き、順序を保つ）, 受け付けた通知数]
+                entry = self._pending[user_id] = [now, now + self.window, {}, 0]
+                self._cond.notify()
+            entry[2][(tag_name, date)] = None
+            entry[3] += 1
+
+    def flush(self):
+        """
+        ためている通知をすべてすぐに送る（終了時・計測用）
+        """
+        with self._cond:
+            due, self._pending = self._pending, {}
+        for user_id, (received_at, _, pairs, _) in due.items():
+            self._send(user_id, list(pairs), received_at)
+
+    def snapshot(self):
+        """
+        集計値を dict で返す
+        received: 受け付けた通知数、messages: まとめた後に送ったメッセージ数、
+        saved_ratio: まとめたことで送らずに済んだ割合（送信済みの分で計算する）
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["pending_recipients"] = len(self._pending)
+            pending = sum(entry[3] for entry in self._pending.values())
+        sent_for = stats["received"] - pending
+        stats["saved_ratio"] = round(1 - stats["messages"] / sent_for, 4) if sent_for > 0 else 0
+        stats["window_seconds"] = self.window
+        return stats
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                now = time.monotonic()
+                due = {user_id: entry for user_id, entry in self._pending.items() if entry[1] <= now}
+                if not due:
+                    self._cond.wait(min(entry[1] for entry in self._pending.values()) - now)
+                    continue
+                for user_id in due:
+                    del self._pending[user_id]
+            for user_id, (received_at, _, pairs, _) in due.items():
+                self._send(user_id, list(pairs), received_at)
+
+    def _send(self, user_id, pairs, received_at):
+        record_event_duration(QUEUE_NAME, "wait", time.monotonic() - received_at)
+        record_event(QUEUE_NAME, "sent")
+        with self._cond:
+            self._stats["messages"] += 1
+        try:
+            futures = self._get_notification().submit_match_message([user_id], format_match_message(pairs))
+        except Exception as e:
+            logger.warning(f"❌ マッチング通知の送信失敗: to={user_id}, {e}")
+            self._count_failure()
+            return
+        for future in futures:
+            future.add_done_callback(lambda f: f.exception() is not None and self._count_failure())
+
+    def _count_failure(self):
+        record_event(QUEUE_NAME, "failed")
+        with self._cond:
+            self._stats["failed_messages"] += 1
+
+    def _get_notification(self):
+        # LINE クライアントの生成は重いので、最初の送信で1回だけ行う
+        if self._notification is None:
+            from .notification import Notification
+
+            with self._cond:
+                if self._notification is None:
+                    self._notification = Notification()
+        return self._notification
+
+
+coalescer = NotificationCoalescer()
+
+
+def init_app(app):
+    """
+    app.config（未指定なら環境変数 NOTIFY_COALESCE_SECONDS）のウィンドウ幅を反映する
+    """
+    coalescer.window = float(app.config.setdefault("NOTIFY_COALESCE_SECONDS", DEFAULT_WINDOW))
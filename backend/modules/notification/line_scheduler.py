@@ -0,0 +1,255 @@
+# C7 通知処理部 LINE 送信スケジューラ
+"""
+LINE Messaging API の push をチャネルの上限レート内で送るスケジューラ
+- チャネル（アクセストークン）ごとにトークンバケットで送信レートを制限する
+  （LINE_PUSH_RATE_PER_SECOND・LINE_PUSH_BURST。既定はチャネルあたりの push 上限 2,000 件/秒）
+- 送信待ちは優先度付きキュー: マッチング通知（PRIORITY_MATCH）を一括送信（PRIORITY_BULK）より先に送る
+  （送信スレッドが取り出し済みの分だけは追い越せないが、最大でもスレッド数の件数）
+- 429 を受けたら Retry-After の秒数だけチャネル全体の送信を止め、同じメッセージを送り直す
+  （429 は回数に数えない。5xx・通信エラーは最大 LINE_PUSH_MAX_ATTEMPTS 回まで送り直す）
+  送り直しには同じ X-Line-Retry-Key を付けるので、受け付け済みのメッセージが二重に届くことはない
+- キューの残り件数・待ち時間・送信時間は monitoring.metrics の background_* に
+  queue="line_push.match" / "line_push.bulk" で記録する
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+from monitoring.metrics import record_event, record_event_duration, record_line_push, track_queue_depth
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_MATCH = 0
+PRIORITY_BULK = 1
+PRIORITY_NAMES = {PRIORITY_MATCH: "match", PRIORITY_BULK: "bulk"}
+
+DEFAULT_RATE = float(os.getenv("LINE_PUSH_RATE_PER_SECOND", "2000"))
+DEFAULT_BURST = float(os.getenv("LINE_PUSH_BURST", "0")) or None
+DEFAULT_WORKERS = int(os.getenv("LINE_SEND_WORKERS", "16"))
+MAX_ATTEMPTS = int(os.getenv("LINE_PUSH_MAX_ATTEMPTS", "5"))
+# Retry-After が無い 429、5xx・通信エラーで送り直すまで待つ秒数
+DEFAULT_RETRY_SECONDS = 1.0
+
+
+class TokenBucket:
+    """
+    rate 件/秒で補充され、最大 burst 件まで貯まるトークンバケット（スレッド間で共有する）
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        トークンを1つ取る（取れるまで待つ）
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        seconds 秒間トークンを出さない（429 の Retry-After）。再開後は空のバケットから補充する
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+class _PushJob:
+    def __init__(self, user_id, messages, priority):
+        self.user_id = user_id
+        self.messages = messages
+        self.priority = priority
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+        self.sent_once = False
+        # 5xx・通信エラーで失敗した回数（429 は数えない）
+        self.failures = 0
+        # 送り直しても LINE 側で1通として扱われるよう、ジョブごとに固定する
+        self.retry_key = str(uuid.uuid4())
+
+
+class LineSendScheduler:
+    """
+    1チャネル分の送信キューと送信スレッド
+    スレッドは最初の submit() で起動する（fork 後のワーカーでも各プロセスで起動し直す）。
+    """
+
+    def __init__(self, line_bot_api, rate=DEFAULT_RATE, burst=DEFAULT_BURST, workers=DEFAULT_WORKERS,
+                 max_attempts=MAX_ATTEMPTS):
+        """
+        Args:
+            line_bot_api (linebot.LineBotApi): 送信に使うクライアント
+            rate (float): チャネルの送信上限（件/秒）
+            burst (float, optional): 一度に送ってよい件数（省略時は rate）
+            workers (int): 送信スレッド数（LINE の応答待ちを重ねるため複数にする）
+            max_attempts (int): 1件あたりの最大送信回数
+        """
+        self.line_bot_api = line_bot_api
+        self.bucket = TokenBucket(rate, burst)
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._heap = []
+        self._seq = itertools.count()
+        self._depth = {priority: 0 for priority in PRIORITY_NAMES}
+        self._cond = threading.Condition()
+        self._pid = None
+        for priority, name in PRIORITY_NAMES.items():
+            track_queue_depth(f"line_push.{name}", lambda p=priority: self._depth[p])
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._heap = []
+            self._depth = {priority: 0 for priority in PRIORITY_NAMES}
+            for n in range(self.workers):
+                threading.Thread(target=self._run, name=f"line-sender-{n}", daemon=True).start()
+            self._pid = os.getpid()
+
+    def submit(self, user_id, messages, priority=PRIORITY_MATCH):
+        """
+        push 1件を送信キューに積む
+        Returns:
+            concurrent.futures.Future: 送信できたら True、送れなかったら LineBotApiError などの例外
+        """
+        self._ensure_started()
+        job = _PushJob(user_id, messages, priority)
+        self._put(job)
+        record_event(self._queue_name(job), "enqueued")
+        return job.future
+
+    def _queue_name(self, job):
+        return f"line_push.{PRIORITY_NAMES[job.priority]}"
+
+    def _put(self, job):
+        with self._cond:
+            heapq.heappush(self._heap, (job.priority, next(self._seq), job))
+            self._depth[job.priority] += 1
+            self._cond.notify()
+
+    def _take(self):
+        with self._cond:
+            while not self._heap:
+                self._cond.wait()
+            _, _, job = heapq.heappop(self._heap)
+            self._depth[job.priority] -= 1
+            return job
+
+    def _run(self):
+        while True:
+            job = self._take()
+            self.bucket.acquire()
+            if not job.sent_once:
+                record_event_duration(self._queue_name(job), "wait", time.monotonic() - job.enqueued_at)
+                job.sent_once = True
+            self._send(job)
+
+    def _send(self, job):
+        from linebot.exceptions import LineBotApiError
+        from requests.exceptions import RequestException
+
+        started = time.monotonic()
+        try:
+            self.line_bot_api.push_message(job.user_id, messages=job.messages, retry_key=job.retry_key)
+        except LineBotApiError as e:
+            if e.status_code == 409 and e.accepted_request_id:
+                # 前回の送信が LINE 側で受け付け済みだった
+                self._finish(job, started, "sent")
+                return
+            if e.status_code == 429:
+                retry_after = _retry_after_seconds(e.headers)
+                self.bucket.pause(retry_after)
+                logger.warning(f"⚠️ LINE のレート制限（429）: {retry_after}秒送信を止めます")
+                record_event(self._queue_name(job), "rate_limited")
+                self._put(job)
+            elif e.status_code >= 500:
+                self._retry(job, started, e, "server_error")
+            else:
+                self._fail(job, started, e)
+        except RequestException as e:
+            self._retry(job, started, e, "connection_error")
+        except Exception as e:
+            self._fail(job, started, e)
+        else:
+            self._finish(job, started, "sent")
+
+    def _retry(self, job, started, error, reason):
+        record_event(self._queue_name(job), reason)
+        job.failures += 1
+        if job.failures >= self.max_attempts:
+            self._fail(job, started, error)
+            return
+        time.sleep(DEFAULT_RETRY_SECONDS)
+        self._put(job)
+
+    def _finish(self, job, started, result):
+        record_event(self._queue_name(job), result)
+        record_event_duration(self._queue_name(job), "process", time.monotonic() - started)
+        record_line_push(True)
+        job.future.set_result(True)
+
+    def _fail(self, job, started, error):
+        logger.warning(f"❌ LINE送信エラー: to={job.user_id}, {error}")
+        record_event(self._queue_name(job), "failed")
+        record_event_duration(self._queue_name(job), "process", time.monotonic() - started)
+        record_line_push(False)
+        job.future.set_exception(error)
+
+
+def _retry_after_seconds(headers):
+    value = (headers or {}).get("Retry-After") or (headers or {}).get("retry-after")
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_SECONDS
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(channel_access_token, rate=None, burst=None):
+    """
+    チャネルごとに1つのスケジューラを返す（Notification のインスタンスをまたいで共有する）
+    Args:
+        channel_access_token (str): チャネルアクセストークン
+        rate (float, optional): このチャネルの送信上限（件/秒。省略時は LINE_PUSH_RATE_PER_SECOND）
+        burst (float, optional): 一度に送ってよい件数（省略時は LINE_PUSH_BURST、未設定なら rate）
+    """
+    scheduler = _schedulers.get(channel_access_token)
+    if scheduler is None:
+        from linebot import LineBotApi
+
+        with _schedulers_lock:
+            scheduler = _schedulers.get(channel_access_token)
+            if scheduler is None:
+                scheduler = _schedulers[channel_access_token] = LineSendScheduler(
+                    LineBotApi(channel_access_token), rate or DEFAULT_RATE, burst or DEFAULT_BURST
+                )
+    return scheduler
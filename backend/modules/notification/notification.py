@@ -1,30 +1,46 @@
 # C7通知処理部の機能が実装されたNotificationクラスを定義するプログラム　作成者: 浅野勇翔
 
+import logging
 import os
+from concurrent.futures import wait
 from pathlib import Path
-from dotenv import load_dotenv
-from linebot import LineBotApi
-from linebot.models import TextSendMessage
-from linebot.exceptions import LineBotApiError
+
+from .line_scheduler import PRIORITY_BULK, PRIORITY_MATCH, get_scheduler
+
+logger = logging.getLogger(__name__)
+
+# send_match_message が送信の完了を待つ上限（秒）。429 が続いても呼び出し元のスレッドを止め続けない
+PUSH_WAIT_SECONDS = float(os.getenv("LINE_PUSH_WAIT_SECONDS", "30"))
+
+# LINE SDK・dotenv は読み込みに時間がかかるため、通知処理を使うときに初めて import する
+# 送信はチャネルごとの送信スケジューラ（line_scheduler.py）が上限レート内で行う
 
 class Notification:
     """
     C7 通知処理部
     """
 
-    def __init__(self):
+    def __init__(self, wait_seconds=None):
         """
         コンストラクタ
-        LINEMessagingAPIとの接続を確立する
+        LINEMessagingAPIとの接続を確立する（送信スケジューラはチャネルごとに共有する）
+        Args:
+            wait_seconds (float, optional): send_match_message が送信を待つ上限（省略時は LINE_PUSH_WAIT_SECONDS）
         """
+        self.wait_seconds = PUSH_WAIT_SECONDS if wait_seconds is None else float(wait_seconds)
         
+        from dotenv import load_dotenv
+
         env_path = Path(__file__).parent
         load_dotenv(dotenv_path=env_path)
-        self.__line_bot_api = LineBotApi(os.getenv('LINE_MESSAGING_API_ACCESS_TOKEN'))
+        self.__scheduler = get_scheduler(os.getenv('LINE_MESSAGING_API_ACCESS_TOKEN'))
         
     def send_match_message(self, user_ids, message):
         """
         M2通知送信に対応。指定されたユーザに指定されたメッセージをLINEMessagingAPIにより通知する
+        一括送信より優先して送り、全員への送信が終わるまで待つ（最大 wait_seconds 秒）。
+        レート制限（429）の間は失敗にせず、Retry-After の後に送り直す。
+        待ち時間を過ぎたら False を返す（送り終えていない分は送信キューに残り、後で送られる）。
         
         Args:
             user_ids (list[str]): メッセージを通知するユーザのLINE IDのリスト
@@ -34,12 +50,38 @@ class Notification:
             bool: 処理の成否(True=成功,False=失敗)
         """
         
-        messages = TextSendMessage(text=message)
-        
-        try:
-            for user_id in user_ids:
-                self.__line_bot_api.push_message(user_id, messages=messages)
-            return True
-        except LineBotApiError as e:
-            print(f"LINE送信エラー: {e}")
+        futures = self.submit_match_message(user_ids, message)
+        done, not_done = wait(futures, timeout=self.wait_seconds)
+        if not_done:
+            logger.warning(f"⚠️ LINE 通知の送信が {self.wait_seconds} 秒以内に終わりませんでした（未完了 {len(not_done)} 件）")
             return False
+        # 失敗の内容は送信スケジューラがログに出す
+        return all(future.exception() is None for future in done)
+
+    def submit_match_message(self, user_ids, message):
+        """
+        send_match_message と同じ優先度で送信キューに積み、送信の完了は待たない
+
+        Returns:
+            list[concurrent.futures.Future]: ユーザごとの送信結果（成功で True）
+        """
+        return self.__submit(user_ids, message, PRIORITY_MATCH)
+
+    def send_bulk_message(self, user_ids, message):
+        """
+        お知らせなどの一括送信。マッチング通知の後回しで送り、送信の完了は待たない
+
+        Args:
+            user_ids (list[str]): メッセージを通知するユーザのLINE IDのリスト
+            message (str): 送信する文言
+
+        Returns:
+            list[concurrent.futures.Future]: ユーザごとの送信結果（成功で True）
+        """
+        return self.__submit(user_ids, message, PRIORITY_BULK)
+
+    def __submit(self, user_ids, message, priority):
+        from linebot.models import TextSendMessage
+
+        messages = TextSendMessage(text=message)
+        return [self.__scheduler.submit(user_id, messages, priority) for user_id in user_ids]
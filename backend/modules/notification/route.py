@@ -2,9 +2,29 @@
 
 from flask import Blueprint, request, jsonify
 from .notification import Notification
+from .coalescer import coalescer, init_app as init_coalescer
 
 notification_bp = Blueprint('notification', __name__, url_prefix='/api/notification')
 
+
+def init_app(app_instance):
+    """
+    マッチング通知をまとめて送るウィンドウ幅（NOTIFY_COALESCE_SECONDS）を設定する
+    """
+    init_coalescer(app_instance)
+
+
+@notification_bp.route('/coalescing/metrics', methods=['GET'])
+def get_coalescing_metrics():
+    """
+    マッチング通知のまとめ送信の集計（受け付けた通知数・送ったメッセージ数・節約率）
+
+    Returns:
+        Response: 200 OK
+    """
+    return jsonify({"result": True, "metrics": coalescer.snapshot()}), 200
+
+
 @notification_bp.route('/notify', methods=['POST'])
 def send_notify():
     """
@@ -19,12 +39,14 @@ def send_notify():
     Request JSON:
         {
             "user_ids": [str, ...],  # 通知対象ユーザのLINE ID (Uで始まる文字列)
-            "message": str           # 通知メッセージ本文
+            "message": str,          # 通知メッセージ本文
+            "priority": "bulk"       # 省略可。一括送信として後回しで送り、送信を待たずに 202 を返す
         }
 
     Returns:
         flask.Response: JSON形式のレスポンスを返却
         - 200 OK: 通知送信成功
+        - 202 Accepted: 一括送信を受け付けた（priority=bulk）
         - 400 Bad Request: ユーザID未指定・形式不正またはメッセージ未指定 (E1)
         - 502 Bad Gateway: LINE API通信失敗 (E2)
         - 500 Internal Server Error: 想定外のシステムエラー
@@ -43,6 +65,10 @@ def send_notify():
     
     try:    
         ntf = Notification()
+        if data.get("priority") == "bulk":
+            ntf.send_bulk_message(user_ids, message)
+            return jsonify({"msg": "送信受付", "result": True, "queued": len(user_ids)}), 202
+
         send_result = ntf.send_match_message(user_ids, message)
         
         # メッセージ送信結果によって対応したjsonを返す
@@ -18,6 +18,16 @@ except ImportError:
 # Blueprintの定義。URLプレフィックスは /api となっている
 user_bp = Blueprint('users', __name__, url_prefix='/api')
 
+# UserDataManagementのインスタンスはアプリケーション起動時（ワーカーごとに1回）に初期化される
+um: UserDataManagement = None
+
+def init_app(app_instance):
+    """
+    Flaskアプリケーションインスタンスの初期化時にUserDataManagementをセットアップします。
+    """
+    global um
+    um = UserDataManagement()
+
 @user_bp.route('/users/search', methods=['GET'])
 def search_user_data():
     """
@@ -29,7 +39,6 @@ def search_user_data():
         user_logger.warning("User ID is missing for search request.")
         return jsonify({"message": "User ID is required"}), 400
     try:
-        um = UserDataManagement()
         found, user = um.user_data_search(user_id)
         if found:
             user_logger.info(f"User data found for ID: {user_id}")
@@ -58,7 +67,6 @@ def create_sid():
         user_logger.warning("user_id is missing for SID creation request.")
         return jsonify({"message": "user_id is required"}), 400
     try:
-        um = UserDataManagement()
         sid = um.make_sid(user_id)
         if sid:
             user_logger.info(f"SID created for user_id {user_id}.")
@@ -82,7 +90,6 @@ def delete_sid():
         user_logger.warning("SID is missing for deletion request.")
         return jsonify({"message": "SID is required"}), 400
     try:
-        um = UserDataManagement()
         result = um.delete_sid(sid)
         if result:
             user_logger.info(f"SID {sid} deleted successfully.")
@@ -110,7 +117,6 @@ def register_user_data():
         user_logger.warning("Missing required fields for user registration.")
         return jsonify({"message": "Missing required fields"}), 400
     try:
-        um = UserDataManagement()
         result = um.register_user_data(user_id, hashed_pw, name, email, icon)
         if result:
             user_logger.info(f"User {user_id} registered successfully.")
@@ -138,7 +144,6 @@ def update_user_data():
         user_logger.warning("User ID is missing for update request.")
         return jsonify({"message": "User ID is required"}), 400
     try:
-        um = UserDataManagement()
         result = um.update_user_data(user_id, hashed_pw, name, email, icon)
         if result:
             user_logger.info(f"User {user_id} updated successfully.")
@@ -161,7 +166,6 @@ def find_login_user_route():
         user_logger.warning("find_login_user_route: email is missing or invalid")
         return jsonify({"error": "email パラメータが必要です"}), 400
     try:
-        um = UserDataManagement()
         found, user = um.find_login_user(email)
         if found:
             user_logger.info(f"find_login_user_route: User found for email {email}")
@@ -186,7 +190,6 @@ def validate_sid_route():
         user_logger.warning("validate_sid_route: user_id or sid is missing")
         return jsonify({"error": "user_id and sid are required"}), 400
     try:
-        um = UserDataManagement()
         valid = um.validate_sid(user_id, sid)
         return jsonify({"valid": valid}), 200
     except Exception as e:
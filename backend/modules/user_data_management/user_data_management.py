@@ -1,5 +1,4 @@
 import sqlite3
-import os
 import secrets  # SID生成用
 import logging  # コーディング規約に沿ってログ出力を設定」
 
@@ -14,8 +13,12 @@ except ImportError:
     logging.basicConfig(level=logging.INFO)
     user_management_logger = logging.getLogger(__name__)
 
-# DBファイルのパスは環境変数または設定ファイルで管理することを推奨
-DATABASE_NAME = os.getenv('DATABASE_NAME', 'instance/messages.db')
+from database.connection import get_db
+from database.invalidation import InvalidatedCache, bus
+
+# ユーザ情報のキャッシュ（キーは user_id）と、SID の持ち主のキャッシュ（キーは sid）
+user_cache = InvalidatedCache("user", topics=("users",))
+sid_cache = InvalidatedCache("sid", topics=("user_auth",))
 
 
 class UserDataManagement:
@@ -23,68 +26,10 @@ class UserDataManagement:
     C8 ユーザ情報管理部のM1 ユーザ情報管理主処理クラスに対応。
     C2ユーザ認証処理部やC3ユーザ情報処理部よりユーザデータを受け取り、
     ユーザデータを各処理メソッドで処理し、各コンポーネントに返却する。
+    DB接続は共通DBアクセス層 (database.connection) からリクエスト単位で取得する。
+    テーブルはマイグレーション (database/migrations) で作成する。
     """
 
-    def __init__(self):
-        self.conn = None
-        self.cursor = None
-        self._connect_db()
-        self._create_tables_if_not_exists()
-
-    def _connect_db(self):
-        """データベースに接続する内部メソッド"""
-        try:
-            os.makedirs(os.path.dirname(DATABASE_NAME), exist_ok=True)
-            self.conn = sqlite3.connect(DATABASE_NAME)
-            self.conn.row_factory = sqlite3.Row
-            self.cursor = self.conn.cursor()
-            user_management_logger.info(f"Connected to database: {DATABASE_NAME}")
-        except sqlite3.Error as e:
-            user_management_logger.error(f"Database connection error: {e}")
-            raise
-
-    def _close_db(self):
-        """データベース接続を閉じる内部メソッド"""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
-            self.cursor = None
-            user_management_logger.info("Database connection closed.")
-
-    def _create_tables_if_not_exists(self):
-        """
-        F1 ユーザ情報とF2 ユーザ認証情報のテーブルを作成
-        """
-        try:
-            self._connect_db()
-            self.cursor.execute(
-                '''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id TEXT PRIMARY KEY,
-                    user_name TEXT NOT NULL,
-                    email TEXT NOT NULL UNIQUE,
-                    password TEXT NOT NULL,
-                    profile_image TEXT
-                )
-                '''
-            )
-            self.cursor.execute(
-                '''
-                CREATE TABLE IF NOT EXISTS user_auth (
-                    user_id TEXT NOT NULL,
-                    sid TEXT PRIMARY KEY,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id)
-                )
-                '''
-            )
-            self.conn.commit()
-            user_management_logger.info("Tables 'users' and 'user_auth' checked/created successfully.")
-        except sqlite3.Error as e:
-            user_management_logger.error(f"Error creating tables: {e}")
-            raise
-        finally:
-            self._close_db()
-
     def user_data_search(self, user_id):
         """
         M2 ユーザ情報検索処理に対応
@@ -92,29 +37,32 @@ class UserDataManagement:
         """
         user_management_logger.info(f"Searching user data for user_id: {user_id}")
         try:
-            self._connect_db()
-            self.cursor.execute(
-                "SELECT user_id, user_name, email, password, profile_image FROM users WHERE user_id = ?",
-                (user_id,)
-            )
-            user_data = self.cursor.fetchone()
-            if user_data:
-                user_dict = {
-                    "id": user_data["user_id"],
-                    "name": user_data["user_name"],
-                    "email": user_data["email"],
-                    "password": user_data["password"],
-                    "icon": user_data["profile_image"]
-                }
-                return True, user_dict
-            else:
-                user_management_logger.warning(f"User data not found for ID: {user_id}. (E2)")
-                return False, {}
+            user_dict = user_cache.get(user_id, lambda: self._load_user(user_id))
         except sqlite3.Error as e:
             user_management_logger.error(f"Database error during user data search: {e}")
             raise
-        finally:
-            self._close_db()
+        if user_dict:
+            # 呼び出し元が書き換えてもキャッシュに影響しないようにコピーを返す
+            return True, dict(user_dict)
+        user_management_logger.warning(f"User data not found for ID: {user_id}. (E2)")
+        return False, {}
+
+    def _load_user(self, user_id):
+        # user_data_search のキャッシュに載せる値（ユーザが無ければ None）
+        db = get_db()
+        user_data = db.execute(
+            "SELECT user_id, user_name, email, password, profile_image FROM users WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()
+        if not user_data:
+            return None
+        return {
+            "id": user_data["user_id"],
+            "name": user_data["user_name"],
+            "email": user_data["email"],
+            "password": user_data["password"],
+            "icon": user_data["profile_image"]
+        }
 
     def make_sid(self, user_id: str):
         """
@@ -124,12 +72,13 @@ class UserDataManagement:
         user_management_logger.info(f"Attempting to create SID for user_id: {user_id}")
         sid = secrets.token_urlsafe(16)
         try:
-            self._connect_db()
-            self.cursor.execute(
+            db = get_db()
+            db.execute(
                 "INSERT INTO user_auth (user_id, sid) VALUES (?, ?)",
                 (user_id, sid)
             )
-            self.conn.commit()
+            db.commit()
+            bus.publish("user_auth", sid)
             return sid
         except sqlite3.IntegrityError as e:
             user_management_logger.warning(f"SID creation failed for user_id {user_id}: {e}")
@@ -137,8 +86,6 @@ class UserDataManagement:
         except sqlite3.Error as e:
             user_management_logger.error(f"Database error during SID creation for user_id {user_id}: {e}")
             raise
-        finally:
-            self._close_db()
 
     def delete_sid(self, sid):
         """
@@ -146,15 +93,14 @@ class UserDataManagement:
         """
         user_management_logger.info(f"Attempting to delete SID: {sid}")
         try:
-            self._connect_db()
-            self.cursor.execute("DELETE FROM user_auth WHERE sid = ?", (sid,))
-            self.conn.commit()
-            return self.cursor.rowcount > 0
+            db = get_db()
+            cursor = db.execute("DELETE FROM user_auth WHERE sid = ?", (sid,))
+            db.commit()
+            bus.publish("user_auth", sid)
+            return cursor.rowcount > 0
         except sqlite3.Error as e:
             user_management_logger.error(f"Database error during SID deletion for {sid}: {e}")
             raise
-        finally:
-            self._close_db()
 
     def register_user_data(self, user_id, hashed_pw, name, email, icon):
         """
@@ -162,12 +108,13 @@ class UserDataManagement:
         """
         user_management_logger.info(f"Registering user data for user_id: {user_id}")
         try:
-            self._connect_db()
-            self.cursor.execute(
+            db = get_db()
+            db.execute(
                 "INSERT INTO users (user_id, user_name, email, password, profile_image) VALUES (?, ?, ?, ?, ?)",
                 (user_id, name, email, hashed_pw, icon)
             )
-            self.conn.commit()
+            db.commit()
+            bus.publish("users", user_id)
             return True
         except sqlite3.IntegrityError as e:
             user_management_logger.warning(f"User {user_id} or email {email} already exists: {e} (E3)")
@@ -175,8 +122,6 @@ class UserDataManagement:
         except sqlite3.Error as e:
             user_management_logger.error(f"Database error during user registration: {e}")
             raise
-        finally:
-            self._close_db()
 
     def update_user_data(self, user_id, hashed_pw=None, name=None, email=None, icon=None):
         """
@@ -207,18 +152,17 @@ class UserDataManagement:
         set_clause = ", ".join(update_fields)
 
         try:
-            self._connect_db()
-            self.cursor.execute(f"UPDATE users SET {set_clause} WHERE user_id = ?", tuple(params))
-            self.conn.commit()
-            return self.cursor.rowcount > 0
+            db = get_db()
+            cursor = db.execute(f"UPDATE users SET {set_clause} WHERE user_id = ?", tuple(params))
+            db.commit()
+            bus.publish("users", user_id)
+            return cursor.rowcount > 0
         except sqlite3.IntegrityError as e:
             user_management_logger.warning(f"Integrity error during user update for {user_id}: {e}")
             return False
         except sqlite3.Error as e:
             user_management_logger.error(f"Database error during user update for {user_id}: {e}")
             raise
-        finally:
-            self._close_db()
 
     def find_login_user(self, email: str) -> tuple[bool, dict]:
         """
@@ -229,12 +173,12 @@ class UserDataManagement:
         """
         user_management_logger.info(f"Searching login user for email: {email}")
         try:
-            self._connect_db()
-            self.cursor.execute(
+            db = get_db()
+            cursor = db.execute(
                 "SELECT user_id, user_name, email, password, profile_image FROM users WHERE email = ?",
                 (email,)
             )
-            row = self.cursor.fetchone()
+            row = cursor.fetchone()
             if row:
                 user = {
                     "id": row["user_id"],
@@ -250,8 +194,6 @@ class UserDataManagement:
         except sqlite3.Error as e:
             user_management_logger.error(f"Database error during login user search for {email}: {e}")
             raise
-        finally:
-            self._close_db()
 
     def validate_sid(self, user_id: str, sid: str) -> bool:
         """
@@ -262,15 +204,14 @@ class UserDataManagement:
         """
         user_management_logger.info(f"Validating SID for user_id: {user_id}, sid: {sid}")
         try:
-            self._connect_db()
-            self.cursor.execute(
-                "SELECT 1 FROM user_auth WHERE user_id = ? AND sid = ?",
-                (user_id, sid)
-            )
-            result = self.cursor.fetchone()
-            return result is not None
+            owner = sid_cache.get(sid, lambda: self._load_sid_owner(sid))
+            return owner is not None and owner == user_id
         except sqlite3.Error as e:
             user_management_logger.error(f"Database error during SID validation for user_id {user_id}: {e}")
             raise
-        finally:
-            self._close_db()
+
+    def _load_sid_owner(self, sid):
+        # validate_sid のキャッシュに載せる値（SID の持ち主の user_id。無ければ None）
+        db = get_db()
+        row = db.execute("SELECT user_id FROM user_auth WHERE sid = ?", (sid,)).fetchone()
+        return row["user_id"] if row else None
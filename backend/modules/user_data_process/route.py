@@ -9,6 +9,14 @@ from .user_data_process import UserDataProcess
 # Blueprintの定義。URLプレフィックスは /api/user とする
 user_data_bp = Blueprint('user_data', __name__, url_prefix='/api/user')
 
+user_process: UserDataProcess = None
+
+def init_app(app_instance):
+    """
+    Flaskアプリケーションインスタンスの初期化時にUserDataProcessをセットアップします。
+    """
+    global user_process
+    user_process = UserDataProcess()
 
 ## User Registration
 
@@ -37,7 +45,6 @@ def register_user():
     name = request.form.get("name")
     icon_file = request.files.get("icon_file") # request.files からファイルを取得
 
-    user_process = UserDataProcess()
     result = user_process.data_regist(email, password, name, icon_file) # icon_file を渡す
 
     if result["result"]:
@@ -76,7 +83,6 @@ def edit_user_data():
     icon_file = request.files.get("icon_file") # request.files からファイルを取得
     email = request.form.get("email")
 
-    user_process = UserDataProcess()
     result = user_process.data_edit(user_id, password, name, icon_file, email) # icon_file を渡す
 
     if result["result"]:
@@ -105,7 +111,6 @@ def get_user_data(user_id: str):
         - 404 Not Found: 該当するユーザデータがない場合 (E2)
         - 500 Internal Server Error: その他のシステムエラー
     """
-    user_process = UserDataProcess()
     result = user_process.data_get(user_id)
 
     if result["result"]:
@@ -4,10 +4,12 @@
 
 import uuid
 import hashlib
-import requests # requestsライブラリをインポート
+import requests # requestsライブラリをインポート（例外の型に使う）
 import os # ファイル操作のためにインポート
 from werkzeug.utils import secure_filename # ファイル名を安全にするためにインポート
 
+from common.service_client import service_client # C8 への呼び出しは共通クライアントで行う
+
 # アップロードされたアイコン画像を保存するルートディレクトリ
 # このパスはアプリケーションの実行環境に合わせて適宜変更してください
 UPLOAD_ROOT = "uploads/user_icons"
@@ -25,10 +27,14 @@ class UserDataProcess:
     # ここではホストとポートのみを指定します。
     C8_API_BASE_URL = "http://localhost:5001"  # Flaskアプリケーションのホストとポートに合わせて変更してください
 
-    def __init__(self):
+    def __init__(self, base_url: str = None):
         """
         コンストラクタ
+        Args:
+            base_url (str, optional): C8 のAPIのベースURL
+                                      （省略時は環境変数 FLASK_URL、未設定なら C8_API_BASE_URL）
         """
+        self.C8_API_BASE_URL = (base_url or os.getenv("FLASK_URL", self.C8_API_BASE_URL)).rstrip("/")
         # アイコン保存ディレクトリが存在しない場合は作成
         os.makedirs(UPLOAD_ROOT, exist_ok=True)
 
@@ -87,7 +93,7 @@ class UserDataProcess:
             "icon": icon_name  # 保存したアイコンのパスを渡す
         }
         try:
-            response = requests.post(f"{self.C8_API_BASE_URL}/api/users/register", json=register_payload)
+            response = service_client.post(f"{self.C8_API_BASE_URL}/api/users/register", json=register_payload)
             response_data = response.json()
 
             if response.status_code == 201:
@@ -191,7 +197,7 @@ class UserDataProcess:
         # C8 ユーザ情報管理部への更新を要求
         # エンドポイント: PUT /api/users/update
         try:
-            response = requests.put(f"{self.C8_API_BASE_URL}/api/users/update", json=update_payload)
+            response = service_client.put(f"{self.C8_API_BASE_URL}/api/users/update", json=update_payload)
             response_data = response.json()
 
             if response.status_code == 200:
@@ -221,7 +227,7 @@ class UserDataProcess:
         # C8 ユーザ情報管理部からのデータ取得を要求
         # エンドポイント: GET /api/users/search?id=<user_id>
         try:
-            response = requests.get(f"{self.C8_API_BASE_URL}/api/users/search", params={"id": user_id})
+            response = service_client.get(f"{self.C8_API_BASE_URL}/api/users/search", params={"id": user_id})
             response_data = response.json()
 
             if response.status_code == 200:
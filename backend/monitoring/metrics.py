@@ -0,0 +1,489 @@
+# backend/monitoring/metrics.py
+"""
+Prometheus テキスト形式のメトリクス（/metrics）
+外部サービスを使わず、プロセス内で集計して /metrics で返す。
+- http_requests_total / http_request_duration_seconds: Blueprint・ルートごとのリクエスト数と処理時間
+- db_connections_opened_total: connect() で開いた sqlite3 接続数
+- outbound_http_requests_total / outbound_http_request_duration_seconds:
+  コンポーネント間の API 呼び出し（C5→C10, C6→C10, C2/C3→C8 など）。
+  source は呼び出し元リクエストの Blueprint、target は呼び出し先 URL が自アプリのルートならその Blueprint、
+  それ以外は呼び出し先のホスト
+- line_push_total: LINE push の結果
+- cache_requests_total: キャッシュのヒット・ミス（record_cache() で各キャッシュが記録する）
+- service_client_retries_total / circuit_breaker_*: 共通 HTTP クライアント（common/service_client.py）の
+  再試行回数、サーキットブレーカの状態遷移・開いている間に拒否した呼び出し数・現在開いているか
+  （target は "<ホスト>/<コンポーネント>"。circuit_breaker_open は複数ワーカーでは合計＝開いているワーカー数になる）
+- background_events_total / background_event_duration_seconds / background_queue_depth:
+  バックグラウンド処理のキュー（タグ追加イベントのマッチング・通知など）ごとの
+  受け付け・処理結果の件数、キューでの待ち時間と処理時間、キューに残っている件数
+
+値はメトリクスごとのロックでスレッド間で安全に集計する。
+app.config["METRICS_MULTIPROC_DIR"]（環境変数 METRICS_MULTIPROC_DIR）を指定すると、
+各ワーカープロセスが集計値をそのディレクトリへ定期的に書き出し、/metrics は全ワーカーの合計を返す
+（gunicorn の複数ワーカー用。ディレクトリはデプロイのたびに空にする）。
+終了したワーカーのファイルはカウンタ・ヒストグラムだけ合計に含め、ゲージ（現在値）は捨てる
+（prometheus_client の mark_process_dead と同じ扱い。残すとワーカーの再起動のたびにゲージが増えていく）。
+"""
+
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from flask import Response, current_app, g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+# 処理時間ヒストグラムのバケット（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 複数プロセス集計時に各ワーカーが集計値を書き出す間隔（秒）
+FLUSH_INTERVAL = 1.0
+
+
+class Counter:
+    """
+    ラベル付きの単調増加カウンタ
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value, **labels):
+        """
+        他で数えている累計値をそのまま反映する
+        """
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def snapshot(self):
+        with self._lock:
+            return {key: value for key, value in self._values.items()}
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Counter):
+    """
+    ラベル付きの現在値（増減する値）
+    """
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self.set_total(value, **labels)
+
+
+class Histogram:
+    """
+    ラベル付きのヒストグラム（バケットごとの件数・合計・件数）
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # バケットごとの件数（+Inf を含む）, 合計
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {key: [list(counts), total] for key, (counts, total) in self._values.items()}
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Registry:
+    """
+    メトリクスの登録と Prometheus テキスト形式での出力
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, documentation, labelnames=()):
+        metric = Gauge(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def on_collect(self, callback):
+        """
+        出力の直前に呼ぶ処理（他で数えている値の反映など）を登録する
+        """
+        self._collectors.append(callback)
+
+    def snapshot(self):
+        """
+        全メトリクスの現在値（JSON にできる形）
+        """
+        for callback in self._collectors:
+            callback()
+        return {
+            metric.name: [[list(key), value] for key, value in metric.snapshot().items()]
+            for metric in self._metrics
+        }
+
+    def clear(self):
+        for metric in self._metrics:
+            metric.clear()
+
+    def render(self, snapshots):
+        """
+        1つ以上のスナップショットを合算して Prometheus テキスト形式にする
+        """
+        lines = []
+        for metric in self._metrics:
+            merged = {}
+            for snapshot in snapshots:
+                for key, value in snapshot.get(metric.name, []):
+                    key = tuple(key)
+                    if metric.kind != "histogram":
+                        merged[key] = merged.get(key, 0) + value
+                    else:
+                        counts, total = merged.get(key, ([0] * (len(metric.buckets) + 1), 0.0))
+                        merged[key] = ([a + b for a, b in zip(counts, value[0])], total + value[1])
+
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for key in sorted(merged):
+                labels = list(zip(metric.labelnames, key))
+                if metric.kind != "histogram":
+                    lines.append(f"{metric.name}{_labels(labels)} {_number(merged[key])}")
+                    continue
+                counts, total = merged[key]
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _number(bound)
+                    lines.append(f"{metric.name}_bucket{_labels(labels + [('le', le)])} {cumulative}")
+                lines.append(f"{metric.name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{metric.name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "処理したリクエスト数", ("blueprint", "route", "method", "status"))
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "リクエストの処理時間", ("blueprint", "route", "method"))
+DB_CONNECTIONS_OPENED = registry.counter(
+    "db_connections_opened_total", "connect() で開いた sqlite3 接続数")
+OUTBOUND_REQUESTS = registry.counter(
+    "outbound_http_requests_total", "外部 HTTP 呼び出し数", ("source", "target", "method", "status"))
+OUTBOUND_DURATION = registry.histogram(
+    "outbound_http_request_duration_seconds", "外部 HTTP 呼び出しの所要時間", ("source", "target", "method"))
+LINE_PUSH = registry.counter(
+    "line_push_total", "LINE push メッセージの送信結果", ("result",))
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total", "キャッシュの参照結果", ("cache", "result"))
+CACHE_INVALIDATIONS = registry.counter(
+    "cache_invalidations_total", "キャッシュの無効化数（local: 自プロセスの書き込み、remote: 他プロセスの変更ログ、flush: 全消去）",
+    ("cache", "source"))
+SERVICE_CLIENT_RETRIES = registry.counter(
+    "service_client_retries_total", "コンポーネント間 API 呼び出しの再試行数", ("target", "method", "reason"))
+CIRCUIT_BREAKER_TRANSITIONS = registry.counter(
+    "circuit_breaker_transitions_total", "サーキットブレーカの状態遷移", ("target", "state"))
+CIRCUIT_BREAKER_REJECTED = registry.counter(
+    "circuit_breaker_rejected_total", "サーキットが開いていて送らなかった呼び出し数", ("target",))
+CIRCUIT_BREAKER_OPEN = registry.gauge(
+    "circuit_breaker_open", "サーキットが開いている（半開を含む）なら 1", ("target",))
+IDEMPOTENCY_REQUESTS = registry.counter(
+    "idempotency_requests_total", "Idempotency-Key 付きリクエストの扱い", ("endpoint", "result"))
+BACKGROUND_EVENTS = registry.counter(
+    "background_events_total", "バックグラウンド処理のイベント数", ("queue", "result"))
+BACKGROUND_EVENT_DURATION = registry.histogram(
+    "background_event_duration_seconds", "イベントのキュー待ち時間（wait）と処理時間（process）", ("queue", "phase"))
+BACKGROUND_QUEUE_DEPTH = registry.gauge(
+    "background_queue_depth", "キューに残っているイベント数", ("queue",))
+
+
+def record_line_push(success):
+    """
+    LINE push 1件の結果を記録する
+    """
+    LINE_PUSH.inc(result="success" if success else "error")
+
+
+def record_cache(cache, hit):
+    """
+    キャッシュ参照1回の結果（ヒット・ミス）を記録する
+    """
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_cache_invalidation(cache, source):
+    """
+    キャッシュの無効化1回を記録する
+    """
+    CACHE_INVALIDATIONS.inc(cache=cache, source=source)
+
+
+def record_service_retry(target, method, reason):
+    """
+    共通 HTTP クライアントの再試行1回を記録する
+    """
+    SERVICE_CLIENT_RETRIES.inc(target=target, method=method, reason=reason)
+
+
+def record_circuit_state(target, state):
+    """
+    サーキットブレーカの状態遷移（closed / open / half_open）を記録する
+    """
+    CIRCUIT_BREAKER_TRANSITIONS.inc(target=target, state=state)
+    CIRCUIT_BREAKER_OPEN.set(0 if state == "closed" else 1, target=target)
+
+
+def record_circuit_rejected(target):
+    """
+    サーキットが開いていて送らなかった呼び出し1件を記録する
+    """
+    CIRCUIT_BREAKER_REJECTED.inc(target=target)
+
+
+def record_idempotency(endpoint, result):
+    """
+    Idempotency-Key 付きリクエスト1件の扱い（new / replayed / in_progress / mismatch）を記録する
+    """
+    IDEMPOTENCY_REQUESTS.inc(endpoint=endpoint, result=result)
+
+
+def record_event(queue, result):
+    """
+    バックグラウンド処理のイベント1件の結果（enqueued / dropped / 処理結果）を記録する
+    """
+    BACKGROUND_EVENTS.inc(queue=queue, result=result)
+
+
+def record_event_duration(queue, phase, seconds):
+    """
+    イベント1件のキュー待ち時間（phase="wait"）または処理時間（phase="process"）を記録する
+    """
+    BACKGROUND_EVENT_DURATION.observe(seconds, queue=queue, phase=phase)
+
+
+def track_queue_depth(queue, depth):
+    """
+    出力のたびに depth() でキューの残り件数を読むようにする
+    """
+    registry.on_collect(lambda: BACKGROUND_QUEUE_DEPTH.set(depth(), queue=queue))
+
+
+def _collect_db_connections():
+    from database.connection import connections_opened
+    DB_CONNECTIONS_OPENED.set_total(connections_opened())
+
+
+registry.on_collect(_collect_db_connections)
+
+
+# --- リクエスト・外部 HTTP 呼び出しの記録 ---
+
+def _start_request():
+    g._metrics_started = time.perf_counter()
+
+
+def record_request(blueprint, route, method, status, seconds):
+    """
+    処理したリクエスト1件を記録する（Flask を通らない ASGI のルートからも呼ぶ）
+    """
+    _flusher.ensure_started()
+    HTTP_REQUESTS.inc(blueprint=blueprint, route=route, method=method, status=status)
+    HTTP_REQUEST_DURATION.observe(seconds, blueprint=blueprint, route=route, method=method)
+
+
+def _finish_request(response):
+    started = g.pop("_metrics_started", None)
+    if started is None:
+        return response
+    record_request(
+        request.blueprint or "", request.url_rule.rule if request.url_rule else "<unmatched>",
+        request.method, response.status_code, time.perf_counter() - started
+    )
+    return response
+
+
+def _outbound_target(prepared):
+    """
+    呼び出し先 URL が自アプリのルートならその Blueprint 名、そうでなければホスト名
+    """
+    parts = urlsplit(prepared.url)
+    if has_request_context():
+        try:
+            endpoint, _ = current_app.url_map.bind(parts.netloc).match(parts.path, method=prepared.method)
+            return endpoint.rpartition(".")[0] or endpoint
+        except Exception:
+            pass
+    return parts.netloc
+
+
+def _record_outbound(prepared, response, seconds):
+    source = (request.blueprint or "") if has_request_context() else "background"
+    target = _outbound_target(prepared)
+    status = response.status_code if response is not None else "error"
+    OUTBOUND_REQUESTS.inc(source=source, target=target, method=prepared.method, status=status)
+    OUTBOUND_DURATION.observe(seconds, source=source, target=target, method=prepared.method)
+
+
+# --- 複数プロセスの集計 ---
+
+class _Flusher:
+    """
+    集計値をワーカーごとのファイル（<dir>/<pid>.json）へ定期的に書き出す
+    """
+
+    def __init__(self):
+        self.directory = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        # fork 後の子プロセスでは親の集計値を捨ててスレッドを起動し直す
+        if self.directory is None or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                registry.clear()
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name="metrics-flusher", daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        if self.directory is None:
+            return
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        try:
+            with open(path + ".tmp", "w") as f:
+                json.dump(registry.snapshot(), f)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.warning(f"⚠️ メトリクスの書き出しに失敗: {e}")
+
+    def collect(self):
+        """
+        全ワーカーのスナップショット（自プロセス分は最新の値、終了したワーカー分はゲージを除く）
+        """
+        snapshots = [registry.snapshot()]
+        own = os.path.join(self.directory, f"{os.getpid()}.json")
+        gauges = {metric.name for metric in registry._metrics if metric.kind == "gauge"}
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            if path == own:
+                continue
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not _pid_alive(os.path.basename(path)[:-len(".json")]):
+                snapshot = {name: values for name, values in snapshot.items() if name not in gauges}
+            snapshots.append(snapshot)
+        return snapshots
+
+
+def _pid_alive(name):
+    """
+    ファイル名の pid のプロセスが動いているか
+    """
+    try:
+        os.kill(int(name), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        # 別ユーザーのプロセスとして存在している
+        return True
+    return True
+
+
+_flusher = _Flusher()
+
+
+def metrics_view():
+    snapshots = _flusher.collect() if _flusher.directory else [registry.snapshot()]
+    return Response(registry.render(snapshots), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+def init_app(app):
+    """
+    METRICS が有効なら、リクエスト・外部 HTTP 呼び出しの記録と /metrics を組み込む
+    """
+    from monitoring.timing import observe_http
+
+    enabled = app.config.setdefault(
+        "METRICS", os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+    )
+    if not enabled:
+        return
+    directory = app.config.setdefault("METRICS_MULTIPROC_DIR", os.getenv("METRICS_MULTIPROC_DIR"))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        _flusher.directory = directory
+
+    observe_http(_record_outbound)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule("/metrics", view_func=metrics_view)
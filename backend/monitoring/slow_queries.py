@@ -0,0 +1,220 @@
+# backend/monitoring/slow_queries.py
+"""
+遅いクエリの記録
+すべての DB アクセス経路（CalendarManager の Tag.query、get_db() を使うコミュニティ管理・
+UserDataManagement、チャット書き込みスレッド）で、しきい値を超えた文を記録する。
+- 正規化した SQL（リテラルを ? に置き換え、空白をまとめる）
+- パラメータの形（値は記録せず、型と個数・キーだけ）
+- 所要時間と EXPLAIN QUERY PLAN（同じ SQL の実行計画はキャッシュする）
+ローテーションするファイルへ1件1行の JSON で書き出し、SQL ごとの集計を /admin/slow-queries で返す。
+実行計画に索引を使わない全件走査（SCAN <テーブル>）があれば full_scan として印を付ける。
+
+app.config["SLOW_QUERY_THRESHOLD_MS"]（環境変数 SLOW_QUERY_THRESHOLD_MS、既定 100）で閾値を、
+SLOW_QUERY_LOG（既定 instance/slow_queries.log）で出力先を指定する。
+SLOW_QUERY_ENABLED=0 で無効にする。/admin/slow-queries は SQL・実行計画を返すため、
+ADMIN_TOKEN を設定したときだけ登録し、X-Admin-Token ヘッダが一致する場合だけ応答する
+（未設定ならファイルへの記録だけを行う）。
+"""
+
+import hmac
+import json
+import logging
+import logging.handlers
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from flask import current_app, jsonify, request
+
+from monitoring.timing import COMMIT, observe_queries
+
+# 遅いクエリの書き出し先（ファイルだけに出し、アプリのログには流さない）
+logger = logging.getLogger(__name__)
+file_logger = logging.getLogger("monitoring.slow_queries.file")
+file_logger.propagate = False
+file_logger.setLevel(logging.INFO)
+
+DEFAULT_THRESHOLD_MS = 100
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# 集計・実行計画キャッシュに保持する SQL の種類数
+MAX_ENTRIES = 500
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """
+    リテラルを ? に置き換え、IN (?, ?, ...) と空白をまとめた SQL
+    """
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(?)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def parameters_shape(parameters):
+    """
+    パラメータの値を含まない形（位置パラメータは型の並び、名前付きはキーと型）
+    """
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return [type(value).__name__ for value in parameters]
+
+
+def _is_full_scan(plan):
+    return any(
+        detail.startswith("SCAN ") and "USING" not in detail and "VIRTUAL TABLE" not in detail
+        for detail in plan
+    )
+
+
+class SlowQueryLog:
+    """
+    しきい値を超えたクエリの記録と SQL ごとの集計
+    """
+
+    def __init__(self, threshold_ms=DEFAULT_THRESHOLD_MS):
+        self.threshold = threshold_ms / 1000
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._plans = {}
+
+    def configure(self, threshold_ms):
+        self.threshold = threshold_ms / 1000
+
+    def observe(self, conn, sql, parameters, seconds):
+        """
+        timing.observe_queries から全クエリについて呼ばれる
+        """
+        if seconds < self.threshold:
+            return
+        normalized = normalize_sql(sql)
+        plan = self._explain(conn, sql, parameters, normalized)
+        record = {
+            "sql": normalized,
+            "parameters": parameters_shape(parameters),
+            "duration_ms": round(seconds * 1000, 3),
+            "plan": plan,
+            "full_scan": _is_full_scan(plan or []),
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        file_logger.info(json.dumps(record, ensure_ascii=False))
+
+        with self._lock:
+            entry = self._entries.get(normalized)
+            if entry is None:
+                if len(self._entries) >= MAX_ENTRIES:
+                    return
+                entry = self._entries[normalized] = {
+                    "sql": normalized, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += record["duration_ms"]
+            entry["max_ms"] = max(entry["max_ms"], record["duration_ms"])
+            entry.update(
+                parameters=record["parameters"], plan=plan, full_scan=record["full_scan"], last_seen=record["at"]
+            )
+
+    def _explain(self, conn, sql, parameters, normalized):
+        """
+        EXPLAIN QUERY PLAN の detail 列（COMMIT・複数文・パラメータのない executemany などは None）
+        計測対象にならないよう sqlite3.Connection の execute を直接呼ぶ。
+        """
+        if sql is COMMIT:
+            return None
+        with self._lock:
+            if normalized in self._plans:
+                return self._plans[normalized]
+        try:
+            rows = sqlite3.Connection.execute(
+                conn, f"EXPLAIN QUERY PLAN {sql}", parameters if parameters is not None else ()
+            ).fetchall()
+            plan = [row[3] for row in rows]
+        except (sqlite3.Error, ValueError):
+            plan = None
+        with self._lock:
+            if len(self._plans) >= MAX_ENTRIES:
+                self._plans.clear()
+            self._plans[normalized] = plan
+        return plan
+
+    def summary(self, limit=20, sort="total_ms"):
+        with self._lock:
+            entries = [dict(e) for e in self._entries.values()]
+        for entry in entries:
+            entry["total_ms"] = round(entry["total_ms"], 3)
+            entry["avg_ms"] = round(entry["total_ms"] / entry["count"], 3)
+        entries.sort(key=lambda e: e.get(sort, 0), reverse=True)
+        return entries[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+
+
+slow_log = SlowQueryLog()
+
+
+def slow_queries_view():
+    token = current_app.config.get("ADMIN_TOKEN")
+    if not token or not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), token):
+        return jsonify({"result": False, "error": "forbidden"}), 403
+    sort = request.args.get("sort", "total_ms")
+    if sort not in ("total_ms", "max_ms", "avg_ms", "count"):
+        return jsonify({"result": False, "error": "sort は total_ms / max_ms / avg_ms / count のいずれかです"}), 400
+    limit = request.args.get("limit", 20, type=int)
+    return jsonify({
+        "result": True,
+        "threshold_ms": slow_log.threshold * 1000,
+        "queries": slow_log.summary(limit, sort),
+    }), 200
+
+
+def _attach_file_handler(path):
+    path = os.path.abspath(path)
+    for handler in file_logger.handlers:
+        if getattr(handler, "baseFilename", None) == path:
+            return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    file_logger.addHandler(handler)
+
+
+def init_app(app):
+    """
+    SLOW_QUERY_ENABLED が有効なら、全クエリの所要時間を監視して遅いクエリを記録する
+    """
+    enabled = app.config.setdefault(
+        "SLOW_QUERY_ENABLED", os.getenv("SLOW_QUERY_ENABLED", "1").lower() in ("1", "true", "yes")
+    )
+    if not enabled:
+        return
+    threshold_ms = float(app.config.setdefault(
+        "SLOW_QUERY_THRESHOLD_MS", os.getenv("SLOW_QUERY_THRESHOLD_MS", DEFAULT_THRESHOLD_MS)
+    ))
+    path = app.config.setdefault(
+        "SLOW_QUERY_LOG",
+        os.getenv("SLOW_QUERY_LOG", os.path.join(os.path.dirname(app.config["DATABASE_PATH"]), "slow_queries.log"))
+    )
+    app.config.setdefault("ADMIN_TOKEN", os.getenv("ADMIN_TOKEN"))
+
+    slow_log.configure(threshold_ms)
+    _attach_file_handler(path)
+    observe_queries(app, slow_log.observe)
+    if app.config["ADMIN_TOKEN"]:
+        app.add_url_rule("/admin/slow-queries", view_func=slow_queries_view)
+    else:
+        logger.info("ADMIN_TOKEN が未設定のため /admin/slow-queries は登録しません（記録はファイルのみ）")
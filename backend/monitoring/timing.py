@@ -0,0 +1,259 @@
+# backend/monitoring/timing.py
+"""
+リクエスト単位の処理時間計測
+リクエストごとに次の値を集計し、Server-Timing ヘッダと構造化ログ（1リクエスト1行の JSON）で出力する。
+- 処理全体の時間
+- DB クエリ数と DB 時間
+  （SQLAlchemy の Tag モデル等はエンジンのイベント、生 sqlite3 のモジュールは TimedConnection で計測）
+- 外部 HTTP 呼び出し（requests）の回数と時間（コンポーネント間の API 呼び出しを含む）
+
+app.config["REQUEST_TIMING"]（環境変数 REQUEST_TIMING=1）で有効にする。
+DB クエリ・外部 HTTP 呼び出しの計測は observe_queries / observe_http で登録した処理に通知する
+（遅いクエリの記録・メトリクスも同じ仕組みを使う）。
+"""
+
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+# 実行中のリクエストの計測値（計測していないときは None）
+_current = contextvars.ContextVar("request_timings", default=None)
+
+_requests_instrumented = False
+_http_observers = []
+_query_observers = []
+
+
+class RequestTimings:
+    """
+    1リクエスト分の計測値
+    """
+
+    __slots__ = ("started", "db_queries", "db_seconds", "http_calls", "http_seconds")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.http_calls = 0
+        self.http_seconds = 0.0
+
+    def add_query(self, seconds, count=1):
+        self.db_queries += count
+        self.db_seconds += seconds
+
+    def add_http(self, seconds):
+        self.http_calls += 1
+        self.http_seconds += seconds
+
+
+def current():
+    """
+    実行中のリクエストの計測値を返す（計測していなければ None）
+    """
+    return _current.get()
+
+
+# commit() の所要時間を通知するときの SQL
+COMMIT = "COMMIT"
+
+
+def observe_queries(app, observer):
+    """
+    DB クエリごとに observer(connection, sql, parameters, seconds) を呼ぶようにする
+    connection は実行に使った sqlite3 接続（EXPLAIN などに使える）。
+    parameters は executemany / executescript では None、commit() は sql=COMMIT で通知する。
+    """
+    if observer not in _query_observers:
+        _query_observers.append(observer)
+    _instrument_engines(app)
+
+
+def _notify_query(conn, sql, parameters, seconds):
+    for observer in _query_observers:
+        observer(conn, sql, parameters, seconds)
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    execute / executemany / executescript / commit の時間を計測する sqlite3 接続
+    database.connection.connect() が作る接続はすべてこのクラスになる。
+    sqlite3 のトレースコールバックは実行開始の通知だけで所要時間が取れないため、メソッドを包んで測る。
+    SQLAlchemy はカーソル経由で実行するため、ここでは数えず（エンジンのイベントで数える）二重計上しない。
+    観測する処理（observe_queries）が登録されていなければそのまま実行する。
+    """
+
+    def execute(self, sql, parameters=(), /):
+        if not _query_observers:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _notify_query(self, sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, sql, parameters, /):
+        if not _query_observers:
+            return super().executemany(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            _notify_query(self, sql, None, time.perf_counter() - started)
+
+    def executescript(self, sql, /):
+        if not _query_observers:
+            return super().executescript(sql)
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql)
+        finally:
+            _notify_query(self, sql, None, time.perf_counter() - started)
+
+    def commit(self):
+        if not _query_observers:
+            return super().commit()
+        started = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            _notify_query(self, COMMIT, None, time.perf_counter() - started)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if started:
+        _notify_query(
+            conn.connection.driver_connection, statement,
+            None if executemany else parameters, time.perf_counter() - started.pop()
+        )
+
+
+def _instrument_engines(app):
+    """
+    SQLAlchemy の全エンジン（通常・読み取り専用バインド）にクエリ計測のイベントを登録する
+    """
+    from sqlalchemy import event
+    from extentions import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+                event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _record_query(conn, sql, parameters, seconds):
+    timings = _current.get()
+    if timings is not None:
+        timings.add_query(seconds, count=0 if sql is COMMIT else 1)
+
+
+def observe_http(observer):
+    """
+    外部 HTTP 呼び出し（requests）ごとに observer(prepared, response, seconds) を呼ぶようにする
+    response は接続エラーなどで応答がなかった場合 None になる。
+    """
+    if observer not in _http_observers:
+        _http_observers.append(observer)
+    _instrument_requests()
+
+
+def _instrument_requests():
+    """
+    requests の Session.send を包み、外部 HTTP 呼び出しの時間を計測する
+    requests.get / post なども内部で Session.send を通る。
+    """
+    global _requests_instrumented
+    if _requests_instrumented:
+        return
+    import requests
+
+    original_send = requests.Session.send
+
+    def send(self, prepared, **kwargs):
+        started = time.perf_counter()
+        response = None
+        try:
+            response = original_send(self, prepared, **kwargs)
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            for observer in _http_observers:
+                observer(prepared, response, elapsed)
+
+    requests.Session.send = send
+    _requests_instrumented = True
+
+
+def _record_http(prepared, response, seconds):
+    timings = _current.get()
+    if timings is not None:
+        timings.add_http(seconds)
+
+
+def _start_request():
+    g._timing_token = _current.set(RequestTimings())
+
+
+def _finish_request(response):
+    timings = _current.get()
+    if timings is None:
+        return response
+    total_ms = (time.perf_counter() - timings.started) * 1000
+    db_ms = timings.db_seconds * 1000
+    http_ms = timings.http_seconds * 1000
+
+    response.headers.add(
+        "Server-Timing",
+        f'total;dur={total_ms:.1f}, '
+        f'db;desc="{timings.db_queries} queries";dur={db_ms:.1f}, '
+        f'http;desc="{timings.http_calls} calls";dur={http_ms:.1f}'
+    )
+    if not logger.isEnabledFor(logging.INFO):
+        return response
+    logger.info(json.dumps({
+        "event": "request_timing",
+        "method": request.method,
+        "path": request.url_rule.rule if request.url_rule else request.path,
+        "status": response.status_code,
+        "total_ms": round(total_ms, 2),
+        "db_queries": timings.db_queries,
+        "db_ms": round(db_ms, 2),
+        "http_calls": timings.http_calls,
+        "http_ms": round(http_ms, 2),
+    }, ensure_ascii=False))
+    return response
+
+
+def _end_request(e=None):
+    token = g.pop("_timing_token", None)
+    if token is not None:
+        _current.reset(token)
+
+
+def init_app(app):
+    """
+    REQUEST_TIMING が有効なら、リクエストごとの計測と出力を組み込む
+    """
+    enabled = app.config.setdefault(
+        "REQUEST_TIMING", os.getenv("REQUEST_TIMING", "0").lower() in ("1", "true", "yes")
+    )
+    if not enabled:
+        return
+    observe_queries(app, _record_query)
+    observe_http(_record_http)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_end_request)
@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+# backend ディレクトリをモジュールの検索パスに入れる（python -m pytest を backend 以外から実行しても import できるように）
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,135 @@
+# backend/tests/test_idempotency.py
+"""
+Idempotency-Key（common/idempotency.py）のテスト
+@idempotent を付けたテスト用のルートを持つ Flask アプリで、
+- 同じキーの2回目は保存済みの応答をそのまま返す（ビューは呼ばれない）
+- 最初のリクエストの処理中に来た同じキーは 409
+- 同じキーで本文が違うリクエストは 422
+- ビューが例外・エラー応答で終わったら行を消し、送り直しで処理し直す
+ことを確かめる。
+
+実行 (backend ディレクトリで):
+    python -m pytest tests
+"""
+
+import threading
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+from common import idempotency
+from common.idempotency import HEADER, idempotent
+from database import connection
+from database.migrate import migrate
+
+
+@pytest.fixture
+def app(tmp_path):
+    db_path = str(tmp_path / "idempotency.db")
+    migrate(db_path)
+    app = Flask(__name__)
+    app.config["DATABASE_PATH"] = db_path
+    connection.init_app(app)
+    app.calls = []
+    app.gate = None
+    app.outcome = "ok"
+
+    @app.route("/items", methods=["POST"])
+    @idempotent
+    def add_item():
+        app.calls.append(len(app.calls) + 1)
+        if app.gate is not None:
+            app.gate.wait(timeout=10)
+        if app.outcome == "raise":
+            raise RuntimeError("boom")
+        if app.outcome == "error":
+            return jsonify({"error": "failed"}), 400
+        return jsonify({"call": len(app.calls)}), 201
+
+    return app
+
+
+def _post(client, key, body=None):
+    return client.post("/items", json=body or {"name": "a"}, headers={HEADER: key})
+
+
+def _row(app, key):
+    with app.app_context():
+        return connection.get_db(readonly=False).execute(
+            "SELECT status FROM idempotency_keys WHERE scope = 'add_item' AND key = ?", (key,)
+        ).fetchone()
+
+
+def test_replay_returns_stored_response(app):
+    client = app.test_client()
+    first = _post(client, "k1")
+    second = _post(client, "k1")
+
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.get_json() == first.get_json() == {"call": 1}
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert app.calls == [1]
+
+
+def test_duplicate_while_in_progress_is_rejected(app):
+    app.gate = threading.Event()
+    results = {}
+    first = threading.Thread(target=lambda: results.setdefault("first", _post(app.test_client(), "k2")))
+    first.start()
+    try:
+        # 最初のリクエストがビューに入る（= 処理中の行が入る）まで待つ
+        for _ in range(1000):
+            if app.calls:
+                break
+            time.sleep(0.01)
+        assert app.calls == [1]
+        duplicate = _post(app.test_client(), "k2")
+    finally:
+        app.gate.set()
+        first.join(timeout=10)
+
+    assert duplicate.status_code == 409
+    assert duplicate.headers["Retry-After"] == "1"
+    assert results["first"].status_code == 201
+    assert app.calls == [1]
+
+
+def test_same_key_with_different_body_is_rejected(app):
+    client = app.test_client()
+    assert _post(client, "k3", {"name": "a"}).status_code == 201
+    mismatch = _post(client, "k3", {"name": "b"})
+
+    assert mismatch.status_code == 422
+    assert app.calls == [1]
+
+
+@pytest.mark.parametrize("outcome", ["raise", "error"])
+def test_failure_releases_key(app, outcome):
+    app.config["PROPAGATE_EXCEPTIONS"] = False
+    client = app.test_client()
+    app.outcome = outcome
+    failed = _post(client, "k4")
+    assert failed.status_code in (400, 500)
+    assert _row(app, "k4") is None
+
+    app.outcome = "ok"
+    retried = _post(client, "k4")
+    assert retried.status_code == 201
+    assert retried.get_json() == {"call": 2}
+    assert _row(app, "k4")["status"] == 201
+
+
+def test_abandoned_key_is_taken_over(app, monkeypatch):
+    monkeypatch.setattr(idempotency.store, "lock_seconds", 0.0)
+    client = app.test_client()
+    with app.test_request_context("/items", method="POST", json={"name": "a"}):
+        state, _ = idempotency.store.begin("add_item", "k5", idempotency._fingerprint())
+    assert state == "new"
+
+    # 処理中のまま lock_seconds を過ぎた行は、同じ内容の次のリクエストが引き継ぐ
+    time.sleep(0.01)
+    response = _post(client, "k5")
+    assert response.status_code == 201
+    assert app.calls == [1]
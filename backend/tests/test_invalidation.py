@@ -0,0 +1,95 @@
+# backend/tests/test_invalidation.py
+"""
+プロセス間キャッシュ無効化（database/invalidation.py）のテスト
+書き込みは spawn で起動した別プロセスが行い、このプロセスの InvalidatedCache が
+確認間隔（CACHE_INVALIDATION_INTERVAL_MS）+ 余裕 以内に新しい値を返すことを確かめる。
+
+実行 (backend ディレクトリで):
+    python -m pytest tests
+"""
+
+import multiprocessing
+import sqlite3
+import time
+
+from database.invalidation import PRUNE_EVERY, InvalidatedCache, InvalidationBus
+from database.migrate import migrate
+
+INTERVAL_MS = 200
+# プロセスの切り替え・DB 読み取りの分の余裕（1 CPU の環境でも収まる程度）
+SLACK_SECONDS = 0.5
+
+
+def _write(db_path, value, changes, retention, results):
+    """
+    別プロセスで値を書き換え、COMMIT 後に changes の (トピック, キー) を順に publish する
+    （最後の publish の時刻を返す）
+    """
+    bus = InvalidationBus(db_path, interval_ms=INTERVAL_MS, retention=retention)
+    db = sqlite3.connect(db_path)
+    db.execute("UPDATE kv SET value = ? WHERE key = 'k'", (value,))
+    db.commit()
+    db.close()
+    for topic, key in changes:
+        bus.publish(topic, key)
+    results.put(time.time())
+
+
+def _run_writer(db_path, value, changes, retention=3600.0):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_write, args=(db_path, value, changes, retention, results))
+    process.start()
+    published_at = results.get(timeout=60)
+    process.join(timeout=60)
+    assert process.exitcode == 0
+    return published_at
+
+
+def _setup(tmp_path, interval_ms=INTERVAL_MS):
+    db_path = str(tmp_path / "invalidation.db")
+    migrate(db_path)
+    db = sqlite3.connect(db_path)
+    db.execute("CREATE TABLE kv (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    db.execute("INSERT INTO kv VALUES ('k', 'v1')")
+    db.commit()
+
+    def load():
+        return db.execute("SELECT value FROM kv WHERE key = 'k'").fetchone()[0]
+
+    bus = InvalidationBus(db_path, interval_ms=interval_ms)
+    cache = InvalidatedCache("test", topics=("test",), bus=bus)
+    return db_path, db, bus, cache, load
+
+
+def test_remote_change_visible_within_interval(tmp_path):
+    db_path, db, bus, cache, load = _setup(tmp_path)
+    assert cache.get("k", load) == "v1"
+    # publish しない書き換えはキャッシュに隠れる（キャッシュが効いている）
+    db.execute("UPDATE kv SET value = 'v2' WHERE key = 'k'")
+    db.commit()
+    assert cache.get("k", load) == "v1"
+
+    published_at = _run_writer(db_path, "v3", [("test", "k")])
+    deadline = published_at + INTERVAL_MS / 1000 + SLACK_SECONDS
+    while cache.get("k", load) != "v3":
+        assert time.time() < deadline, "別プロセスの書き込みが確認間隔 + 余裕 以内に見えない"
+        time.sleep(0.005)
+    assert time.time() - published_at <= INTERVAL_MS / 1000 + SLACK_SECONDS
+
+
+def test_pruned_change_log_flushes_cache(tmp_path):
+    db_path, db, bus, cache, load = _setup(tmp_path, interval_ms=0)
+    assert cache.get("k", load) == "v1"
+    last_seq = bus._last_seq
+
+    # 別プロセスが値を書き換えて "test" の変更を publish した後、関係のないトピックを PRUNE_EVERY 回 publish し、
+    # retention=0 で古い変更ログ（"test" の行を含む）を削除する
+    _run_writer(db_path, "v2", [("test", "k")] + [("other", None)] * PRUNE_EVERY, retention=0.0)
+    first_seq, rows = db.execute("SELECT MIN(seq), COUNT(*) FROM cache_changes").fetchone()
+    assert rows < PRUNE_EVERY
+    assert first_seq > last_seq + 1
+    assert not db.execute("SELECT 1 FROM cache_changes WHERE topic = 'test'").fetchone()
+
+    # 残っている変更ログには "test" が無いが、削除済みの範囲を飛ばしたのでキャッシュ全体が消えて新しい値を読む
+    assert cache.get("k", load) == "v2"